@@ -0,0 +1,58 @@
+"""여러 파일을 ZIP으로 묶어 메모리에 전부 올리지 않고 스트리밍."""
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+from typing import Iterator
+
+_CHUNK_SIZE = 256 * 1024
+
+
+class _ChunkSink:
+    """zipfile이 쓰는 바이트를 모아 두었다가 스트림으로 내보내는 쓰기 전용 객체.
+
+    seek/tell을 지원하지 않으므로 zipfile은 data descriptor 방식으로 기록한다.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(files: list[tuple[Path, str]]) -> Iterator[bytes]:
+    """(경로, 압축 내 이름) 목록 → ZIP 바이트 청크.
+
+    MP3/AAC/Opus는 이미 압축된 포맷이라 ZIP_STORED로 CPU 없이 묶는다.
+    압축 내 이름이 겹치면 '이름 (2).mp3' 형태로 구분한다.
+    """
+    sink = _ChunkSink()
+    used: set[str] = set()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as zf:
+        for path, arcname in files:
+            name, n = arcname, 1
+            while name in used:
+                n += 1
+                stem, dot, ext = arcname.rpartition(".")
+                name = f"{stem} ({n}).{ext}" if dot else f"{arcname} ({n})"
+            used.add(name)
+
+            with path.open("rb") as src, zf.open(name, mode="w", force_zip64=True) as dst:
+                while chunk := src.read(_CHUNK_SIZE):
+                    dst.write(chunk)
+                    if data := sink.drain():
+                        yield data
+            if data := sink.drain():
+                yield data
+    if data := sink.drain():
+        yield data
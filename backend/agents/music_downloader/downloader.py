@@ -1,18 +1,49 @@
 """yt-dlp 기반 YouTube 검색 및 음원 다운로드."""
 from __future__ import annotations
 
+import os
 import re
 from pathlib import Path
 
-import yt_dlp
+from yt_dlp.utils import download_range_func
+
+from .ttl_cache import SingleFlight, TTLCache
+from .ydl_pool import YDLPool
 
 # cookies.txt 위치
 COOKIES_FILE = Path(__file__).parent / "cookies.txt"
 
+# YouTube 검색 결과 캐시 (LRU+TTL)
+YOUTUBE_SEARCH_CACHE_SIZE = int(os.getenv("YOUTUBE_SEARCH_CACHE_SIZE", "512"))
+YOUTUBE_SEARCH_CACHE_TTL = float(os.getenv("YOUTUBE_SEARCH_CACHE_TTL", "3600"))
+
+_search_cache = TTLCache(YOUTUBE_SEARCH_CACHE_SIZE, YOUTUBE_SEARCH_CACHE_TTL)
+_search_flight = SingleFlight()
+
+# 1이면 검색 목록만 가볍게 가져와(extract_flat) 점수 계산 — 후보별 player/format 해석 생략
+YOUTUBE_SEARCH_FLAT = os.getenv("YOUTUBE_SEARCH_FLAT", "1") != "0"
+
+# 다운로드 — 프래그먼트(DASH/HLS) 병렬 수, 단일 스트림 Range 분할 크기(bytes),
+# yt-dlp 요청 단위 재시도 횟수와 지수 백오프 기준·상한(초)
+YTDLP_CONCURRENT_FRAGMENTS = int(os.getenv("YTDLP_CONCURRENT_FRAGMENTS", "4"))
+YTDLP_HTTP_CHUNK_SIZE = int(os.getenv("YTDLP_HTTP_CHUNK_SIZE", str(10 * 1024 * 1024)))
+YTDLP_RETRIES = int(os.getenv("YTDLP_RETRIES", "10"))
+YTDLP_RETRY_BACKOFF = float(os.getenv("YTDLP_RETRY_BACKOFF", "1"))
+YTDLP_RETRY_BACKOFF_MAX = float(os.getenv("YTDLP_RETRY_BACKOFF_MAX", "30"))
+
+# 캐시에 보관할 검색 결과 필드 (점수 계산 + URL)
+_ENTRY_FIELDS = ("id", "title", "channel", "uploader", "duration", "webpage_url")
+
 
 # ─── 유틸 ────────────────────────────────────────────────────────────────────
 
 
+def extract_video_id(url: str) -> str | None:
+    """YouTube URL → 11자리 영상 ID. YouTube URL이 아니면 None."""
+    m = re.search(r"(?:v=|youtu\.be/|/shorts/)([A-Za-z0-9_-]{11})", url or "")
+    return m.group(1) if m else None
+
+
 def _safe_filename(name: str) -> str:
     """파일명에 사용할 수 없는 특수문자·공백을 안전하게 처리."""
     name = re.sub(r'[\\/*?:"<>|]', "", name)
@@ -46,6 +77,84 @@ def _base_opts() -> dict:
     }
 
 
+def _search_opts(flat: bool) -> dict:
+    opts = {
+        **_base_opts(),
+        "quiet": True,
+        "skip_download": True,
+        "noplaylist": True,
+        "socket_timeout": 30,
+    }
+    if flat:
+        opts["extract_flat"] = "in_playlist"
+    return opts
+
+
+def _playlist_opts() -> dict:
+    return {
+        **_base_opts(),
+        "quiet": True,
+        "skip_download": True,
+        "extract_flat": "in_playlist",
+        "socket_timeout": 30,
+    }
+
+
+# 출력 포맷별 스트림 선택 — 패스스루 가능한 코덱(AAC/Opus)의 오디오 스트림을 우선
+_DOWNLOAD_FORMATS = {
+    "mp3": "bestaudio/best",
+    "m4a": "bestaudio[acodec^=mp4a]/bestaudio/best",
+    "opus": "bestaudio[acodec=opus]/bestaudio/best",
+}
+
+
+def _retry_sleep(n: int) -> float:
+    """yt-dlp 재시도 대기 — n번째 재시도(0부터)마다 두 배, 상한 YTDLP_RETRY_BACKOFF_MAX."""
+    return min(YTDLP_RETRY_BACKOFF * 2**n, YTDLP_RETRY_BACKOFF_MAX)
+
+
+def _download_opts(fmt: str = "mp3") -> dict:
+    """format 전략:
+    - bestaudio: 오디오 전용 스트림 (DASH m4a/webm 등)
+    - best: 오디오 전용이 없을 때 최고 화질 복합 스트림 (오디오는 변환 단계에서 추출)
+    m4a/opus 요청이면 같은 코덱 스트림을 먼저 골라 재인코딩 없이 복사할 수 있게 한다.
+    yt-dlp 후처리(FFmpegExtractAudio) 없이 원본 스트림만 받는다 —
+    인코딩과 60초 샘플은 trimmer.transcode_with_sample이 한 번에 만든다.
+    outtmpl은 작업마다 download_audio에서 지정.
+
+    재개: 출력 디렉터리에 남은 .part(단일 스트림)·.ytdl(프래그먼트 진행 기록)에서 이어 받는다.
+    프래그먼트 포맷은 YTDLP_CONCURRENT_FRAGMENTS개를 병렬로, 단일 스트림은 Range 청크로 받는다.
+    """
+    return {
+        **_base_opts(),
+        "format": _DOWNLOAD_FORMATS[fmt],
+        "format_sort": ["abr", "asr", "ext:m4a:3"],
+        "quiet": False,
+        "continuedl": True,
+        "concurrent_fragment_downloads": YTDLP_CONCURRENT_FRAGMENTS,
+        "http_chunk_size": YTDLP_HTTP_CHUNK_SIZE,
+        "retries": YTDLP_RETRIES,
+        "fragment_retries": YTDLP_RETRIES,
+        "retry_sleep_functions": {"http": _retry_sleep, "fragment": _retry_sleep},
+    }
+
+
+# 옵션 프로필별 YoutubeDL 세션 풀 — 쿠키 변경 시 자동 재생성
+ydl_pool = YDLPool(COOKIES_FILE)
+ydl_pool.register("search", lambda: _search_opts(flat=False))
+ydl_pool.register("search_flat", lambda: _search_opts(flat=True))
+ydl_pool.register("playlist", _playlist_opts)
+ydl_pool.register("download", _download_opts)
+# format 선택기는 인스턴스 생성 시 고정되므로 출력 포맷마다 별도 프로필
+for _fmt in [f for f in _DOWNLOAD_FORMATS if f != "mp3"]:
+    ydl_pool.register(f"download_{_fmt}", lambda fmt=_fmt: _download_opts(fmt))
+
+
+def warm_ydl_pool() -> None:
+    """앱 시작 시 기본 프로필 세션을 미리 생성."""
+    ydl_pool.warm("search_flat" if YOUTUBE_SEARCH_FLAT else "search", "download")
+
+
 # ─── 검색 점수 계산 ───────────────────────────────────────────────────────────
 
 
@@ -79,51 +188,129 @@ def _score_entry(entry: dict, artist: str, title: str) -> int:
     return score
 
 
+def rerank_entries(entries: list[dict], artist: str, title: str) -> list[dict]:
+    """검색 결과를 주어진 아티스트·곡명 기준 점수로 다시 정렬 (동점이면 원래 순서 유지)."""
+    return sorted(entries, key=lambda e: _score_entry(e, artist, title), reverse=True)
+
+
+def is_confident_match(entry: dict, artist: str, title: str) -> bool:
+    """곡명이 영상 제목에 있고, 아티스트가 제목이나 채널에 있으면 확실한 후보로 본다.
+
+    아티스트를 모르면 곡명만 확인한다.
+    """
+    vtitle = (entry.get("title") or "").lower()
+    channel = (entry.get("channel") or entry.get("uploader") or "").lower()
+    a, t = artist.lower(), title.lower()
+    return bool(t) and t in vtitle and (not a or a in vtitle or a in channel)
+
+
 # ─── 공개 API ────────────────────────────────────────────────────────────────
 
 
+def _search_and_rank(
+    query: str, artist: str, title: str, flat: bool = YOUTUBE_SEARCH_FLAT
+) -> list[dict]:
+    """yt-dlp 검색 실행 → 적합도 점수 내림차순으로 정렬된 경량 결과 목록.
+
+    flat 모드는 검색 목록의 제목·채널·길이만으로 순위를 매기고,
+    선택된 후보는 실제 다운로드 시점에 download_audio에서만 전체 해석된다.
+    """
+    with ydl_pool.session("search_flat" if flat else "search") as ydl:
+        results = ydl.extract_info(f"ytsearch10:{query}", download=False)
+    entries = []
+    for e in (results or {}).get("entries") or []:
+        if not e:
+            continue
+        entry = {k: e.get(k) for k in _ENTRY_FIELDS}
+        # flat 결과는 webpage_url 대신 url(watch URL)만 있음
+        entry["webpage_url"] = entry["webpage_url"] or e.get("url")
+        entries.append(entry)
+    return rerank_entries(entries, artist, title)
+
+
+def search_youtube_ranked(
+    query: str, artist: str = "", title: str = "", flat: bool | None = None
+) -> list[dict]:
+    """YouTube 검색 결과를 점수순으로 반환. 캐시 + 동일 쿼리 동시 요청 병합.
+
+    flat이 None이면 YOUTUBE_SEARCH_FLAT 환경변수를 따른다.
+    """
+    if flat is None:
+        flat = YOUTUBE_SEARCH_FLAT
+    key = (query, artist.lower(), title.lower(), flat)
+    ranked = _search_cache.get(key)
+    if ranked is not None:
+        return ranked
+
+    def run() -> list[dict]:
+        result = _search_and_rank(query, artist, title, flat=flat)
+        # 빈 결과는 일시적 실패일 수 있으므로 캐시하지 않음
+        if result:
+            _search_cache.set(key, result)
+        return result
+
+    return _search_flight.do(key, run)
+
+
 def search_youtube(query: str, artist: str = "", title: str = "") -> str | None:
     """YouTube 검색 → 적합도 점수가 가장 높은 URL 반환."""
-    ydl_opts = {
-        **_base_opts(),
-        "quiet": True,
-        "skip_download": True,
-        "noplaylist": True,
-        "socket_timeout": 30,
-    }
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        results = ydl.extract_info(f"ytsearch10:{query}", download=False)
-        entries = (results or {}).get("entries") or []
-        if not entries:
-            return None
-        best = max(entries, key=lambda e: _score_entry(e, artist, title))
-        return best.get("webpage_url")
+    ranked = search_youtube_ranked(query, artist=artist, title=title)
+    return ranked[0].get("webpage_url") if ranked else None
 
 
-def download_audio(url: str, output_dir: Path) -> Path:
-    """URL에서 MP3 다운로드 → 저장된 파일 경로 반환.
+def expand_playlist(url: str, limit: int) -> list[dict]:
+    """플레이리스트 URL → [{"url", "title"}] (flat 목록, 최대 limit개)."""
+    with ydl_pool.session("playlist", playlistend=limit) as ydl:
+        info = ydl.extract_info(url, download=False)
+    tracks = []
+    for e in (info or {}).get("entries") or []:
+        if not e:
+            continue
+        track_url = e.get("webpage_url") or e.get("url")
+        if track_url:
+            tracks.append({"url": track_url, "title": e.get("title") or ""})
+    return tracks[:limit]
 
-    format 전략:
-    - bestaudio: 오디오 전용 스트림 (DASH m4a/webm 등)
-    - best: 오디오 전용이 없을 때 최고 화질 복합 스트림 → FFmpeg로 추출
-    FFmpegExtractAudio가 항상 mp3로 변환하므로 출력은 항상 audio.mp3.
+
+def search_cache_stats() -> dict:
+    """YouTube 검색 캐시 hit/miss 및 병합된 동시 요청 수."""
+    return {**_search_cache.stats(), "coalesced": _search_flight.coalesced}
+
+
+def download_audio(
+    url: str,
+    output_dir: Path,
+    progress_hooks: list | None = None,
+    fmt: str = "mp3",
+    max_seconds: float | None = None,
+) -> Path:
+    """URL에서 원본 오디오 스트림 다운로드 → 'source.<ext>' 경로 반환.
+
+    옵션은 _download_opts 참고. 변환은 하지 않는다.
+    fmt는 최종 출력 포맷 — 패스스루 가능한 스트림을 고르는 데만 쓰인다.
+    max_seconds가 주어지면 앞부분 [0, max_seconds] 구간만 받는다 (yt-dlp download_ranges,
+    ffmpeg가 필요한 바이트만 HTTP Range로 읽음).
+    progress_hooks는 yt-dlp 진행 훅 — 예외를 던지면 다운로드가 중단된다 (취소용).
     """
     output_dir.mkdir(parents=True, exist_ok=True)
-    ydl_opts = {
-        **_base_opts(),
-        "format": "bestaudio/best",
-        "format_sort": ["abr", "asr", "ext:m4a:3"],
-        "outtmpl": str(output_dir / "audio.%(ext)s"),
-        "postprocessors": [
-            {
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "192",
-            },
-        ],
-        "quiet": False,
-    }
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        ydl.extract_info(url, download=True)
+    profile = "download" if fmt == "mp3" else f"download_{fmt}"
+    params = {}
+    if max_seconds:
+        params["download_ranges"] = download_range_func(None, [(0, max_seconds)])
+    with ydl_pool.session(profile, **params) as ydl:
+        # 풀 기본값을 건드리지 않도록 outtmpl dict는 새로 만들어 교체
+        ydl.params["outtmpl"] = {
+            **ydl.params["outtmpl"],
+            "default": str(output_dir / "source.%(ext)s"),
+        }
+        for hook in progress_hooks or []:
+            ydl.add_progress_hook(hook)
+        info = ydl.extract_info(url, download=True)
 
-    return output_dir / "audio.mp3"
+    downloads = (info or {}).get("requested_downloads") or []
+    if downloads and downloads[0].get("filepath"):
+        return Path(downloads[0]["filepath"])
+    source = next(output_dir.glob("source.*"), None)
+    if source is None:
+        raise FileNotFoundError("다운로드된 원본 파일을 찾을 수 없습니다")
+    return source
@@ -0,0 +1,49 @@
+"""Job 상태 변경 알림 (프로세스 내 pub/sub).
+
+워커 스레드에서 job_store가 갱신되면 notify()가 해당 job을 구독 중인
+이벤트 루프의 asyncio.Event를 깨운다. 다른 워커 프로세스에서 일어난 변경은
+구독 측이 주기적으로 저장소를 다시 읽어 반영한다.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+
+
+class JobEvents:
+    def __init__(self) -> None:
+        self._subs: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, job_id: str) -> asyncio.Event:
+        """현재 이벤트 루프에서 job_id 변경 알림을 받을 Event 반환."""
+        event = asyncio.Event()
+        with self._lock:
+            self._subs.setdefault(job_id, set()).add((asyncio.get_running_loop(), event))
+        return event
+
+    def unsubscribe(self, job_id: str, event: asyncio.Event) -> None:
+        with self._lock:
+            subs = self._subs.get(job_id)
+            if not subs:
+                return
+            subs.difference_update({item for item in subs if item[1] is event})
+            if not subs:
+                del self._subs[job_id]
+
+    def notify(self, job_id: str) -> None:
+        """스레드 안전 — 어느 스레드에서 호출해도 구독자 루프에서 Event가 set됨."""
+        with self._lock:
+            subs = list(self._subs.get(job_id, ()))
+        for loop, event in subs:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # 루프가 이미 종료됨
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subs.values())
+
+
+job_events = JobEvents()
@@ -0,0 +1,248 @@
+"""/file 엔드포인트용 파일 응답 — HTTP Range(206) + 조건부 요청 + 제로카피 전송.
+
+- Range: 단일 구간(bytes=a-b, a-, -n)만 지원, 여러 구간 요청은 전체(200)로 응답
+- 캐시: 강한 ETag(inode·크기·mtime_ns) + Last-Modified, If-None-Match/If-Modified-Since → 304,
+  If-Range가 맞지 않으면 전체 응답
+- 전송: ASGI 서버가 zerocopysend(sendfile)·pathsend 확장을 제공하면 사용, 아니면 청크 읽기.
+  FILE_ACCEL_REDIRECT가 설정되면 nginx X-Accel-Redirect로 넘겨 nginx가 sendfile로 직접 전송
+- 진행 중 작업: follow_file_response는 인코더가 쓰고 있는 파일을 끝까지 따라가며 스트리밍
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Callable
+from urllib.parse import quote
+
+import anyio
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+# nginx internal location 접두사 (예: /_protected/) — 설정 시 파일 전송을 nginx에 위임
+FILE_ACCEL_REDIRECT = os.getenv("FILE_ACCEL_REDIRECT", "")
+
+_CHUNK_SIZE = 256 * 1024
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def _etag(st: os.stat_result) -> str:
+    # 저장소 항목은 공개 후 바뀌지 않으므로 강한 검증자로 사용
+    return f'"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match는 약한 비교 (W/ 접두사 무시)
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _not_modified_since(header: str, st: os.stat_result) -> bool:
+    try:
+        return int(st.st_mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """단일 Range 헤더 → (start, end) 포함 구간. 해석 불가면 None (전체 응답).
+
+    범위를 만족할 수 없으면 ValueError.
+    """
+    m = _RANGE_RE.match(header.strip())
+    if not m:
+        return None  # 형식 오류·여러 구간 → Range 무시
+    first, last = m.groups()
+    if not first and not last:
+        return None
+    if not first:  # bytes=-n : 마지막 n바이트
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class _FileRangeResponse(Response):
+    """path의 [start, end] 구간 전송. 서버가 지원하면 제로카피 확장 사용."""
+
+    def __init__(
+        self, path: Path, start: int, end: int, status_code: int, headers: dict[str, str]
+    ) -> None:
+        super().__init__(status_code=status_code, headers=headers)
+        self.path = path
+        self.start = start
+        self.end = end
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers}
+        )
+        count = self.end - self.start + 1
+        extensions = scope.get("extensions") or {}
+        if scope["method"].upper() == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+        elif "http.response.pathsend" in extensions and self.status_code == 200:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+        else:
+            async with await anyio.open_file(self.path, "rb") as f:
+                await f.seek(self.start)
+                remaining = count
+                while remaining > 0:
+                    chunk = await f.read(min(_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break  # 파일이 줄어든 경우 — 남은 길이는 채울 수 없음
+                    remaining -= len(chunk)
+                    await send(
+                        {"type": "http.response.body", "body": chunk, "more_body": remaining > 0}
+                    )
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def range_file_response(
+    request: Request,
+    path: Path,
+    media_type: str,
+    filename: str,
+    headers: dict[str, str] | None = None,
+    accel_root: Path | None = None,
+) -> Response:
+    """완성된 파일을 Range·조건부 요청을 반영해 응답.
+
+    accel_root: FILE_ACCEL_REDIRECT가 설정된 경우 이 디렉터리 기준 상대 경로를 nginx에 넘긴다.
+    """
+    st = path.stat()
+    if not stat.S_ISREG(st.st_mode):
+        raise FileNotFoundError(path)
+    etag = _etag(st)
+    base = {
+        **(headers or {}),
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": formatdate(st.st_mtime, usegmt=True),
+        "content-disposition": _content_disposition(filename),
+    }
+
+    if FILE_ACCEL_REDIRECT and accel_root is not None and path.is_relative_to(accel_root):
+        # Range·ETag 처리와 sendfile 전송은 nginx가 담당
+        location = FILE_ACCEL_REDIRECT.rstrip("/") + "/" + quote(
+            path.relative_to(accel_root).as_posix()
+        )
+        return Response(
+            media_type=media_type,
+            headers={**(headers or {}), "content-disposition": base["content-disposition"],
+                     "x-accel-redirect": location},
+        )
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=base)
+    elif (ims := request.headers.get("if-modified-since")) and _not_modified_since(ims, st):
+        return Response(status_code=304, headers=base)
+
+    size = st.st_size
+    rng = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range가 현재 ETag·Last-Modified와 다르면 파일이 바뀐 것 → 전체 응답
+    if range_header and (if_range is None or if_range.strip() in (etag, base["last-modified"])):
+        try:
+            rng = _parse_range(range_header, size)
+        except ValueError:
+            return Response(
+                status_code=416, headers={**base, "content-range": f"bytes */{size}"}
+            )
+
+    if rng is None:
+        return _FileRangeResponse(
+            path, 0, size - 1, 200,
+            {**base, "content-type": media_type, "content-length": str(size)},
+        )
+    start, end = rng
+    return _FileRangeResponse(
+        path, start, end, 206,
+        {
+            **base,
+            "content-type": media_type,
+            "content-length": str(end - start + 1),
+            "content-range": f"bytes {start}-{end}/{size}",
+        },
+    )
+
+
+async def _follow(
+    path: Path, is_finished: Callable[[], bool], poll_interval: float, idle_timeout: float
+) -> AsyncIterator[bytes]:
+    """파일 끝까지 읽고, 쓰기가 끝나지 않았으면 새로 쓰인 바이트를 기다렸다가 이어서 전송.
+
+    열린 파일 디스크립터를 계속 읽으므로 작업 완료 후 rename되어도 끝까지 따라간다.
+    """
+    async with await anyio.open_file(path, "rb") as f:
+        idle = 0.0
+        while True:
+            chunk = await f.read(_CHUNK_SIZE)
+            if chunk:
+                idle = 0.0
+                yield chunk
+                continue
+            # 작업 저장소 조회일 수 있으므로 이벤트 루프 밖에서
+            if await asyncio.to_thread(is_finished):
+                # 완료 판정과 마지막 쓰기 사이의 경합 방지 — 남은 바이트를 한 번 더 읽음
+                while chunk := await f.read(_CHUNK_SIZE):
+                    yield chunk
+                return
+            if idle >= idle_timeout:
+                return
+            await asyncio.sleep(poll_interval)
+            idle += poll_interval
+
+
+def follow_file_response(
+    path: Path,
+    media_type: str,
+    filename: str,
+    is_finished: Callable[[], bool],
+    poll_interval: float = 0.25,
+    idle_timeout: float = 120,
+) -> StreamingResponse:
+    """인코더가 아직 쓰고 있는 파일을 스트리밍 (길이를 모르므로 Range·ETag 없음).
+
+    is_finished: 쓰기가 끝났으면 True (작업 종료 등)
+    idle_timeout: 이 시간 동안 파일이 자라지 않으면 응답 종료
+    """
+    return StreamingResponse(
+        _follow(path, is_finished, poll_interval, idle_timeout),
+        media_type=media_type,
+        headers={
+            "content-disposition": _content_disposition(filename),
+            "cache-control": "no-store",
+            "x-accel-buffering": "no",
+        },
+    )
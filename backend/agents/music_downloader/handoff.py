@@ -0,0 +1,75 @@
+"""/search → /download 인계 토큰.
+
+/search가 확정한 YouTube URL과 정식 아티스트·곡명을 HMAC으로 서명한 짧은 수명의 토큰으로 돌려주고,
+/download가 이를 받으면 작업에서 YouTube 검색 단계를 건너뛴다.
+서버에 상태를 두지 않으므로 SQLite Job 저장소처럼 여러 워커가 공유할 필요가 없다
+(단, 워커 간에 검증하려면 HANDOFF_SECRET을 같은 값으로 지정해야 한다).
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# 서명 키 — 미지정 시 프로세스마다 임의 생성 (다른 워커가 발급한 토큰은 검증 실패 → 검색으로 대체)
+HANDOFF_SECRET = os.getenv("HANDOFF_SECRET", "")
+# 토큰 유효 기간(초)
+HANDOFF_TTL = float(os.getenv("HANDOFF_TTL", "900"))
+
+_secret = HANDOFF_SECRET.encode() or secrets.token_bytes(32)
+
+
+@dataclass(frozen=True)
+class Handoff:
+    url: str
+    artist: str
+    title: str
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_secret, payload.encode(), hashlib.sha256).digest())
+
+
+def issue_token(url: str, artist: str, title: str) -> str:
+    """검색 결과 → '<payload>.<서명>' 토큰."""
+    payload = _b64encode(
+        json.dumps(
+            {"u": url, "a": artist, "t": title, "exp": int(time.time() + HANDOFF_TTL)},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
+    )
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_token(token: str) -> Handoff | None:
+    """서명·만료 확인 → Handoff. 위조·손상·만료된 토큰이면 None."""
+    payload, _, signature = token.partition(".")
+    expected = _sign(payload).encode()
+    if not payload or not hmac.compare_digest(signature.encode(), expected):
+        logger.info("[Handoff] 서명 불일치 토큰")
+        return None
+    try:
+        data = json.loads(_b64decode(payload))
+        if data["exp"] < time.time():
+            logger.info("[Handoff] 만료된 토큰")
+            return None
+        return Handoff(data["u"], data["a"], data["t"])
+    except (ValueError, KeyError, TypeError):
+        return None
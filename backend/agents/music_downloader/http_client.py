@@ -0,0 +1,302 @@
+"""메타데이터 업스트림(Melon·Deezer·Genius) 공용 httpx 커넥션 풀.
+
+호스트별로 장수명 AsyncClient를 하나씩 두어 keep-alive 커넥션을 재사용하고,
+h2 패키지가 설치되어 있으면 HTTP/2로 협상한다.
+FastAPI lifespan에서 open_clients() / close_clients()로 생성·정리한다.
+
+fetch()는 호스트별 정책을 적용한 GET:
+- 토큰 버킷: 같은 호스트로 가는 동시 요청 전체를 초당 N회로 제한
+- 적응형 감속(AIMD): 429/403/5xx 응답 시 속도 절반, 성공할 때마다 조금씩 회복
+- 재시도: Retry-After 또는 지수 백오프 + 지터
+- 서킷 브레이커: 연속 실패 시 일정 시간 즉시 실패 (타임아웃을 매번 기다리지 않음)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from .metrics import UPSTREAM_REJECTED, UPSTREAM_SECONDS, upstream_outcome
+
+logger = logging.getLogger(__name__)
+
+# 풀 설정 (환경변수로 조정)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") != "0"
+
+# 호스트별 요청 속도 (초당 요청 수) — 기본값 + "호스트=속도,..." 형식 재정의
+HTTP_RATE = float(os.getenv("HTTP_RATE", "5"))
+HTTP_BURST = int(os.getenv("HTTP_BURST", "2"))
+HTTP_HOST_RATES = {
+    "www.melon.com": 2.0,  # 스크래핑 대상 — 봇 차단을 피하도록 보수적으로
+    "genius.com": 2.0,
+    **{
+        host.strip(): float(rate)
+        for host, _, rate in (
+            item.partition("=") for item in os.getenv("HTTP_HOST_RATES", "").split(",")
+        )
+        if host.strip() and rate
+    },
+}
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_RETRY_MAX_DELAY = float(os.getenv("HTTP_RETRY_MAX_DELAY", "5"))
+HTTP_BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "3"))
+HTTP_BREAKER_COOLDOWN = float(os.getenv("HTTP_BREAKER_COOLDOWN", "30"))
+
+# 업스트림이 부하·차단 신호로 보내는 상태 코드 → 감속 + 재시도
+_THROTTLE_STATUSES = {403, 429, 500, 502, 503, 504}
+
+# 호스트 → AsyncClient
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+class UpstreamUnavailable(Exception):
+    """서킷 브레이커가 열려 있어 요청을 보내지 않음."""
+
+
+def _http2_available() -> bool:
+    """httpx의 HTTP/2 지원은 h2 패키지가 있어야 동작."""
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _new_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        limits=limits,
+        timeout=HTTP_TIMEOUT,
+    )
+
+
+def get_client(url: str) -> httpx.AsyncClient:
+    """url의 호스트에 해당하는 공용 클라이언트 반환 (없으면 생성).
+
+    헤더·타임아웃·리다이렉트 정책은 호출 측에서 요청 단위로 지정한다.
+    """
+    host = httpx.URL(url).host
+    client = _clients.get(host)
+    if client is None or client.is_closed:
+        client = _new_client()
+        _clients[host] = client
+    return client
+
+
+async def open_clients(*base_urls: str) -> None:
+    """앱 시작 시 주요 업스트림 호스트의 클라이언트를 미리 생성."""
+    if HTTP2_ENABLED and not _http2_available():
+        logger.warning("[HTTP] h2 패키지가 없어 HTTP/1.1로 동작합니다 (pip install 'httpx[http2]')")
+    for url in base_urls:
+        get_client(url)
+
+
+async def close_clients() -> None:
+    """앱 종료 시 모든 커넥션 풀 정리."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+# ─── 호스트별 속도 제한 · 서킷 브레이커 ──────────────────────────────────────
+
+
+class TokenBucket:
+    """적응형 토큰 버킷 (이벤트 루프 단일 스레드에서만 사용).
+
+    토큰을 미리 예약(음수 허용)하고 부족한 만큼 잠들어, 동시 요청이 순서대로 간격을 둔다.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+    def on_success(self) -> None:
+        # 가산 증가: 최대 속도의 10%씩 회복
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    def on_throttle(self) -> None:
+        # 승산 감소: 절반으로 (최대 속도의 1/16까지)
+        self.rate = max(self.max_rate / 16, self.rate / 2)
+
+
+class CircuitBreaker:
+    """연속 실패 failures회 → cooldown초 동안 open(즉시 실패) → half-open에서 1건 시험."""
+
+    def __init__(self, failures: int, cooldown: float) -> None:
+        self.failures = failures
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._count = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> tuple[bool, bool]:
+        """→ (요청 허용 여부, half-open 시험 요청인지). 시험 요청은 끝나면 release() 호출."""
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return False, False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                return False, False
+            self._probing = True
+            return True, True
+        return True, False
+
+    def release(self) -> None:
+        """시험 요청 종료 (취소된 경우 포함) — 다음 요청이 다시 시험할 수 있게."""
+        self._probing = False
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            self.state = "closed"
+            self._count = 0
+            return
+        self._count += 1
+        if self.state == "half_open" or self._count >= self.failures:
+            if self.state != "open":
+                logger.warning("[HTTP] 서킷 open (%d회 연속 실패)", self._count)
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+
+class _HostPolicy:
+    def __init__(self, host: str) -> None:
+        self.bucket = TokenBucket(HTTP_HOST_RATES.get(host, HTTP_RATE), HTTP_BURST)
+        self.breaker = CircuitBreaker(HTTP_BREAKER_FAILURES, HTTP_BREAKER_COOLDOWN)
+        self.requests = 0
+        self.retries = 0
+        self.rejected = 0
+
+
+# 호스트 → 속도 제한·브레이커 상태
+_policies: dict[str, _HostPolicy] = {}
+
+
+def _policy(host: str) -> _HostPolicy:
+    policy = _policies.get(host)
+    if policy is None:
+        policy = _policies[host] = _HostPolicy(host)
+    return policy
+
+
+def _retry_delay(resp: httpx.Response | None, attempt: int) -> float:
+    """Retry-After(초 또는 HTTP 날짜)가 있으면 그 값, 없으면 지수 백오프 + full jitter."""
+    header = resp.headers.get("retry-after") if resp is not None else None
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(HTTP_RETRY_MAX_DELAY, 0.5 * 2**attempt))
+
+
+async def fetch(url: str, **kwargs) -> httpx.Response:
+    """호스트 정책(속도 제한·재시도·서킷 브레이커)을 적용한 GET.
+
+    kwargs는 httpx.AsyncClient.get에 그대로 전달된다.
+    재시도를 다 써도 실패 상태면 마지막 응답을 반환한다 (raise_for_status는 호출 측).
+    서킷이 열려 있으면 UpstreamUnavailable.
+    """
+    host = httpx.URL(url).host
+    policy = _policy(host)
+    allowed, probe = policy.breaker.allow()
+    if not allowed:
+        policy.rejected += 1
+        UPSTREAM_REJECTED.labels(host).inc()
+        raise UpstreamUnavailable(f"{host} 일시 차단 중 (연속 실패)")
+    try:
+        return await _fetch_with_retries(url, host, policy, kwargs)
+    finally:
+        # closed 상태에서 허용된 요청이 half-open 중에 끝나도 진행 중인 시험을 풀지 않도록
+        if probe:
+            policy.breaker.release()
+
+
+async def _fetch_with_retries(
+    url: str, host: str, policy: _HostPolicy, kwargs: dict
+) -> httpx.Response:
+    attempt = 0
+    while True:
+        await policy.bucket.acquire()
+        policy.requests += 1
+        resp = None
+        start = time.perf_counter()
+        try:
+            resp = await get_client(url).get(url, **kwargs)
+        except httpx.TransportError:
+            UPSTREAM_SECONDS.labels(host, upstream_outcome(None)).observe(
+                time.perf_counter() - start
+            )
+            # 연결 실패·타임아웃 — 재시도 여지가 없으면 실패로 기록
+            if attempt >= HTTP_RETRIES:
+                policy.breaker.record(False)
+                raise
+        else:
+            UPSTREAM_SECONDS.labels(host, upstream_outcome(resp.status_code)).observe(
+                time.perf_counter() - start
+            )
+            if resp.status_code not in _THROTTLE_STATUSES:
+                policy.bucket.on_success()
+                policy.breaker.record(True)
+                return resp
+            policy.bucket.on_throttle()
+
+        delay = _retry_delay(resp, attempt)
+        if attempt >= HTTP_RETRIES or delay > HTTP_RETRY_MAX_DELAY:
+            policy.breaker.record(False)
+            return resp
+        attempt += 1
+        policy.retries += 1
+        logger.info(
+            "[HTTP] %s 재시도 %d/%d (%.1fs 후, 상태 %s)",
+            host, attempt, HTTP_RETRIES, delay, resp.status_code if resp is not None else "오류",
+        )
+        await asyncio.sleep(delay)
+
+
+def host_stats() -> dict:
+    """호스트별 현재 속도·서킷 상태·요청/재시도/거부 수."""
+    return {
+        host: {
+            "rate": round(p.bucket.rate, 3),
+            "max_rate": p.bucket.max_rate,
+            "circuit": p.breaker.state,
+            "requests": p.requests,
+            "retries": p.retries,
+            "rejected": p.rejected,
+        }
+        for host, p in _policies.items()
+    }
@@ -0,0 +1,281 @@
+"""다운로드 Job 상태 저장소 — SQLite(WAL, 멀티 워커 공유) 또는 인메모리.
+
+모든 uvicorn 워커가 같은 SQLite 파일을 보므로 /status·/file 요청이
+작업을 실행 중인 프로세스가 아닌 다른 워커로 가도 같은 상태를 본다.
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable
+
+JOB_STORE = os.getenv("JOB_STORE", "sqlite")  # sqlite | memory
+# 기본 위치는 작업 디렉터리(DOWNLOAD_DIR) 안
+JOB_STORE_PATH = Path(
+    os.getenv(
+        "JOB_STORE_PATH",
+        str(
+            Path(os.getenv("DOWNLOAD_DIR", str(Path(__file__).parent / "_downloads")))
+            / "jobs.sqlite3"
+        ),
+    )
+)
+
+# 종료 상태 — finished_at 기록 및 TTL 만료 대상
+FINISHED_STATUSES = ("done", "error", "cancelled")
+
+
+def worker_id() -> str:
+    """현재 프로세스 식별자 (호스트:PID) — 작업 소유 프로세스 기록용."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobStore(ABC):
+    """Job 저장소 인터페이스. 필드는 JSON 직렬화 가능한 값만 사용.
+
+    on_update가 설정되어 있으면 갱신 성공 시 job_id로 호출된다 (변경 알림용).
+    """
+
+    on_update: Callable[[str], None] | None = None
+
+    @abstractmethod
+    def create(self, job_id: str, fields: dict) -> None:
+        ...
+
+    @abstractmethod
+    def create_many(self, jobs: dict[str, dict]) -> None:
+        """{job_id: fields}를 한 번에 생성 (배치 등 — 한 트랜잭션)."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def update(
+        self, job_id: str, only_if_status: str | tuple[str, ...] | None = None, **fields
+    ) -> bool:
+        """필드 병합 갱신. only_if_status가 주어지면 현재 상태가 일치할 때만 (원자적).
+
+        갱신되었으면 True.
+        """
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def expire(self, ttl: float) -> list[str]:
+        """종료 후 ttl초가 지난 작업 삭제 → 삭제된 job_id 목록."""
+
+    @abstractmethod
+    def find(self, statuses: tuple[str, ...]) -> dict[str, dict]:
+        """상태가 statuses 중 하나인 작업 {job_id: fields}."""
+
+
+def _status_matches(status: str | None, only_if_status) -> bool:
+    if only_if_status is None:
+        return True
+    if isinstance(only_if_status, str):
+        only_if_status = (only_if_status,)
+    return status in only_if_status
+
+
+class MemoryJobStore(JobStore):
+    """단일 프로세스·테스트용 인메모리 저장소."""
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, dict] = {}
+        self._finished_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, fields: dict) -> None:
+        with self._lock:
+            self._jobs[job_id] = dict(fields)
+
+    def create_many(self, jobs: dict[str, dict]) -> None:
+        with self._lock:
+            for job_id, fields in jobs.items():
+                self._jobs[job_id] = dict(fields)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def update(self, job_id: str, only_if_status=None, **fields) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not _status_matches(job.get("status"), only_if_status):
+                return False
+            job.update(fields)
+            if fields.get("status") in FINISHED_STATUSES:
+                self._finished_at[job_id] = time.time()
+        if self.on_update:
+            self.on_update(job_id)
+        return True
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._finished_at.pop(job_id, None)
+
+    def expire(self, ttl: float) -> list[str]:
+        cutoff = time.time() - ttl
+        with self._lock:
+            expired = [job_id for job_id, t in self._finished_at.items() if t <= cutoff]
+            for job_id in expired:
+                self._jobs.pop(job_id, None)
+                self._finished_at.pop(job_id, None)
+        return expired
+
+    def find(self, statuses: tuple[str, ...]) -> dict[str, dict]:
+        with self._lock:
+            return {
+                job_id: dict(job)
+                for job_id, job in self._jobs.items()
+                if job.get("status") in statuses
+            }
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    data        TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+
+class SQLiteJobStore(JobStore):
+    """WAL 모드 SQLite 저장소 — 같은 호스트의 여러 워커 프로세스가 공유.
+
+    갱신은 json_set 단일 UPDATE 문으로 수행되어 read-modify-write 경합이 없다.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _conn(self) -> sqlite3.Connection:
+        # 파일·스키마는 처음 사용할 때 생성 (import만으로 디스크에 쓰지 않음)
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with sqlite3.connect(self.path) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(_SCHEMA)
+                    self._initialized = True
+        # 스레드별 커넥션 재사용 (sqlite3 커넥션은 스레드 간 공유 불가)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, job_id: str, fields: dict) -> None:
+        self.create_many({job_id: fields})
+
+    def create_many(self, jobs: dict[str, dict]) -> None:
+        now = time.time()
+        conn = self._conn()
+        rows = [
+            (
+                job_id,
+                fields.get("status", "queued"),
+                json.dumps(fields, ensure_ascii=False),
+                now,
+                now,
+            )
+            for job_id, fields in jobs.items()
+        ]
+        # 여러 행을 한 트랜잭션으로 (쓰기 잠금을 한 번만 잡음)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO jobs (job_id, status, data, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, job_id: str) -> dict | None:
+        row = self._conn().execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, job_id: str, only_if_status=None, **fields) -> bool:
+        if not fields:
+            return False
+        now = time.time()
+        status = fields.get("status")
+        # 필드 단위 교체 (json_patch는 중첩 dict를 병합하므로 사용하지 않음)
+        paths = ", ".join("?, json(?)" for _ in fields)
+        sql = (
+            f"UPDATE jobs SET data = json_set(data, {paths}), status = coalesce(?, status), "
+            "updated_at = ?, finished_at = CASE WHEN ? THEN ? ELSE finished_at END "
+            "WHERE job_id = ?"
+        )
+        params: list = []
+        for key, value in fields.items():
+            params += [f'$."{key}"', json.dumps(value, ensure_ascii=False)]
+        params += [
+            status,
+            now,
+            status in FINISHED_STATUSES,
+            now,
+            job_id,
+        ]
+        if only_if_status is not None:
+            if isinstance(only_if_status, str):
+                only_if_status = (only_if_status,)
+            sql += f" AND status IN ({', '.join('?' * len(only_if_status))})"
+            params.extend(only_if_status)
+        cur = self._conn().execute(sql, params)
+        if cur.rowcount == 0:
+            return False
+        if self.on_update:
+            self.on_update(job_id)
+        return True
+
+    def delete(self, job_id: str) -> None:
+        self._conn().execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def expire(self, ttl: float) -> list[str]:
+        cutoff = time.time() - ttl
+        conn = self._conn()
+        rows = conn.execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at <= ? RETURNING job_id",
+            (cutoff,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def find(self, statuses: tuple[str, ...]) -> dict[str, dict]:
+        rows = self._conn().execute(
+            f"SELECT job_id, data FROM jobs WHERE status IN ({', '.join('?' * len(statuses))})",
+            statuses,
+        ).fetchall()
+        return {job_id: json.loads(data) for job_id, data in rows}
+
+
+def make_job_store() -> JobStore:
+    """JOB_STORE 환경변수에 따라 저장소 생성."""
+    if JOB_STORE == "memory":
+        return MemoryJobStore()
+    return SQLiteJobStore(JOB_STORE_PATH)
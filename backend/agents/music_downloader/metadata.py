@@ -7,17 +7,27 @@ import os
 import re
 from typing import Optional
 
-import httpx
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
+from .http_client import UpstreamUnavailable, fetch
+from .metadata_cache import metadata_cache
+from .metrics import Span, span
+from .parsers import parse_genius_lyrics, parse_melon_detail, parse_melon_lyrics, run_parser
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-_DEEZER_BASE = "https://api.deezer.com"
-_GENIUS_BASE = "https://api.genius.com"
-_MELON_BASE = "https://www.melon.com"
+# 업스트림 주소 — 오프라인 벤치마크(benchmarks/standin.py)에서 로컬 대역 서버로 바꿀 때 사용
+_DEEZER_BASE = os.getenv("DEEZER_BASE_URL", "https://api.deezer.com")
+_GENIUS_BASE = os.getenv("GENIUS_API_BASE_URL", "https://api.genius.com")
+_MELON_BASE = os.getenv("MELON_BASE_URL", "https://www.melon.com")
+
+# lifespan에서 커넥션 풀을 미리 열어둘 업스트림
+UPSTREAM_BASES = (_MELON_BASE, _DEEZER_BASE, _GENIUS_BASE, "https://genius.com")
+
+# 1이면 Deezer·Genius 폴백을 Melon과 동시에 시작 (collect_all_metadata 기본 모드)
+METADATA_SPECULATIVE = os.getenv("METADATA_SPECULATIVE", "0") == "1"
 
 GENIUS_ACCESS_TOKEN = os.getenv("GENIUS_ACCESS_TOKEN", "")
 if not GENIUS_ACCESS_TOKEN:
@@ -47,18 +57,26 @@ def _melon_headers() -> dict:
 
 async def fetch_melon_metadata(artist: str, title: str) -> dict:
     """Melon 검색 + 상세 페이지 스크래핑 → 전체 메타데이터 반환."""
+    with span("metadata", "melon", cancelled=(asyncio.CancelledError,)) as stage:
+        return await _fetch_melon_metadata(artist, title, stage)
+
+
+async def _fetch_melon_metadata(artist: str, title: str, stage: Span) -> dict:
     headers = _melon_headers()
 
     # ① 검색
     song_id: Optional[str] = None
     try:
-        async with httpx.AsyncClient(headers=headers, timeout=10, follow_redirects=True) as client:
-            resp = await client.get(
-                f"{_MELON_BASE}/search/song/index.htm",
-                params={"q": f"{artist} {title}"},
-            )
-            resp.raise_for_status()
-            html = resp.text
+        url = f"{_MELON_BASE}/search/song/index.htm"
+        resp = await fetch(
+            url,
+            params={"q": f"{artist} {title}"},
+            headers=headers,
+            timeout=10,
+            follow_redirects=True,
+        )
+        resp.raise_for_status()
+        html = resp.text
 
         # song_id 추출 — goSongDetail 또는 songId 패턴
         match = re.search(r"goSongDetail\('(\d+)'\)", html)
@@ -69,132 +87,60 @@ async def fetch_melon_metadata(artist: str, title: str) -> dict:
         else:
             logger.warning("[Melon] song_id 추출 실패: %s - %s", artist, title)
             return {}
+    except UpstreamUnavailable as e:
+        stage.fail()
+        logger.warning("[Melon] 건너뜀: %s", e)
+        return {}
     except Exception as e:
+        stage.fail()
         logger.exception("[Melon] 검색 요청 실패: %s", e)
         return {}
 
-    # anti-bot 딜레이
-    await asyncio.sleep(0.8)
-
     # ② 상세 페이지
     try:
-        async with httpx.AsyncClient(headers=headers, timeout=10, follow_redirects=True) as client:
-            resp = await client.get(
-                f"{_MELON_BASE}/song/detail.htm",
-                params={"songId": song_id},
-            )
-            resp.raise_for_status()
-            detail_html = resp.text
+        url = f"{_MELON_BASE}/song/detail.htm"
+        resp = await fetch(
+            url,
+            params={"songId": song_id},
+            headers=headers,
+            timeout=10,
+            follow_redirects=True,
+        )
+        resp.raise_for_status()
+        detail_html = resp.text
     except Exception as e:
+        stage.fail()
         logger.exception("[Melon] 상세 페이지 요청 실패: %s", e)
         return {}
 
-    soup = BeautifulSoup(detail_html, "lxml")
-
-    # ③ 앨범 커버 (상세 페이지 상단 대표 이미지)
-    cover_url = ""
-    for selector in [".image_typeAll img", ".thumb_album img", ".wrap_thumb img"]:
-        el = soup.select_one(selector)
-        if el and el.get("src"):
-            cover_url = el["src"]
-            break
-
-    # ④ 곡명 — class="none" 숨김 요소(strong/span 모두) 제거 후 텍스트 추출
-    song_title = ""
-    for selector in [".song_name", "#d_song_name", "h2.sub_title"]:
-        el = soup.select_one(selector)
-        if el:
-            for hidden in el.find_all(class_="none"):
-                hidden.decompose()
-            text = el.get_text(strip=True)
-            if text:
-                song_title = text
-                break
-
-    # ⑤ 아티스트 — .wrap_info/.section_info 내부의 .artist 우선
-    song_artist = ""
-    for selector in [".wrap_info .artist", ".section_info .artist",
-                     ".wrap_info .artist_name", "#d_artist_name a"]:
-        el = soup.select_one(selector)
-        if el:
-            text = el.get_text(strip=True)
-            if text:
-                song_artist = text
-                break
-
-    # ⑥ 앨범·발매일 — dl dt/dd 구조
-    album = ""
-    release_date = ""
-
-    for dt in soup.find_all("dt"):
-        label = dt.get_text(strip=True)
-        dd = dt.find_next_sibling("dd")
-        if not dd:
-            continue
-        value = dd.get_text(strip=True)
-        if "앨범" in label:
-            album = value
-        elif "발매일" in label:
-            release_date = _normalize_date(value)
-
-    # ⑦ 작곡가/작사가 — ul.list_person > li 단위로 이름과 역할 1:1 매핑
-    composer_names: list[str] = []
-    lyricist_names: list[str] = []
-
-    for li in soup.select("ul.list_person li"):
-        name_el = li.select_one(".artist_name")
-        role_el = li.select_one("span.type")
-        if not name_el or not role_el:
-            continue
-        name = name_el.get_text(strip=True)
-        role = role_el.get_text(strip=True)
-        if "작곡" in role and name not in composer_names:
-            composer_names.append(name)
-        elif "작사" in role and name not in lyricist_names:
-            lyricist_names.append(name)
-
-    composer = ", ".join(composer_names)
-    lyricist = ", ".join(lyricist_names)
-
-    # ⑦ 가사 (인라인)
-    lyrics = ""
-    for selector in ["#d_video_summary", ".lyric_wrap", "#d_song_lyrics", ".wrap_lyric"]:
-        el = soup.select_one(selector)
-        if el:
-            for br in el.find_all("br"):
-                br.replace_with("\n")
-            text = el.get_text(separator="\n", strip=True)
-            if len(text) > 20:
-                lyrics = text
-                break
-
-    # ⑧ 가사 AJAX 폴백
+    # ③ 커버·곡명·아티스트·앨범·발매일·작곡/작사·인라인 가사 (필요한 영역만 파싱)
+    info = await run_parser(parse_melon_detail, detail_html)
+    lyrics = info["lyrics"]
+
+    # ④ 가사 AJAX 폴백
     if not lyrics and song_id:
         try:
-            await asyncio.sleep(0.5)
-            async with httpx.AsyncClient(headers=headers, timeout=10, follow_redirects=True) as client:
-                resp = await client.get(
-                    f"{_MELON_BASE}/song/lyrics.htm",
-                    params={"songId": song_id},
-                )
-                resp.raise_for_status()
-                lyrics_soup = BeautifulSoup(resp.text, "lxml")
-                for br in lyrics_soup.find_all("br"):
-                    br.replace_with("\n")
-                raw = lyrics_soup.get_text(separator="\n", strip=True)
-                if len(raw) > 20:
-                    lyrics = raw
+            url = f"{_MELON_BASE}/song/lyrics.htm"
+            resp = await fetch(
+                url,
+                params={"songId": song_id},
+                headers=headers,
+                timeout=10,
+                follow_redirects=True,
+            )
+            resp.raise_for_status()
+            lyrics = await run_parser(parse_melon_lyrics, resp.text)
         except Exception as e:
             logger.warning("[Melon] 가사 AJAX 폴백 실패: %s", e)
 
     return {
-        "artist": song_artist or artist,
-        "title": song_title or title,
-        "album": album,
-        "release_date": release_date,
-        "cover_url": cover_url,
-        "composer": composer,
-        "lyricist": lyricist,
+        "artist": info["artist"] or artist,
+        "title": info["title"] or title,
+        "album": info["album"],
+        "release_date": _normalize_date(info["release_date"]),
+        "cover_url": info["cover_url"],
+        "composer": info["composer"],
+        "lyricist": info["lyricist"],
         "lyrics": lyrics,
     }
 
@@ -229,11 +175,13 @@ async def fetch_cover_art(melon_cover_url: str, artist: str, title: str) -> str:
     if melon_cover_url:
         return melon_cover_url
 
-    try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(
-                f"{_DEEZER_BASE}/search",
+    with span("metadata", "deezer", cancelled=(asyncio.CancelledError,)) as stage:
+        try:
+            url = f"{_DEEZER_BASE}/search"
+            resp = await fetch(
+                url,
                 params={"q": f"{artist} {title}"},
+                timeout=10,
             )
             resp.raise_for_status()
             items = resp.json().get("data", [])
@@ -242,8 +190,9 @@ async def fetch_cover_art(melon_cover_url: str, artist: str, title: str) -> str:
                 if cover_xl:
                     logger.info("[Deezer] 커버 아트 폴백 찾음")
                     return cover_xl
-    except Exception as e:
-        logger.warning("[Deezer] 커버 아트 폴백 실패: %s", e)
+        except Exception as e:
+            stage.fail()
+            logger.warning("[Deezer] 커버 아트 폴백 실패: %s", e)
 
     return ""
 
@@ -264,64 +213,56 @@ async def fetch_genius_lyrics(artist: str, title: str) -> Optional[str]:
     if not GENIUS_ACCESS_TOKEN:
         return None
 
-    try:
-        genius_headers = {
-            **_SCRAPE_HEADERS,
-            "Authorization": f"Bearer {GENIUS_ACCESS_TOKEN}",
-        }
-        async with httpx.AsyncClient(headers=genius_headers, timeout=10) as client:
-            resp = await client.get(
-                f"{_GENIUS_BASE}/search",
+    with span("metadata", "genius", cancelled=(asyncio.CancelledError,)) as stage:
+        try:
+            genius_headers = {
+                **_SCRAPE_HEADERS,
+                "Authorization": f"Bearer {GENIUS_ACCESS_TOKEN}",
+            }
+            url = f"{_GENIUS_BASE}/search"
+            resp = await fetch(
+                url,
                 params={"q": f"{artist} {title}"},
+                headers=genius_headers,
+                timeout=10,
             )
             resp.raise_for_status()
             hits = resp.json().get("response", {}).get("hits", [])
 
-        if not hits:
-            logger.warning("[Genius] 검색 결과 없음: %s - %s", artist, title)
-            return None
+            if not hits:
+                logger.warning("[Genius] 검색 결과 없음: %s - %s", artist, title)
+                return None
 
-        song_url = hits[0].get("result", {}).get("url", "")
-        if not song_url:
-            return None
+            song_url = hits[0].get("result", {}).get("url", "")
+            if not song_url:
+                return None
 
-        async with httpx.AsyncClient(
-            headers=_SCRAPE_HEADERS, timeout=15, follow_redirects=True
-        ) as client:
-            resp = await client.get(song_url)
+            resp = await fetch(
+                song_url, headers=_SCRAPE_HEADERS, timeout=15, follow_redirects=True
+            )
             resp.raise_for_status()
 
-        soup = BeautifulSoup(resp.text, "lxml")
-
-        # 최신 Genius 구조: data-lyrics-container="true"
-        containers = soup.find_all("div", attrs={"data-lyrics-container": "true"})
-        if containers:
-            lines = []
-            for container in containers:
-                for br in container.find_all("br"):
-                    br.replace_with("\n")
-                lines.append(container.get_text())
-            return "\n".join(lines).strip()
-
-        # 폴백: class 이름에 "Lyrics" 포함하는 div
-        for div in soup.find_all("div", class_=re.compile(r"Lyrics")):
-            text = div.get_text(separator="\n", strip=True)
-            if len(text) > 100:
-                return text
-
-        logger.warning("[Genius] 가사 파싱 실패: %s", song_url)
-        return None
+            # 가사 컨테이너(data-lyrics-container) 조각만 파싱, 없으면 "Lyrics" 클래스 div 폴백
+            lyrics = await run_parser(parse_genius_lyrics, resp.text)
+            if lyrics is None:
+                logger.warning("[Genius] 가사 파싱 실패: %s", song_url)
+            return lyrics
 
-    except Exception as e:
-        logger.exception("[Genius] 가사 수집 실패: %s", e)
-        return None
+        except UpstreamUnavailable as e:
+            stage.fail()
+            logger.warning("[Genius] 건너뜀: %s", e)
+            return None
+        except Exception as e:
+            stage.fail()
+            logger.exception("[Genius] 가사 수집 실패: %s", e)
+            return None
 
 
 # ─── 통합 수집 ───────────────────────────────────────────────────────────────
 
 
-async def collect_all_metadata(artist: str, title: str) -> dict:
-    """Melon → Genius(폴백) 순으로 메타데이터를 수집하여 병합한 최종 dict 반환."""
+async def _collect_sequential(artist: str, title: str) -> tuple[dict, str, str]:
+    """Melon → Deezer → Genius 순차 수집. (melon, cover_url, lyrics) 반환."""
     # 1단계: Melon에서 한 번에 모든 메타데이터 수집
     melon = await fetch_melon_metadata(artist, title)
 
@@ -336,18 +277,86 @@ async def collect_all_metadata(artist: str, title: str) -> dict:
     # 3단계: 가사가 없을 때만 Genius 폴백
     lyrics = melon.get("lyrics", "")
     if not lyrics:
-        lyrics = (
-            await fetch_genius_lyrics(resolved_artist, resolved_title)
-            or "가사를 찾을 수 없습니다"
-        )
+        lyrics = await fetch_genius_lyrics(resolved_artist, resolved_title) or ""
+
+    return melon, cover_url, lyrics
+
+
+async def _collect_speculative(artist: str, title: str) -> tuple[dict, str, str]:
+    """Melon·Deezer·Genius를 입력 그대로 동시에 시작하는 투기적 수집.
+
+    필드별로 Melon 값이 있으면 그것을 쓰고 해당 폴백 요청은 즉시 취소한다.
+    아티스트·곡명 확정에 어차피 Melon 응답이 필요하므로, 최악의 지연은
+    가장 느린 단일 소스 수준으로 줄어든다.
+    """
+    melon_task = asyncio.create_task(fetch_melon_metadata(artist, title))
+    cover_task = asyncio.create_task(fetch_cover_art("", artist, title))
+    lyrics_task = asyncio.create_task(fetch_genius_lyrics(artist, title))
+    try:
+        melon = await melon_task
+        resolved_artist = melon.get("artist") or artist
+        resolved_title = melon.get("title") or title
+        renamed = (resolved_artist, resolved_title) != (artist, title)
+
+        cover_url = melon.get("cover_url", "")
+        if cover_url:
+            cover_task.cancel()
+        else:
+            cover_url = await cover_task
+            # 원본 입력으로 못 찾았고 Melon이 정식 명칭을 줬다면 한 번 더
+            if not cover_url and renamed:
+                cover_url = await fetch_cover_art("", resolved_artist, resolved_title)
+
+        lyrics = melon.get("lyrics", "")
+        if lyrics:
+            lyrics_task.cancel()
+        else:
+            lyrics = await lyrics_task or ""
+            if not lyrics and renamed:
+                lyrics = await fetch_genius_lyrics(resolved_artist, resolved_title) or ""
+    finally:
+        for task in (melon_task, cover_task, lyrics_task):
+            if not task.done():
+                task.cancel()
+
+    return melon, cover_url, lyrics
+
+
+async def collect_all_metadata(
+    artist: str, title: str, speculative: bool | None = None
+) -> dict:
+    """Melon → Deezer·Genius(폴백) 메타데이터를 수집하여 병합한 최종 dict 반환.
+
+    정규화된 아티스트/곡명 기준으로 디스크 캐시를 먼저 조회한다.
+    speculative가 None이면 METADATA_SPECULATIVE 환경변수를 따른다.
+    """
+    fields = await asyncio.to_thread(metadata_cache.get, artist, title)
+    if fields is None:
+        if speculative is None:
+            speculative = METADATA_SPECULATIVE
+        collect = _collect_speculative if speculative else _collect_sequential
+        melon, cover_url, lyrics = await collect(artist, title)
+
+        # 캐시에는 원본 값 저장 — 빈 값은 negative TTL로 짧게 보관됨
+        fields = {
+            "artist": melon.get("artist", ""),
+            "title": melon.get("title", ""),
+            "album": melon.get("album", ""),
+            "release_date": melon.get("release_date", ""),
+            "cover_url": cover_url,
+            "lyrics": lyrics,
+            "composer": melon.get("composer", ""),
+            "lyricist": melon.get("lyricist", ""),
+        }
+        await asyncio.to_thread(metadata_cache.put, artist, title, fields)
 
     return {
-        "artist": resolved_artist,
-        "title": resolved_title,
-        "album": melon.get("album", ""),
-        "release_date": melon.get("release_date", ""),
-        "cover_url": cover_url,
-        "lyrics": lyrics,
-        "composer": melon.get("composer") or "정보 없음",
-        "lyricist": melon.get("lyricist") or "정보 없음",
+        "artist": fields["artist"] or artist,
+        "title": fields["title"] or title,
+        "album": fields["album"],
+        "release_date": fields["release_date"],
+        "cover_url": fields["cover_url"],
+        "lyrics": fields["lyrics"] or "가사를 찾을 수 없습니다",
+        "composer": fields["composer"] or "정보 없음",
+        "lyricist": fields["lyricist"] or "정보 없음",
     }
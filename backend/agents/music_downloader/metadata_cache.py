@@ -0,0 +1,153 @@
+"""메타데이터 디스크 캐시 (SQLite) — 정규화된 아티스트/곡명 키, 필드별 TTL."""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+METADATA_CACHE_ENABLED = os.getenv("METADATA_CACHE_ENABLED", "1") != "0"
+METADATA_CACHE_PATH = Path(
+    os.getenv(
+        "METADATA_CACHE_PATH",
+        str(Path(__file__).parent / "_cache" / "metadata.sqlite3"),
+    )
+)
+
+_DAY = 24 * 60 * 60
+
+# 필드별 TTL(초) — 곡 정보는 거의 바뀌지 않고, 커버·가사는 상대적으로 자주 보정됨
+FIELD_TTLS: dict[str, int] = {
+    "artist": 30 * _DAY,
+    "title": 30 * _DAY,
+    "album": 30 * _DAY,
+    "release_date": 30 * _DAY,
+    "composer": 30 * _DAY,
+    "lyricist": 30 * _DAY,
+    "lyrics": 14 * _DAY,
+    "cover_url": 7 * _DAY,
+}
+
+# 빈 값(찾지 못함)은 짧게만 보관 — 일시적 실패가 오래 고착되지 않도록
+NEGATIVE_TTL = int(os.getenv("METADATA_CACHE_NEGATIVE_TTL", "600"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata_cache (
+    artist_key TEXT NOT NULL,
+    title_key  TEXT NOT NULL,
+    field      TEXT NOT NULL,
+    value      TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (artist_key, title_key, field)
+)
+"""
+
+
+def normalize_key(text: str) -> str:
+    """캐시 키 정규화: NFKC(한글 자모 조합·호환 문자) → 소문자 → 공백 제거.
+
+    '아이유', 'ㅇㅏㅇㅣㅇㅠ'(분해형), ' IU ' 와 'iu' 같은 입력 차이를 흡수한다.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", "", text).casefold()
+
+
+class MetadataCache:
+    """collect_all_metadata 앞단의 SQLite 캐시.
+
+    get()은 모든 필드가 유효할 때만 dict를 반환하고, 하나라도 만료되면
+    None을 반환해 전체를 다시 수집하게 한다 (Melon은 어차피 한 번에 모든 필드를 줌).
+    """
+
+    def __init__(self, path: Path, enabled: bool = True) -> None:
+        self.path = path
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with sqlite3.connect(self.path) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.execute(_SCHEMA)
+                    self._initialized = True
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, artist: str, title: str) -> dict | None:
+        if not self.enabled:
+            return None
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT field, value FROM metadata_cache "
+                    "WHERE artist_key = ? AND title_key = ? AND expires_at > ?",
+                    (normalize_key(artist), normalize_key(title), time.time()),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("[Cache] 메타데이터 캐시 조회 실패: %s", e)
+            return None
+
+        fields = dict(rows)
+        if not FIELD_TTLS.keys() <= fields.keys():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return fields
+
+    def put(self, artist: str, title: str, fields: dict) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        a_key, t_key = normalize_key(artist), normalize_key(title)
+        rows = [
+            (
+                a_key,
+                t_key,
+                field,
+                fields.get(field) or "",
+                now + (ttl if fields.get(field) else NEGATIVE_TTL),
+            )
+            for field, ttl in FIELD_TTLS.items()
+        ]
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO metadata_cache "
+                    "(artist_key, title_key, field, value, expires_at) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+        except sqlite3.Error as e:
+            logger.warning("[Cache] 메타데이터 캐시 저장 실패: %s", e)
+
+    def purge(self, artist: str | None = None, title: str | None = None) -> int:
+        """항목 삭제. 인자가 없으면 전체, artist/title이 주어지면 해당 키만."""
+        clauses, params = [], []
+        if artist:
+            clauses.append("artist_key = ?")
+            params.append(normalize_key(artist))
+        if title:
+            clauses.append("title_key = ?")
+            params.append(normalize_key(title))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            cur = conn.execute(f"DELETE FROM metadata_cache{where}", params)
+            conn.execute("DELETE FROM metadata_cache WHERE expires_at <= ?", (time.time(),))
+        # 행 단위가 아닌 곡 단위 개수로 환산
+        return cur.rowcount // len(FIELD_TTLS)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "hits": self.hits, "misses": self.misses}
+
+
+metadata_cache = MetadataCache(METADATA_CACHE_PATH, enabled=METADATA_CACHE_ENABLED)
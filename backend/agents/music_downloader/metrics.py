@@ -0,0 +1,220 @@
+"""Prometheus 지표 — 단계별 소요 시간, 업스트림 지연·오류, 캐시 적중, 대기열.
+
+- 구간 측정: span(pipeline, stage)으로 감싼 구간을 히스토그램에 기록 (결과 ok/error/cancelled)
+  - job: 다운로드 파이프라인 단계 (scheduler.stage가 기록, 슬롯 대기는 별도 지표)
+  - search: /search의 메타데이터 수집·YouTube 검색
+  - metadata: Melon·Deezer·Genius 수집기
+- 업스트림: http_client.fetch의 요청 시도마다 호스트·결과(2xx/4xx/5xx/error)별 지연
+- 현황(캐시 hit/miss, 대기열·실행 중 작업, 호스트별 속도·서킷)은 수집 시점에
+  각 모듈의 stats()에서 읽어 온다 — 요청 경로에 추가 비용 없음
+- HTTP 요청: MetricsMiddleware가 라우트별 응답 시작까지의 시간을 기록하고,
+  SLOW_REQUEST_SECONDS 이상이면 경고 로그를 남긴다
+
+지표는 프로세스별이다 (uvicorn 워커마다 따로 수집).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# 응답 시작까지 이 시간(초) 이상 걸린 요청은 경고 로그 (0이면 끔)
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "0"))
+
+# 수 ms(캐시 적중)부터 수 분(긴 곡 다운로드·변환)까지
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+STAGE_SECONDS = Histogram(
+    "yongent_stage_seconds",
+    "파이프라인 단계 소요 시간",
+    ["pipeline", "stage", "outcome"],
+    buckets=_BUCKETS,
+)
+STAGE_WAIT_SECONDS = Histogram(
+    "yongent_stage_wait_seconds",
+    "다운로드 단계 실행 슬롯 대기 시간",
+    ["stage"],
+    buckets=_BUCKETS,
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "yongent_queue_wait_seconds",
+    "다운로드 작업 대기열 대기 시간 (제출~실행 시작)",
+    buckets=_BUCKETS,
+)
+JOB_SECONDS = Histogram(
+    "yongent_job_seconds",
+    "다운로드 작업 실행 시간 (실행 시작~종료)",
+    ["mode", "status"],
+    buckets=_BUCKETS,
+)
+UPSTREAM_SECONDS = Histogram(
+    "yongent_upstream_request_seconds",
+    "업스트림 HTTP 요청 시도별 지연",
+    ["host", "outcome"],
+    buckets=_BUCKETS,
+)
+UPSTREAM_REJECTED = Counter(
+    "yongent_upstream_rejected",
+    "서킷 open으로 보내지 않은 업스트림 요청",
+    ["host"],
+)
+PREFETCHES = Counter(
+    "yongent_prefetches",
+    "/search 후 프리페치 (started: 시작, claimed: 다운로드 작업이 청구, expired: 미청구 만료)",
+    ["outcome"],
+)
+HTTP_SECONDS = Histogram(
+    "yongent_http_request_seconds",
+    "HTTP 요청 처리 시간 (응답 시작까지)",
+    ["method", "route", "status"],
+    buckets=_BUCKETS,
+)
+
+
+class Span:
+    """span()이 돌려주는 핸들 — 구간 안에서 예외를 직접 처리했으면 fail()로 error 기록."""
+
+    def __init__(self) -> None:
+        self.failed = False
+
+    def fail(self) -> None:
+        self.failed = True
+
+
+@contextmanager
+def span(
+    pipeline: str, stage: str, cancelled: tuple[type[BaseException], ...] = ()
+) -> Iterator[Span]:
+    """구간 소요 시간 기록. 예외가 cancelled 중 하나면 cancelled, 그 외 예외·fail()은 error."""
+    outcome = "error"
+    handle = Span()
+    start = time.perf_counter()
+    try:
+        yield handle
+        outcome = "error" if handle.failed else "ok"
+    except cancelled:
+        outcome = "cancelled"
+        raise
+    finally:
+        STAGE_SECONDS.labels(pipeline, stage, outcome).observe(time.perf_counter() - start)
+
+
+def upstream_outcome(status_code: int | None) -> str:
+    """응답 상태 → 결과 레이블 (연결 실패·타임아웃은 error)."""
+    return "error" if status_code is None else f"{status_code // 100}xx"
+
+
+# ─── 수집 시점 현황 ──────────────────────────────────────────────────────────
+
+
+class StatsCollector(Collector):
+    """각 모듈의 stats() 결과를 수집 시점에 지표로 변환.
+
+    queue: JobScheduler.stats / caches: {캐시 이름: stats()} / upstreams: http_client.host_stats
+    """
+
+    def __init__(
+        self,
+        queue: Callable[[], dict],
+        caches: Callable[[], dict[str, dict]],
+        upstreams: Callable[[], dict[str, dict]],
+    ) -> None:
+        self._queue = queue
+        self._caches = caches
+        self._upstreams = upstreams
+
+    def collect(self):
+        queue = self._queue()
+        yield GaugeMetricFamily("yongent_jobs_queued", "대기 중인 다운로드 작업", queue["queued"])
+        yield GaugeMetricFamily("yongent_jobs_running", "실행 중인 다운로드 작업", queue["running"])
+        yield GaugeMetricFamily(
+            "yongent_jobs_background", "대기·실행 중인 백그라운드(프리페치) 작업", queue["background"]
+        )
+
+        hits = CounterMetricFamily("yongent_cache_hits", "캐시 적중", labels=["cache"])
+        misses = CounterMetricFamily("yongent_cache_misses", "캐시 미스", labels=["cache"])
+        for name, stats in self._caches().items():
+            hits.add_metric([name], stats.get("hits", 0))
+            # 다운로드 저장소는 미스 대신 새로 만든 횟수(builds)
+            misses.add_metric([name], stats.get("misses", stats.get("builds", 0)))
+        yield hits
+        yield misses
+
+        rate = GaugeMetricFamily(
+            "yongent_upstream_rate", "호스트별 현재 허용 속도(초당)", labels=["host"]
+        )
+        circuit = GaugeMetricFamily(
+            "yongent_upstream_circuit_open", "서킷 open 여부 (half_open은 0.5)", labels=["host"]
+        )
+        retries = CounterMetricFamily("yongent_upstream_retries", "업스트림 재시도", labels=["host"])
+        for host, stats in self._upstreams().items():
+            rate.add_metric([host], stats["rate"])
+            circuit.add_metric([host], {"open": 1.0, "half_open": 0.5}.get(stats["circuit"], 0.0))
+            retries.add_metric([host], stats["retries"])
+        yield rate
+        yield circuit
+        yield retries
+
+
+def register_stats_collector(collector: StatsCollector) -> None:
+    REGISTRY.register(collector)
+
+
+def metrics_response() -> Response:
+    """/metrics 응답 (Prometheus 텍스트 형식)."""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+# ─── HTTP 요청 ───────────────────────────────────────────────────────────────
+
+
+class MetricsMiddleware:
+    """라우트 템플릿별 요청 시간 기록 + 느린 요청 로그.
+
+    SSE·스트리밍 응답이 지표를 왜곡하지 않도록 본문 전송이 아닌 응답 시작까지를 잰다.
+    순수 ASGI 미들웨어라 스트리밍 응답을 버퍼링하지 않는다.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        recorded = False
+
+        def record(status: int) -> None:
+            nonlocal recorded
+            recorded = True
+            elapsed = time.perf_counter() - start
+            # 경로 대신 라우트 템플릿 (job_id 등으로 레이블이 늘어나지 않도록)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_SECONDS.labels(scope["method"], route, str(status)).observe(elapsed)
+            if SLOW_REQUEST_SECONDS and elapsed >= SLOW_REQUEST_SECONDS:
+                logger.warning(
+                    "[HTTP] 느린 요청 %s %s → %d (%.2fs)",
+                    scope["method"], scope["path"], status, elapsed,
+                )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not recorded:
+                record(500)  # 응답 시작 전 예외
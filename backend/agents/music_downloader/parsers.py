@@ -0,0 +1,260 @@
+"""Melon·Genius HTML 추출 — 필요한 하위 트리만 lxml로 파싱.
+
+- 부분 파싱: 페이지 전체 대신 정보가 있는 요소(예: Melon section_info, Genius 가사 컨테이너)의
+  HTML 조각만 잘라 파싱한다. 표식이 없으면 전체 문서를 파싱해 같은 규칙을 적용한다.
+- 선택자: CSS 선택자 대신 모듈 로드 시 한 번 컴파일한 XPath 사용
+- 텍스트: BeautifulSoup get_text와 같은 규칙 (script/style/template·주석 제외)
+- 큰 페이지는 run_parser()가 스레드에서 파싱해 이벤트 루프를 막지 않는다.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Iterator, TypeVar
+
+import lxml.html
+from lxml import etree
+
+# 이 크기(문자 수) 이상인 페이지는 스레드에서 파싱
+PARSE_OFFLOAD_BYTES = int(os.getenv("PARSE_OFFLOAD_BYTES", "100000"))
+
+T = TypeVar("T")
+
+_SKIP_TAGS = {"script", "style", "template"}
+
+
+async def run_parser(parse: Callable[[str], T], html: str) -> T:
+    """작은 페이지는 바로, 큰 페이지는 스레드 풀에서 파싱."""
+    if len(html) >= PARSE_OFFLOAD_BYTES:
+        return await asyncio.to_thread(parse, html)
+    return parse(html)
+
+
+# ─── 부분 파싱 · 텍스트 유틸 ─────────────────────────────────────────────────
+
+_OPEN_TAG_RE = re.compile(r"<([a-zA-Z][\w-]*)")
+
+
+@lru_cache(maxsize=None)
+def _tag_re(tag: str) -> re.Pattern:
+    return re.compile(rf"<(/?){tag}\b[^>]*>", re.IGNORECASE)
+
+
+def _element_end(html: str, start: int, tag: str) -> int:
+    """start에서 시작하는 <tag> 요소의 짝이 맞는 닫는 태그 끝 위치 (없으면 문서 끝)."""
+    depth = 0
+    for m in _tag_re(tag).finditer(html, start):
+        depth += -1 if m.group(1) else 1
+        if depth == 0:
+            return m.end()
+    return len(html)
+
+
+def _subtrees(html: str, marker: re.Pattern, limit: int | None = None) -> list[str]:
+    """marker(시작 태그 안의 속성 패턴)가 있는 요소들의 HTML 조각 (중첩된 것은 제외)."""
+    fragments: list[str] = []
+    end = 0
+    for m in marker.finditer(html):
+        if m.start() < end:
+            continue
+        start = html.rfind("<", 0, m.start())
+        tag = _OPEN_TAG_RE.match(html, start) if start >= 0 else None
+        if tag is None:
+            continue
+        end = _element_end(html, start, tag.group(1).lower())
+        fragments.append(html[start:end])
+        if limit and len(fragments) >= limit:
+            break
+    return fragments
+
+
+def _strings(el, skip_class: str | None = None, br: str | None = None) -> Iterator[str]:
+    """el 아래 텍스트 조각 (문서 순서). skip_class 요소는 건너뛰고, br은 br 문자열로."""
+    if el.text and el.tag not in _SKIP_TAGS:
+        yield el.text
+    for child in el:
+        if not isinstance(child.tag, str):
+            pass  # 주석·처리 명령
+        elif child.tag == "br":
+            if br is not None:
+                yield br
+        elif not (skip_class and skip_class in child.classes):
+            yield from _strings(child, skip_class, br)
+        if child.tail:
+            yield child.tail
+
+
+def _text(el, skip_class: str | None = None) -> str:
+    """get_text(strip=True)와 동일 — 조각별 strip 후 이어 붙임."""
+    return "".join(s.strip() for s in _strings(el, skip_class))
+
+
+def _lines(el) -> str:
+    """get_text(separator="\\n", strip=True)와 동일."""
+    return "\n".join(s.strip() for s in _strings(el) if s.strip())
+
+
+def _cls(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _xpaths(*exprs: str) -> tuple[etree.XPath, ...]:
+    return tuple(etree.XPath(expr) for expr in exprs)
+
+
+def _first(root, xpaths: tuple[etree.XPath, ...]) -> Iterator:
+    """선택자 폴백 순서대로 각 선택자의 첫 일치 요소."""
+    for xp in xpaths:
+        found = xp(root)
+        if found:
+            yield found[0]
+
+
+def _parse_fragments(fragments: list[str]):
+    return lxml.html.fragment_fromstring("".join(fragments), create_parent="div")
+
+
+def _document(html: str):
+    # 빈 응답이면 lxml이 ParserError를 내므로 빈 요소로 대체
+    if not html.strip():
+        return lxml.html.Element("div")
+    return lxml.html.document_fromstring(html)
+
+
+# ─── Melon ───────────────────────────────────────────────────────────────────
+
+# 상세 페이지에서 정보가 있는 영역: 곡 정보(커버·곡명·아티스트·앨범) / 가사 / 작곡·작사
+_MELON_SECTIONS = tuple(
+    re.compile(rf'class="[^"]*\b{name}\b')
+    for name in ("section_info", "section_lyric", "section_prdcr")
+)
+
+_MELON_COVER = _xpaths(
+    f".//*[{_cls('image_typeAll')}]//img",
+    f".//*[{_cls('thumb_album')}]//img",
+    f".//*[{_cls('wrap_thumb')}]//img",
+)
+_MELON_TITLE = _xpaths(
+    f".//*[{_cls('song_name')}]",
+    ".//*[@id='d_song_name']",
+    f".//h2[{_cls('sub_title')}]",
+)
+_MELON_ARTIST = _xpaths(
+    f".//*[{_cls('wrap_info')}]//*[{_cls('artist')}]",
+    f".//*[{_cls('section_info')}]//*[{_cls('artist')}]",
+    f".//*[{_cls('wrap_info')}]//*[{_cls('artist_name')}]",
+    ".//*[@id='d_artist_name']//a",
+)
+_MELON_DT = etree.XPath(".//dt")
+_MELON_DD = etree.XPath("following-sibling::dd[1]")
+_MELON_PERSON = etree.XPath(f".//ul[{_cls('list_person')}]//li")
+_MELON_PERSON_NAME = etree.XPath(f".//*[{_cls('artist_name')}]")
+_MELON_PERSON_ROLE = etree.XPath(f".//span[{_cls('type')}]")
+_MELON_LYRICS = _xpaths(
+    ".//*[@id='d_video_summary']",
+    f".//*[{_cls('lyric_wrap')}]",
+    ".//*[@id='d_song_lyrics']",
+    f".//*[{_cls('wrap_lyric')}]",
+)
+
+
+def _melon_root(html: str):
+    fragments = [_subtrees(html, marker, limit=1) for marker in _MELON_SECTIONS]
+    if all(fragments):
+        return _parse_fragments([f[0] for f in fragments])
+    # 페이지 구조가 예상과 다르면 전체 문서에서 찾음
+    return _document(html)
+
+
+def parse_melon_detail(html: str) -> dict:
+    """Melon 곡 상세 페이지 → 커버·곡명·아티스트·앨범·발매일(원문)·작곡·작사·가사.
+
+    release_date는 정규화 전 원문 — metadata._normalize_date에서 처리.
+    """
+    root = _melon_root(html)
+
+    cover_url = ""
+    for el in _first(root, _MELON_COVER):
+        if el.get("src"):
+            cover_url = el.get("src")
+            break
+
+    # class="none" 숨김 요소는 제외
+    song_title = next(
+        (text for el in _first(root, _MELON_TITLE) if (text := _text(el, skip_class="none"))),
+        "",
+    )
+    song_artist = next((text for el in _first(root, _MELON_ARTIST) if (text := _text(el))), "")
+
+    album = ""
+    release_date = ""
+    for dt in _MELON_DT(root):
+        dd = _MELON_DD(dt)
+        if not dd:
+            continue
+        label, value = _text(dt), _text(dd[0])
+        if "앨범" in label:
+            album = value
+        elif "발매일" in label:
+            release_date = value
+
+    composers: list[str] = []
+    lyricists: list[str] = []
+    for li in _MELON_PERSON(root):
+        name_el, role_el = _MELON_PERSON_NAME(li), _MELON_PERSON_ROLE(li)
+        if not name_el or not role_el:
+            continue
+        name, role = _text(name_el[0]), _text(role_el[0])
+        if "작곡" in role and name not in composers:
+            composers.append(name)
+        elif "작사" in role and name not in lyricists:
+            lyricists.append(name)
+
+    lyrics = ""
+    for el in _first(root, _MELON_LYRICS):
+        text = _lines(el)
+        if len(text) > 20:
+            lyrics = text
+            break
+
+    return {
+        "cover_url": cover_url,
+        "title": song_title,
+        "artist": song_artist,
+        "album": album,
+        "release_date": release_date,
+        "composer": ", ".join(composers),
+        "lyricist": ", ".join(lyricists),
+        "lyrics": lyrics,
+    }
+
+
+def parse_melon_lyrics(html: str) -> str:
+    """Melon 가사 AJAX 응답 → 가사 (20자 이하면 빈 문자열)."""
+    text = _lines(_document(html))
+    return text if len(text) > 20 else ""
+
+
+# ─── Genius ──────────────────────────────────────────────────────────────────
+
+_GENIUS_CONTAINER = re.compile(r'data-lyrics-container="true"')
+_GENIUS_FALLBACK = etree.XPath("//div[contains(@class, 'Lyrics')]")
+
+
+def parse_genius_lyrics(html: str) -> str | None:
+    """Genius 곡 페이지 → 가사. 가사 컨테이너 조각만 파싱한다."""
+    fragments = _subtrees(html, _GENIUS_CONTAINER)
+    if fragments:
+        lines = [
+            "".join(_strings(lxml.html.fragment_fromstring(f), br="\n")) for f in fragments
+        ]
+        return "\n".join(lines).strip()
+
+    # 폴백: class 이름에 "Lyrics"가 들어간 div (전체 문서)
+    for div in _GENIUS_FALLBACK(_document(html)):
+        text = _lines(div)
+        if len(text) > 100:
+            return text
+    return None
@@ -0,0 +1,170 @@
+"""/search 직후 예측 다운로드 (프리페치).
+
+/search가 YouTube URL을 확정하면 기본 포맷(mp3·192kbps 전체 음원)을 스케줄러의 백그라운드 작업으로
+미리 받아 공유 다운로드 저장소에 넣는다. 이어서 같은 영상·포맷의 /download 작업이 실행되면
+저장소에서 진행 중인 빌드를 기다리거나 완료된 항목을 바로 쓴다 (claim).
+- 유휴 용량에서만 시작: 대기 중인 일반 작업이 없고 미청구 프리페치가 PREFETCH_MAX 미만일 때
+- 자원 상한: 단계 슬롯은 SCHED_BACKGROUND_SHARE, 다운로드 대역폭은 모든 프리페치 합계
+  PREFETCH_RATE(bytes/s)까지. 청구되면 두 제한 모두 풀린다
+- PREFETCH_WINDOW초 안에 청구되지 않으면 취소하고, 프리페치가 직접 빌드한 뒤 아무도 쓰지 않은
+  저장소 항목만 삭제한다 (나머지는 prune이 정리)
+
+저장소의 빌드 공유는 프로세스 단위이므로 다른 워커의 /download는 프리페치에 합류하지 못한다.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .metrics import PREFETCHES
+from .scheduler import JobScheduler
+from .store import DownloadStore
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "0") == "1"
+# 청구 대기 시간(초) — 지나면 취소·삭제
+PREFETCH_WINDOW = float(os.getenv("PREFETCH_WINDOW", "120"))
+# 동시에 유지할 수 있는 미청구 프리페치 수
+PREFETCH_MAX = int(os.getenv("PREFETCH_MAX", "2"))
+# 미청구 프리페치 전체의 다운로드 속도 상한 (bytes/s, 0이면 무제한)
+PREFETCH_RATE = float(os.getenv("PREFETCH_RATE", str(2 * 1024 * 1024)))
+# 프리페치가 만드는 저장소 항목 (/download 기본값과 같아야 청구됨)
+PREFETCH_FORMAT = os.getenv("PREFETCH_FORMAT", "mp3")
+PREFETCH_QUALITY = int(os.getenv("PREFETCH_QUALITY", "192"))
+
+
+@dataclass
+class _Prefetch:
+    job_id: str
+    started: float = field(default_factory=time.monotonic)
+    claimed: bool = False
+    downloaded: int = 0  # 속도 제한용 — 마지막으로 본 진행 훅의 누적 바이트
+    built_at: float | None = None  # 이 프리페치가 직접 빌드해 저장소에 공개한 시각 (time.time())
+
+
+class Prefetcher:
+    def __init__(
+        self,
+        scheduler: JobScheduler,
+        store: DownloadStore,
+        window: float = PREFETCH_WINDOW,
+        max_pending: int = PREFETCH_MAX,
+        rate: float = PREFETCH_RATE,
+    ) -> None:
+        self.scheduler = scheduler
+        self.store = store
+        self.window = window
+        self.max_pending = max_pending
+        self.rate = rate
+        self._pending: dict[tuple[str, str], _Prefetch] = {}  # (영상 ID, 저장소 키) → 프리페치
+        self._by_job: dict[str, _Prefetch] = {}
+        self._lock = threading.Lock()
+        self._next_send = 0.0  # 전체 대역폭 상한: 다음 바이트를 보낼 수 있는 시각
+        # 미청구 만료로 취소한 작업 알림 (job_id, 대기 중이었으면 'queued' / 실행 중이었으면 'running')
+        self.on_expire: Callable[[str, str | None], None] | None = None
+
+    def start(self, video_id: str, key: str, submit: Callable[[str], None]) -> str | None:
+        """유휴 용량이 있으면 프리페치 등록 → job_id (시작하지 않았으면 None).
+
+        submit(job_id)는 작업을 스케줄러에 백그라운드로 제출한다.
+        """
+        with self._lock:
+            if (video_id, key) in self._pending:
+                return None
+            unclaimed = sum(1 for p in self._pending.values() if not p.claimed)
+            if unclaimed >= self.max_pending or self.scheduler.stats()["queued"]:
+                return None
+            if self.store.get(video_id, key) is not None:
+                return None
+            prefetch = _Prefetch(f"pf-{uuid.uuid4().hex[:8]}")
+            self._pending[(video_id, key)] = prefetch
+            self._by_job[prefetch.job_id] = prefetch
+        try:
+            submit(prefetch.job_id)
+        except Exception:
+            with self._lock:
+                self._pending.pop((video_id, key), None)
+                self._by_job.pop(prefetch.job_id, None)
+            raise
+        timer = threading.Timer(self.window, self._expire, (video_id, key, prefetch))
+        timer.daemon = True
+        timer.start()
+        PREFETCHES.labels("started").inc()
+        logger.info("[Prefetch] 시작 %s/%s job_id=%s", video_id, key, prefetch.job_id)
+        return prefetch.job_id
+
+    def claim(self, video_id: str, key: str, job_id: str) -> bool:
+        """다운로드 작업이 같은 영상·포맷을 요청 → 프리페치를 일반 작업으로 승격.
+
+        프리페치 자신의 작업이거나 해당 프리페치가 없으면 False.
+        """
+        with self._lock:
+            prefetch = self._pending.get((video_id, key))
+            if prefetch is None or prefetch.job_id == job_id or prefetch.claimed:
+                return False
+            prefetch.claimed = True
+        self.scheduler.promote(prefetch.job_id)
+        PREFETCHES.labels("claimed").inc()
+        logger.info(
+            "[Prefetch] 청구 %s/%s job_id=%s (%.1fs 후)",
+            video_id, key, job_id, time.monotonic() - prefetch.started,
+        )
+        return True
+
+    def throttle(self, job_id: str, downloaded_bytes: int | None) -> None:
+        """미청구 프리페치의 진행 훅에서 호출 — 전체 대역폭 상한을 넘으면 잠시 멈춤."""
+        prefetch = self._by_job.get(job_id)
+        if prefetch is None or prefetch.claimed or not self.rate or not downloaded_bytes:
+            return
+        with self._lock:
+            delta = max(0, downloaded_bytes - prefetch.downloaded)
+            prefetch.downloaded = downloaded_bytes
+            now = time.monotonic()
+            self._next_send = max(self._next_send, now) + delta / self.rate
+            deadline = self._next_send
+        # 청구·취소되면 바로 재개
+        while not prefetch.claimed and (wait := deadline - time.monotonic()) > 0:
+            time.sleep(min(wait, 0.5))
+            self.scheduler.check_cancelled(job_id)
+
+    def built(self, job_id: str) -> None:
+        """프리페치 작업이 저장소 항목을 직접 빌드해 공개함 (다른 작업의 빌드를 기다려 받은 경우는 제외)."""
+        prefetch = self._by_job.get(job_id)
+        if prefetch is not None:
+            prefetch.built_at = time.time()
+
+    def _expire(self, video_id: str, key: str, prefetch: _Prefetch) -> None:
+        """청구 대기 시간 경과 — 미청구면 작업 취소 + 저장소 항목 삭제.
+
+        claim과 같은 잠금 안에서 처리해, 청구한 작업이 쓰려는 항목을 지우지 않는다.
+        삭제는 이 프리페치가 직접 빌드했고 그 뒤로 아무도 쓰지 않은 항목만 — 일반 작업이 빌드했거나
+        다른 워커가 청구 없이 저장소에서 바로 가져다 쓴 항목은 남겨 두고 prune에 맡긴다.
+        """
+        with self._lock:
+            self._pending.pop((video_id, key), None)
+            self._by_job.pop(prefetch.job_id, None)
+            if prefetch.claimed:
+                return
+            state = self.scheduler.cancel(prefetch.job_id)
+            # 실행 중이면 아직 공개 전(built_at 없음) — 부분 데이터는 prune이 PARTIAL_TTL 후 정리
+            evicted = prefetch.built_at is not None and self.store.evict(
+                video_id, key, unused_since=prefetch.built_at
+            )
+        if self.on_expire:
+            self.on_expire(prefetch.job_id, state)
+        PREFETCHES.labels("expired").inc()
+        logger.info(
+            "[Prefetch] 미청구 만료 %s/%s job_id=%s (작업 %s, 항목 삭제 %s)",
+            video_id, key, prefetch.job_id, state or "종료됨", evicted,
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            claimed = sum(1 for p in self._pending.values() if p.claimed)
+            return {"pending": len(self._pending) - claimed, "claimed": claimed}
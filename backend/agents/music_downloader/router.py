@@ -3,26 +3,239 @@ from __future__ import annotations
 
 import asyncio
 import logging
-import re
+import os
 import shutil
+import time
 import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import APIRouter, BackgroundTasks, File, HTTPException, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from yt_dlp.utils import DownloadError, ExtractorError, UnavailableVideoError
 
-from .downloader import COOKIES_FILE, _safe_filename, download_audio, search_youtube
-from .metadata import collect_all_metadata
-from .schemas import DownloadRequest, JobStatusResponse, SearchRequest, SearchResponse
-from .trimmer import make_60s_clip
+from .archive import iter_zip
+from .downloader import (
+    COOKIES_FILE,
+    _safe_filename,
+    download_audio,
+    expand_playlist,
+    extract_video_id,
+    is_confident_match,
+    rerank_entries,
+    search_cache_stats,
+    search_youtube,
+    search_youtube_ranked,
+    warm_ydl_pool,
+    ydl_pool,
+)
+from .events import job_events
+from .file_response import follow_file_response, range_file_response
+from .handoff import issue_token, verify_token
+from .http_client import close_clients, host_stats, open_clients
+from .job_store import FINISHED_STATUSES, make_job_store, worker_id
+from .metadata import UPSTREAM_BASES, collect_all_metadata
+from .metadata_cache import metadata_cache
+from .metrics import JOB_SECONDS, StatsCollector, register_stats_collector, span
+from .prefetch import PREFETCH_ENABLED, PREFETCH_FORMAT, PREFETCH_QUALITY, Prefetcher
+from .scheduler import (
+    SCHED_CPU_LIMIT,
+    SCHED_NETWORK_LIMIT,
+    JobCancelled,
+    JobInterrupted,
+    JobScheduler,
+    QueueFullError,
+)
+from .store import DownloadStore, StoreEntry
+from .schemas import (
+    BatchDownloadRequest,
+    BatchStatusResponse,
+    DownloadRequest,
+    JobStatusResponse,
+    SearchRequest,
+    SearchResponse,
+)
+from .trimmer import (
+    _CLIP_SECONDS,
+    FFMPEG_BACKGROUND_NICE,
+    OUTPUT_FORMATS,
+    make_sample,
+    transcode_with_sample,
+)
+from .worker_pool import WorkerPool
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["music-downloader"])
 
-_TEMP_DIR = Path(__file__).parent / "_downloads"
+# 작업 디렉터리·공유 저장소 위치
+_TEMP_DIR = Path(os.getenv("DOWNLOAD_DIR", str(Path(__file__).parent / "_downloads")))
 
-# 인메모리 Job 저장소
-jobs: dict[str, dict] = {}
+# Job 저장소 (SQLite 또는 인메모리, JOB_STORE 환경변수)
+job_store = make_job_store()
+# 갱신 시 /events 구독자에게 알림
+job_store.on_update = job_events.notify
+
+# 진행률 기록 최소 간격(초) / SSE가 다른 워커의 변경을 확인하는 주기(초)
+PROGRESS_INTERVAL = float(os.getenv("PROGRESS_INTERVAL", "0.5"))
+EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "1"))
+
+# 종료된 작업 보관 기간 / 공유 저장소 항목 보관 기간 / 정리 주기 (초)
+JOB_TTL = float(os.getenv("JOB_TTL", str(24 * 60 * 60)))
+STORE_TTL = float(os.getenv("STORE_TTL", str(7 * 24 * 60 * 60)))
+CLEANUP_INTERVAL = float(os.getenv("JOB_CLEANUP_INTERVAL", "600"))
+# 중단된 다운로드의 부분 데이터 보관 기간(초) — 이 안에 재시도·재시작되면 이어 받음
+PARTIAL_TTL = float(os.getenv("PARTIAL_TTL", str(24 * 60 * 60)))
+
+# 작업 단위 다운로드 재시도 횟수 / 첫 대기(초, 재시도마다 두 배)
+DOWNLOAD_JOB_RETRIES = int(os.getenv("DOWNLOAD_JOB_RETRIES", "2"))
+DOWNLOAD_JOB_RETRY_BACKOFF = float(os.getenv("DOWNLOAD_JOB_RETRY_BACKOFF", "5"))
+
+# 배치 한 번에 받을 수 있는 최대 곡 수
+BATCH_MAX_TRACKS = int(os.getenv("BATCH_MAX_TRACKS", "500"))
+
+# 다운로드·변환 단계를 실행할 작업 프로세스 수 (0이면 스케줄러 스레드에서 직접 실행)
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", str(SCHED_NETWORK_LIMIT + SCHED_CPU_LIMIT)))
+
+# 진행 중인 백그라운드 asyncio 태스크 (GC로 사라지지 않도록 참조 유지)
+_background_tasks: set[asyncio.Task] = set()
+
+# 영상 ID + 포맷 기준 공유 다운로드 저장소 (같은 곡 중복 다운로드 방지)
+download_store = DownloadStore(_TEMP_DIR / "_store")
+
+# 다운로드 작업 스케줄러 (대기열·단계별 동시 실행 제한·취소)
+scheduler = JobScheduler()
+# 다른 워커 프로세스가 받은 취소 요청도 반영
+scheduler.cancel_source = lambda job_id: bool(
+    (job_store.get(job_id) or {}).get("cancel_requested")
+)
+
+# yt-dlp·ffmpeg 단계는 별도 프로세스에서 (API 프로세스의 GIL 경합 방지)
+worker_pool = WorkerPool(WORKER_PROCESSES)
+
+# /search 직후 백그라운드 다운로드 (PREFETCH_ENABLED=1일 때만)
+prefetcher = Prefetcher(scheduler, download_store)
+# 대기 중에 만료된 프리페치는 실행되지 않으므로 여기서 상태 정리
+prefetcher.on_expire = lambda job_id, state: job_store.update(
+    job_id, only_if_status="queued", status="cancelled", step="취소됨"
+)
+
+# /metrics 수집 시 대기열·캐시·업스트림 현황을 읽어 옴
+register_stats_collector(
+    StatsCollector(
+        queue=scheduler.stats,
+        caches=lambda: {
+            "metadata": metadata_cache.stats(),
+            "youtube_search": search_cache_stats(),
+            "download_store": download_store.stats(),
+        },
+        upstreams=host_stats,
+    )
+)
+
+
+# ─── 앱 수명주기 ─────────────────────────────────────────────────────────────
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """main.py의 FastAPI lifespan에서 호출 — 공용 리소스 생성·정리."""
+    await open_clients(*UPSTREAM_BASES)
+    await asyncio.to_thread(warm_ydl_pool)
+    orphaned_batches = await asyncio.to_thread(_resume_orphaned_jobs)
+    scheduler.start()
+    for jobs in orphaned_batches.values():
+        _resume_batch(jobs)
+    cleanup_task = asyncio.create_task(_cleanup_loop())
+    try:
+        yield
+    finally:
+        cleanup_task.cancel()
+        await asyncio.to_thread(scheduler.stop)
+        await asyncio.to_thread(worker_pool.close)
+        await close_clients()
+
+
+def _resume_orphaned_jobs() -> dict[str, list[tuple[str, dict]]]:
+    """이 호스트에서 죽은 프로세스가 소유하던 미완료 작업을 이 워커의 대기열에 다시 등록.
+
+    요청 내용(request)이 기록된 작업만 재개하고, 나머지(프리페치 등)와 대기열이 가득 차 받지 못한
+    작업은 오류 처리한다. 다운로드는 남아 있는 부분 데이터에서 이어 받는다.
+    배치 소속 작업은 바로 제출하지 않고 {batch_id: [(job_id, request)]}(배치 내 순서)로 돌려준다 —
+    호출 측이 _resume_batch로 대기열 여유에 맞춰 조금씩 넣는다.
+    배치 자체는 소속 작업이 모두 끝나면 _finalize_batches가 정리한다.
+    """
+    me = worker_id()
+    host = me.rsplit(":", 1)[0]
+    batches: dict[str, list[tuple[str, dict]]] = {}
+    # resuming: 선점 직후 죽은 프로세스가 남긴 작업
+    for job_id, job in job_store.find(("queued", "running", "resuming")).items():
+        owner = job.get("owner") or ""
+        owner_host, _, pid = owner.rpartition(":")
+        # 컨테이너 재시작 후에는 호스트명·PID(주로 1)가 이전 프로세스와 같아 PID 확인으로는 구분할 수
+        # 없다. 시작 시점에는 이 프로세스가 아직 작업을 받지 않았으므로 자기 ID의 작업도 이전 프로세스 것
+        if owner != me and (owner_host != host or not pid.isdigit() or _pid_alive(int(pid))):
+            continue
+        if job.get("kind") == "batch":
+            continue
+        # 여러 워커가 동시에 시작해도 한 곳만 가져가도록 상태를 조건부로 바꿔 선점
+        if not job_store.update(job_id, only_if_status=job["status"], status="resuming", owner=me):
+            continue
+        request = job.get("request")
+        if request and job.get("cancel_requested"):
+            job_store.update(job_id, status="cancelled", step="취소됨")
+            continue
+        if request:
+            job_store.update(
+                job_id, status="queued", step="재시작 후 다시 대기 중", progress=None
+            )
+            if job.get("batch_id"):
+                batches.setdefault(job["batch_id"], []).append((job_id, request))
+                continue
+            try:
+                _submit_job(job_id, **request)
+                logger.info("[Download] 중단된 작업 재개 job_id=%s", job_id)
+                continue
+            except QueueFullError:
+                pass
+        job_store.update(
+            job_id, status="error", step="오류", error="서버 재시작으로 작업이 중단되었습니다"
+        )
+    for batch_id, jobs in batches.items():
+        order = {
+            job_id: i for i, job_id in enumerate((job_store.get(batch_id) or {}).get("job_ids", []))
+        }
+        jobs.sort(key=lambda item: order.get(item[0], len(order)))
+    return batches
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _cleanup_expired() -> None:
+    """TTL 지난 종료 작업과 작업 디렉터리, 오래 쓰이지 않은 공유 저장소 항목 삭제."""
+    _finalize_batches()
+    expired = job_store.expire(JOB_TTL)
+    for job_id in expired:
+        shutil.rmtree(_TEMP_DIR / job_id, ignore_errors=True)
+    pruned = download_store.prune(STORE_TTL, PARTIAL_TTL)
+    if expired or pruned:
+        logger.info("[Cleanup] 만료 작업 %d건, 저장소 항목 %d건 삭제", len(expired), pruned)
+
+
+async def _cleanup_loop() -> None:
+    while True:
+        try:
+            await asyncio.to_thread(_cleanup_expired)
+        except Exception:
+            logger.exception("[Cleanup] 정리 실패")
+        await asyncio.sleep(CLEANUP_INTERVAL)
 
 
 # ─── 유틸 ────────────────────────────────────────────────────────────────────
@@ -30,9 +243,9 @@ jobs: dict[str, dict] = {}
 
 def _youtube_thumbnail(url: str) -> str:
     """YouTube URL → maxresdefault 썸네일 URL."""
-    m = re.search(r"(?:v=|youtu\.be/)([A-Za-z0-9_-]{11})", url)
-    if m:
-        return f"https://img.youtube.com/vi/{m.group(1)}/maxresdefault.jpg"
+    video_id = extract_video_id(url)
+    if video_id:
+        return f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
     return ""
 
 
@@ -44,65 +257,327 @@ def _parse_query(query: str) -> tuple[str, str]:
     return "", query.strip()
 
 
+def _ytdlp_progress(d: dict) -> dict:
+    """yt-dlp 진행 훅 dict → 클라이언트에 내보낼 진행 정보."""
+    return {
+        "stage": "download",
+        "status": d.get("status"),
+        "downloaded_bytes": d.get("downloaded_bytes"),
+        "total_bytes": d.get("total_bytes") or d.get("total_bytes_estimate"),
+        "speed": d.get("speed"),
+        "eta": d.get("eta"),
+        "fragment_index": d.get("fragment_index"),
+        "fragment_count": d.get("fragment_count"),
+    }
+
+
+def _is_transient(e: Exception) -> bool:
+    """재시도할 만한 다운로드 오류인지 — 영상 없음·비공개 같은 확정 오류는 제외."""
+    cause = e.exc_info[1] if isinstance(e, DownloadError) and e.exc_info else e
+    if isinstance(cause, ExtractorError):
+        return not cause.expected
+    # 다운로드 중 연결 끊김 등 OSError는 UnavailableVideoError로 감싸져 올라온다
+    return isinstance(cause, (DownloadError, UnavailableVideoError, OSError))
+
+
+def _download_with_retries(job_id: str, step: str, url: str, output_dir: Path, **kwargs) -> Path:
+    """download 단계 실행 (kwargs는 download_audio로). 일시적 오류면 지수 백오프 후 재시도.
+
+    output_dir에 남은 부분 데이터에서 이어 받으며, 대기 중에는 단계 슬롯을 반납한다.
+    """
+    attempt = 0
+    while True:
+        try:
+            with scheduler.stage(job_id, "download"):
+                job_store.update(job_id, step=step)
+                return worker_pool.run(
+                    download_audio,
+                    url,
+                    output_dir,
+                    check=lambda: scheduler.check_cancelled(job_id),
+                    **kwargs,
+                )
+        except Exception as e:
+            if (
+                attempt >= DOWNLOAD_JOB_RETRIES
+                or scheduler.is_cancelled(job_id)
+                or scheduler.is_interrupted(job_id)
+                or not _is_transient(e)
+            ):
+                raise
+            delay = DOWNLOAD_JOB_RETRY_BACKOFF * 2**attempt
+            logger.warning(
+                "[Download] 다운로드 실패, %.0fs 후 재시도 (%d/%d) job_id=%s: %s",
+                delay, attempt + 1, DOWNLOAD_JOB_RETRIES, job_id, e,
+            )
+            job_store.update(
+                job_id,
+                step=f"다운로드 재시도 대기 중 ({attempt + 1}/{DOWNLOAD_JOB_RETRIES})",
+                progress=None,
+            )
+            deadline = time.monotonic() + delay
+            while (wait := deadline - time.monotonic()) > 0:
+                scheduler.check_cancelled(job_id)
+                time.sleep(min(wait, 0.5))
+            attempt += 1
+
+
+def _progress_reporter(job_id: str):
+    """진행 정보를 PROGRESS_INTERVAL마다 한 번씩만 저장 (단계 전환·완료 이벤트는 항상 저장)."""
+    last = 0.0
+    last_stage = None
+
+    def report(progress: dict) -> None:
+        nonlocal last, last_stage
+        now = time.monotonic()
+        if (
+            progress.get("status") == "finished"
+            or progress.get("stage") != last_stage
+            or now - last >= PROGRESS_INTERVAL
+        ):
+            last, last_stage = now, progress.get("stage")
+            job_store.update(job_id, progress=progress)
+
+    return report
+
+
+def _status_response(job_id: str, job: dict, queue_position: int | None = None):
+    return JobStatusResponse(
+        job_id=job_id,
+        status=job.get("status", "expired"),
+        step=job.get("step"),
+        queue_position=queue_position,
+        progress=job.get("progress"),
+        download_url=job.get("download_url"),
+        sample_download_url=job.get("sample_download_url"),
+        error=job.get("error"),
+    )
+
+
 # ─── 백그라운드 다운로드 작업 ────────────────────────────────────────────────
 
 
 def _run_download_job(
-    job_id: str, url: str | None, query: str | None, save_dir: str | None
+    job_id: str,
+    url: str | None,
+    query: str | None,
+    save_dir: str | None,
+    fmt: str = "mp3",
+    quality: int = 192,
+    mode: str = "full",
 ) -> None:
-    """BackgroundTasks로 실행되는 동기 다운로드 파이프라인."""
-    jobs[job_id]["status"] = "running"
+    """스케줄러 워커 스레드에서 실행되는 동기 다운로드 파이프라인.
+
+    각 단계는 scheduler.stage()로 네트워크/CPU 슬롯을 확보한 뒤 실행된다.
+    mode:
+    - full: 전체 음원 다운로드 → 전체 + 샘플 동시 변환
+    - preview: 앞 60초 구간만 받아 샘플만 생성
+    - preview_then_full: 샘플을 먼저 공개한 뒤 같은 작업에서 전체 음원까지 진행
+    """
+    # 다른 워커에서 이미 취소됐으면 실행하지 않음 (queued → running 원자적 전환)
+    if not job_store.update(job_id, only_if_status="queued", status="running", mode=mode):
+        return
+    started = time.perf_counter()
+    status = "done"
     try:
         artist, title = _parse_query(query) if query else ("", "")
 
         # URL 없으면 YouTube 검색
         if not url:
-            jobs[job_id]["step"] = "유튜브 검색 중"
+            job_store.update(job_id, step="유튜브 검색 중")
             search_q = f"{artist} {title} official audio" if artist else query or ""
-            url = search_youtube(search_q, artist=artist, title=title)
+            with scheduler.stage(job_id, "search"):
+                url = search_youtube(search_q, artist=artist, title=title)
             if not url:
                 raise ValueError("유튜브 검색 결과를 찾을 수 없습니다")
 
-        # 원본 MP3 다운로드
-        jobs[job_id]["step"] = "음원 다운로드 중"
-        output_dir = _TEMP_DIR / job_id
-        mp3_path = download_audio(url, output_dir)
-
-        # 파일명 결정: 아티스트-곡명.mp3 (공백 없이)
+        # 파일명 결정: 아티스트-곡명.<확장자> (공백 없이)
         stem = (
             f"{_safe_filename(artist)}-{_safe_filename(title)}"
             if artist and title
             else "audio"
         )
-        filename = f"{stem}.mp3"
 
-        # 60초 샘플 생성 (55-60초 구간 페이드아웃)
-        jobs[job_id]["step"] = "60초 샘플 생성 중"
-        sample_path = make_60s_clip(mp3_path, output_dir, stem=stem)
-        sample_filename = sample_path.name
+        report = _progress_reporter(job_id)
+
+        def on_download_progress(d: dict) -> None:
+            scheduler.check_cancelled(job_id)
+            report(_ytdlp_progress(d))
+            prefetcher.throttle(job_id, d.get("downloaded_bytes"))
+
+        def build(output_dir: Path) -> tuple[Path, Path]:
+            # 원본 스트림 다운로드 (변환 없음)
+            source_path = _download_with_retries(
+                job_id,
+                "음원 다운로드 중",
+                url,
+                output_dir,
+                progress_hooks=[on_download_progress],
+                fmt=fmt,
+            )
+            # 원본 1회 읽기로 전체 음원 + 60초 샘플 동시 생성 (가능하면 스트림 복사)
+            with scheduler.stage(job_id, "transcode"):
+                # 변환 중 경로 공개 → /file?progressive=true로 완료 전 스트리밍 가능
+                ext = OUTPUT_FORMATS[fmt].ext
+                job_store.update(
+                    job_id,
+                    step=f"{fmt.upper()} 변환 및 60초 샘플 생성 중",
+                    stem=stem,
+                    partial_file_path=str(output_dir / f"audio.{ext}"),
+                    partial_sample_path=str(output_dir / f"audio_sample.{ext}"),
+                )
+                outputs = worker_pool.run(
+                    transcode_with_sample,
+                    source_path,
+                    output_dir,
+                    fmt,
+                    quality,
+                    on_progress=report,
+                    nice=FFMPEG_BACKGROUND_NICE if scheduler.is_background(job_id) else None,
+                    check=lambda: scheduler.check_cancelled(job_id),
+                )
+            source_path.unlink(missing_ok=True)
+            return outputs
+
+        def build_preview(output_dir: Path) -> tuple[None, Path]:
+            # 앞 60초 구간만 다운로드 (필요한 바이트만 Range 요청)
+            source_path = _download_with_retries(
+                job_id,
+                "미리듣기 구간 다운로드 중",
+                url,
+                output_dir,
+                progress_hooks=[on_download_progress],
+                fmt=fmt,
+                max_seconds=_CLIP_SECONDS,
+            )
+            with scheduler.stage(job_id, "clip"):
+                job_store.update(
+                    job_id,
+                    step="60초 샘플 생성 중",
+                    stem=stem,
+                    partial_sample_path=str(
+                        output_dir / f"audio_sample.{OUTPUT_FORMATS[fmt].ext}"
+                    ),
+                )
+                sample_path = worker_pool.run(
+                    make_sample,
+                    source_path,
+                    output_dir,
+                    fmt,
+                    quality,
+                    on_progress=report,
+                    nice=FFMPEG_BACKGROUND_NICE if scheduler.is_background(job_id) else None,
+                    check=lambda: scheduler.check_cancelled(job_id),
+                )
+            source_path.unlink(missing_ok=True)
+            return None, sample_path
+
+        def on_wait() -> None:
+            job_store.update(job_id, step="동일 곡 다운로드 대기 중")
+
+        # YouTube 영상이면 공유 저장소 사용, 그 외 URL은 작업 전용 디렉터리
+        video_id = extract_video_id(url)
+        store_key = f"{fmt}-{quality}"
+        # 같은 영상·포맷 프리페치가 있으면 일반 작업으로 올림 → 아래 저장소 조회가 그 빌드에 합류
+        if video_id:
+            prefetcher.claim(video_id, store_key, job_id)
+
+        def fetch(key: str, build_fn, work_dir: Path) -> StoreEntry:
+            if video_id:
+                return download_store.get_or_build(
+                    video_id,
+                    key,
+                    build_fn,
+                    on_wait=on_wait,
+                    check=lambda: scheduler.check_cancelled(job_id),
+                    retry_on=(JobCancelled,),
+                    # 프리페치 작업이면 직접 빌드한 항목만 만료 시 삭제 대상
+                    on_built=lambda: prefetcher.built(job_id),
+                )
+            return StoreEntry(*build_fn(work_dir))
+
+        dest = Path(save_dir) if save_dir else None
+        # 미리듣기: 전체 항목이 이미 저장소에 있으면 그 샘플을 그대로 사용
+        full_entry = download_store.get(video_id, store_key) if video_id else None
+
+        if mode != "full" and full_entry is None:
+            preview = fetch(f"{store_key}.preview", build_preview, _TEMP_DIR / job_id / "preview")
+            sample_filename = f"{stem}_sample{preview.sample_path.suffix}"
+            if dest:
+                with span("job", "save"):
+                    dest.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(preview.sample_path, dest / sample_filename)
+            sample_fields = dict(
+                progress=None,
+                partial_sample_path=None,
+                sample_file_path=str(preview.sample_path),
+                sample_filename=sample_filename,
+                sample_download_url=f"/music-downloader/file/{job_id}/sample",
+            )
+            if mode == "preview":
+                job_store.update(job_id, status="done", step="완료", **sample_fields)
+                return
+            # 샘플 먼저 공개 → 전체 음원은 이어서 진행
+            job_store.update(job_id, step="샘플 준비 완료, 전체 음원 다운로드 중", **sample_fields)
+
+        entry = full_entry or fetch(store_key, build, _TEMP_DIR / job_id)
+        if mode == "preview":
+            entry = StoreEntry(None, entry.sample_path)
+        audio_path, sample_path = entry.audio_path, entry.sample_path
+        # 패스스루 여부와 관계없이 실제 출력 확장자를 따른다
+        filename = f"{stem}{audio_path.suffix}" if audio_path else ""
+        sample_filename = f"{stem}_sample{sample_path.suffix}"
 
         # 로컬 저장 경로에 파일 복사
-        if save_dir:
-            jobs[job_id]["step"] = "지정 경로에 저장 중"
-            dest = Path(save_dir)
-            dest.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(mp3_path, dest / filename)
-            shutil.copy2(sample_path, dest / sample_filename)
-
-        jobs[job_id].update(
+        if dest:
+            job_store.update(job_id, step="지정 경로에 저장 중")
+            with span("job", "save"):
+                dest.mkdir(parents=True, exist_ok=True)
+                if audio_path:
+                    shutil.copy2(audio_path, dest / filename)
+                shutil.copy2(sample_path, dest / sample_filename)
+
+        full_fields = (
+            dict(
+                file_path=str(audio_path),
+                filename=filename,
+                download_url=f"/music-downloader/file/{job_id}",
+            )
+            if audio_path
+            else {}
+        )
+        job_store.update(
+            job_id,
             status="done",
             step="완료",
-            file_path=str(mp3_path),
-            filename=filename,
-            download_url=f"/music-downloader/file/{job_id}",
+            progress=None,
+            partial_file_path=None,
+            partial_sample_path=None,
             sample_file_path=str(sample_path),
             sample_filename=sample_filename,
             sample_download_url=f"/music-downloader/file/{job_id}/sample",
+            **full_fields,
         )
 
     except Exception as e:
+        # yt-dlp는 진행 훅 예외를 DownloadError로 감쌀 수 있으므로 플래그로 판별
+        interrupted = isinstance(e, JobInterrupted) or scheduler.is_interrupted(job_id)
+        if scheduler.is_cancelled(job_id) or (isinstance(e, JobCancelled) and not interrupted):
+            status = "cancelled"
+            logger.info("[Download] 작업 취소 job_id=%s", job_id)
+            job_store.update(job_id, status="cancelled", step="취소됨")
+            return
+        if interrupted:
+            # 서버 종료로 중단 — 대기 상태로 남겨 다음 시작 때 부분 데이터에서 이어 받는다
+            status = "interrupted"
+            logger.info("[Download] 서버 종료로 작업 중단 job_id=%s", job_id)
+            job_store.update(job_id, status="queued", step="서버 종료로 중단됨", progress=None)
+            return
+        status = "error"
         logger.exception("[Download] 작업 실패 job_id=%s", job_id)
-        jobs[job_id].update(status="error", step="오류", error=str(e))
+        job_store.update(job_id, status="error", step="오류", error=str(e))
+    finally:
+        JOB_SECONDS.labels(mode, status).observe(time.perf_counter() - started)
 
 
 # ─── 엔드포인트 ──────────────────────────────────────────────────────────────
@@ -110,7 +585,42 @@ def _run_download_job(
 
 @router.get("/health")
 async def health():
-    return {"status": "ok"}
+    """상태 + 메타데이터 업스트림별 속도 제한·서킷 상태."""
+    return {"status": "ok", "upstreams": host_stats()}
+
+
+def _youtube_query(artist: str, title: str) -> str:
+    return f"{artist} {title} official audio".strip()
+
+
+async def _resolve_youtube_url(
+    early_search: asyncio.Task, artist: str, title: str, meta: dict
+) -> str:
+    """입력 기준으로 먼저 시작한 검색 결과를 정식 아티스트·곡명으로 재채점해 URL 선택.
+
+    재채점 1순위가 정식 명칭과 확실히 맞지 않을 때만 정식 명칭으로 다시 검색한다.
+    """
+    try:
+        candidates = await early_search
+    except Exception as e:
+        logger.warning("[Search] YouTube 선행 검색 실패: %s", e)
+        candidates = []
+    canon_artist, canon_title = meta["artist"], meta["title"]
+    ranked = rerank_entries(candidates, canon_artist, canon_title)
+    best = ranked[0].get("webpage_url") or "" if ranked else ""
+    same_names = (canon_artist.lower(), canon_title.lower()) == (artist.lower(), title.lower())
+    # 정식 명칭이 입력과 같으면 재검색해도 같은 결과
+    if best and (same_names or is_confident_match(ranked[0], canon_artist, canon_title)):
+        return best
+
+    with span("search", "youtube_requery"):
+        url = await asyncio.to_thread(
+            search_youtube,
+            _youtube_query(canon_artist, canon_title),
+            artist=canon_artist,
+            title=canon_title,
+        )
+    return url or best
 
 
 @router.post("/search", response_model=SearchResponse)
@@ -120,20 +630,31 @@ async def search(req: SearchRequest):
     if not title:
         raise HTTPException(status_code=422, detail="곡명을 입력해주세요 (예: 아이유 - 좋은날)")
 
-    # 메타데이터 수집 (async)
-    meta = await collect_all_metadata(artist, title)
+    # YouTube 검색(blocking, thread pool)을 입력한 아티스트·곡명으로 메타데이터 수집과 동시에 시작
+    early_search = asyncio.create_task(
+        asyncio.to_thread(
+            search_youtube_ranked, _youtube_query(artist, title), artist=artist, title=title
+        )
+    )
+    try:
+        with span("search", "metadata"):
+            meta = await collect_all_metadata(artist, title)
+    except BaseException:
+        early_search.cancel()
+        raise
 
-    # YouTube 검색 — blocking 이므로 thread pool에서 실행
-    search_q = f"{meta['artist']} {meta['title']} official audio"
-    youtube_url = await asyncio.to_thread(
-        lambda: search_youtube(search_q, artist=meta["artist"], title=meta["title"])
-    ) or ""
+    # 메타데이터 수집 이후 남은 검색 대기 (+ 필요 시 정식 명칭 재검색)
+    with span("search", "youtube"):
+        youtube_url = await _resolve_youtube_url(early_search, artist, title, meta)
 
     # 커버 아트 폴백: CAA/Deezer 모두 실패 시 YouTube 썸네일 사용
     cover_url = meta["cover_url"] or (
         _youtube_thumbnail(youtube_url) if youtube_url else ""
     )
 
+    if PREFETCH_ENABLED and youtube_url:
+        await asyncio.to_thread(_start_prefetch, youtube_url, meta["artist"], meta["title"])
+
     return SearchResponse(
         artist=meta["artist"],
         title=meta["title"],
@@ -144,69 +665,495 @@ async def search(req: SearchRequest):
         composer=meta["composer"],
         lyricist=meta["lyricist"],
         youtube_url=youtube_url,
+        download_token=(
+            issue_token(youtube_url, meta["artist"], meta["title"]) if youtube_url else ""
+        ),
+    )
+
+
+def _start_prefetch(url: str, artist: str, title: str) -> None:
+    """검색 결과를 /download 기본 포맷으로 미리 받는 백그라운드 작업 등록 (유휴 용량이 있을 때만)."""
+    video_id = extract_video_id(url)
+    if not video_id:
+        return
+    query = f"{artist} - {title}" if artist else title
+
+    def submit(job_id: str) -> None:
+        job_store.create(
+            job_id,
+            {"status": "queued", "step": "프리페치 대기 중", "owner": worker_id(), "prefetch": True},
+        )
+        scheduler.submit(
+            job_id,
+            lambda: _run_download_job(
+                job_id, url, query, None, fmt=PREFETCH_FORMAT, quality=PREFETCH_QUALITY
+            ),
+            background=True,
+        )
+
+    prefetcher.start(video_id, f"{PREFETCH_FORMAT}-{PREFETCH_QUALITY}", submit)
+
+
+def _job_request(
+    url: str | None,
+    query: str | None,
+    save_dir: str | None,
+    priority: int,
+    fmt: str,
+    quality: int,
+    mode: str,
+) -> dict:
+    """_submit_job 인자 (작업 기록에 함께 저장)."""
+    return dict(
+        url=url,
+        query=query,
+        save_dir=save_dir,
+        priority=priority,
+        fmt=fmt,
+        quality=quality,
+        mode=mode,
+    )
+
+
+def _submit_job(
+    job_id: str,
+    url: str | None,
+    query: str | None,
+    save_dir: str | None,
+    priority: int,
+    **options,
+) -> int:
+    """스케줄러에 다운로드 작업 등록 → 대기열 위치. 가득 차면 QueueFullError.
+
+    options: _run_download_job의 fmt·quality·mode
+    """
+    return scheduler.submit(
+        job_id,
+        lambda: _run_download_job(job_id, url, query, save_dir, **options),
+        priority=priority,
     )
 
 
 @router.post("/download", response_model=JobStatusResponse)
-async def download(req: DownloadRequest, background_tasks: BackgroundTasks):
-    """비동기 다운로드 Job 생성. job_id로 상태 폴링."""
-    if not req.query and not req.url:
-        raise HTTPException(status_code=422, detail="query 또는 url 중 하나는 필수입니다")
+async def download(req: DownloadRequest):
+    """비동기 다운로드 Job 생성. job_id로 상태 폴링. 대기열이 가득 차면 429.
+
+    token(/search의 download_token)이 유효하면 검색 결과 URL과 정식 아티스트·곡명을 그대로 써서
+    작업의 YouTube 검색 단계를 건너뛴다. 만료·검증 실패 시 query·url로 진행한다.
+    """
+    url, query = req.url, req.query
+    handoff = verify_token(req.token) if req.token else None
+    if handoff:
+        url = handoff.url
+        query = f"{handoff.artist} - {handoff.title}" if handoff.artist else handoff.title
+    if not query and not url:
+        detail = (
+            "검색 결과가 만료되었습니다. 다시 검색해주세요"
+            if req.token
+            else "query 또는 url 중 하나는 필수입니다"
+        )
+        raise HTTPException(status_code=422, detail=detail)
 
     job_id = str(uuid.uuid4())[:8]
-    jobs[job_id] = {"status": "queued", "step": "대기 중"}
-    background_tasks.add_task(_run_download_job, job_id, req.url, req.query, req.save_dir)
-    return JobStatusResponse(job_id=job_id, status="queued", step="대기 중")
+    # 재시작 후 재개(_resume_orphaned_jobs)할 수 있도록 요청 내용도 기록
+    request = _job_request(
+        url, query, req.save_dir, req.priority, req.format, req.quality, req.mode
+    )
+    await asyncio.to_thread(
+        job_store.create,
+        job_id,
+        {"status": "queued", "step": "대기 중", "owner": worker_id(), "request": request},
+    )
+    try:
+        position = _submit_job(job_id, **request)
+    except QueueFullError as e:
+        await asyncio.to_thread(job_store.delete, job_id)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "10"})
+    return JobStatusResponse(
+        job_id=job_id, status="queued", step="대기 중", queue_position=position
+    )
+
+
+# ─── 배치 다운로드 ───────────────────────────────────────────────────────────
+
+
+async def _feed_batch(
+    tracks: list[tuple[str, str | None, str | None]],
+    save_dir: str | None,
+    priority: int,
+    **options,
+) -> None:
+    """배치 곡들을 대기열 여유가 있을 때만 조금씩 스케줄러에 넣는다.
+
+    대기열을 절반까지만 채워 단건 /download 요청이 429를 받지 않도록 한다.
+    곡별 검색·다운로드·클립 단계는 스케줄러의 단계별 슬롯에서 서로 겹쳐 실행된다.
+    """
+    for job_id, url, query in tracks:
+        while True:
+            job = await asyncio.to_thread(job_store.get, job_id)
+            if not job or job["status"] != "queued":
+                break  # 제출 전에 취소됨
+            if scheduler.stats()["queued"] < max(1, scheduler.max_queue // 2):
+                try:
+                    _submit_job(job_id, url, query, save_dir, priority, **options)
+                    break
+                except QueueFullError:
+                    pass
+            await asyncio.sleep(0.5)
+
+
+def _start_feed(
+    tracks: list[tuple[str, str | None, str | None]],
+    save_dir: str | None,
+    priority: int,
+    **options,
+) -> None:
+    """_feed_batch를 백그라운드 태스크로 시작."""
+    task = asyncio.create_task(_feed_batch(tracks, save_dir, priority, **options))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _resume_batch(jobs: list[tuple[str, dict]]) -> None:
+    """재시작으로 중단된 배치 소속 작업들 [(job_id, request)]을 다시 조금씩 제출.
+
+    한 배치의 곡은 같은 요청에서 나왔으므로 저장 경로·우선순위·포맷 옵션도 같다.
+    """
+    request = jobs[0][1]
+    _start_feed(
+        [(job_id, r["url"], r["query"]) for job_id, r in jobs],
+        request["save_dir"],
+        request["priority"],
+        fmt=request["fmt"],
+        quality=request["quality"],
+        mode=request["mode"],
+    )
+    logger.info("[Download] 중단된 배치 작업 %d건 재개", len(jobs))
+
+
+def _batch_jobs(batch: dict) -> list[tuple[str, dict]]:
+    return [(job_id, job_store.get(job_id) or {}) for job_id in batch.get("job_ids", [])]
+
+
+def _finalize_batches() -> None:
+    """모든 곡이 끝난 배치를 done 처리 (TTL 만료 대상이 되도록)."""
+    for batch_id, batch in job_store.find(("running",)).items():
+        if batch.get("kind") != "batch":
+            continue
+        if all(job.get("status", "error") in FINISHED_STATUSES for _, job in _batch_jobs(batch)):
+            job_store.update(batch_id, only_if_status="running", status="done", step="완료")
+
+
+@router.post("/download/batch", response_model=BatchStatusResponse)
+async def download_batch(req: BatchDownloadRequest):
+    """여러 곡(검색어·URL·플레이리스트)을 한 번에 다운로드. batch_id로 진행률 조회."""
+    # (url, query) 목록
+    tracks_in: list[tuple[str | None, str | None]] = [
+        (None, q) for q in req.queries if q.strip()
+    ]
+    tracks_in += [(u, None) for u in req.urls if u.strip()]
+    if req.playlist_url:
+        try:
+            entries = await asyncio.to_thread(
+                expand_playlist, req.playlist_url, BATCH_MAX_TRACKS
+            )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"플레이리스트를 읽을 수 없습니다: {e}")
+        tracks_in += [(e["url"], None) for e in entries]
+
+    if not tracks_in:
+        raise HTTPException(
+            status_code=422, detail="queries, urls, playlist_url 중 하나는 필수입니다"
+        )
+    if len(tracks_in) > BATCH_MAX_TRACKS:
+        raise HTTPException(
+            status_code=422, detail=f"한 번에 최대 {BATCH_MAX_TRACKS}곡까지 요청할 수 있습니다"
+        )
+
+    batch_id = str(uuid.uuid4())[:8]
+    owner = worker_id()
+    tracks = []
+    records: dict[str, dict] = {}
+    for url, query in tracks_in:
+        job_id = str(uuid.uuid4())[:8]
+        request = _job_request(
+            url, query, req.save_dir, req.priority, req.format, req.quality, req.mode
+        )
+        records[job_id] = {
+            "status": "queued",
+            "step": "대기 중",
+            "owner": owner,
+            "batch_id": batch_id,
+            "request": request,
+        }
+        tracks.append((job_id, url, query))
+    records[batch_id] = {
+        "kind": "batch",
+        "status": "running",
+        "step": "진행 중",
+        "owner": owner,
+        "job_ids": [job_id for job_id, _, _ in tracks],
+    }
+    # 곡 수만큼의 INSERT를 한 트랜잭션으로, 이벤트 루프 밖에서
+    await asyncio.to_thread(job_store.create_many, records)
+    _start_feed(
+        tracks, req.save_dir, req.priority, fmt=req.format, quality=req.quality, mode=req.mode
+    )
+    return await get_batch_status(batch_id)
+
+
+@router.get("/batch/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(batch_id: str):
+    """배치 전체 진행률과 곡별 상태."""
+    batch = await asyncio.to_thread(job_store.get, batch_id)
+    if not batch or batch.get("kind") != "batch":
+        raise HTTPException(status_code=404, detail="batch_id를 찾을 수 없습니다")
+
+    children = await asyncio.to_thread(_batch_jobs, batch)
+    counts: dict[str, int] = {}
+    for _, job in children:
+        status = job.get("status", "expired")
+        counts[status] = counts.get(status, 0) + 1
+    finished = sum(n for status, n in counts.items() if status in FINISHED_STATUSES)
+    total = len(children)
+
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        status="done" if finished == total else "running",
+        total=total,
+        counts=counts,
+        progress=finished / total if total else 1.0,
+        archive_url=f"/music-downloader/batch/{batch_id}/archive",
+        jobs=[_status_response(job_id, job) for job_id, job in children],
+    )
+
+
+@router.get("/batch/{batch_id}/archive")
+async def get_batch_archive(batch_id: str, samples: bool = False):
+    """완료된 곡들을 ZIP으로 스트리밍. samples=true면 60초 샘플도 포함.
+
+    미리듣기(preview) 곡은 전체 음원이 없으므로 samples와 관계없이 샘플을 담는다.
+    진행 중인 배치도 요청 시점까지 완료된 곡만 묶어 내려준다.
+    """
+    batch = await asyncio.to_thread(job_store.get, batch_id)
+    if not batch or batch.get("kind") != "batch":
+        raise HTTPException(status_code=404, detail="batch_id를 찾을 수 없습니다")
+
+    files: list[tuple[Path, str]] = []
+    for _, job in await asyncio.to_thread(_batch_jobs, batch):
+        if job.get("status") != "done":
+            continue
+        if job.get("file_path"):
+            files.append((Path(job["file_path"]), job["filename"]))
+        if job.get("sample_file_path") and (samples or not job.get("file_path")):
+            files.append((Path(job["sample_file_path"]), job["sample_filename"]))
+    files = [(path, name) for path, name in files if path.exists()]
+    if not files:
+        raise HTTPException(status_code=409, detail="아직 완료된 곡이 없습니다")
+
+    return StreamingResponse(
+        iter_zip(files),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="batch-{batch_id}.zip"'},
+    )
+
+
+@router.get("/queue")
+async def queue_stats():
+    """스케줄러 대기열 길이·실행 중 작업 수·단계별 제한."""
+    return scheduler.stats()
+
+
+def _require_job(job: dict | None) -> dict:
+    """단건 작업 레코드 → 그대로. 없거나 배치 레코드면 404 (배치는 /batch/{batch_id}로 조회)."""
+    if not job or job.get("kind") == "batch":
+        raise HTTPException(status_code=404, detail="job_id를 찾을 수 없습니다")
+    return job
+
+
+@router.post("/cancel/{job_id}", response_model=JobStatusResponse)
+async def cancel_job(job_id: str):
+    """대기 중이면 즉시, 실행 중이면 다음 단계 경계에서 작업 취소.
+
+    작업을 실행 중인 워커 프로세스가 달라도 cancel_requested 플래그로 전달된다.
+    """
+    return await asyncio.to_thread(_cancel_job, job_id)
+
+
+def _cancel_job(job_id: str) -> JobStatusResponse:
+    job = _require_job(job_store.get(job_id))
+
+    scheduler.cancel(job_id)
+    if job_store.update(job_id, only_if_status="queued", status="cancelled", step="취소됨"):
+        return JobStatusResponse(job_id=job_id, status="cancelled", step="취소됨")
+    if not job_store.update(
+        job_id, only_if_status="running", step="취소 중", cancel_requested=True
+    ):
+        job = job_store.get(job_id) or job
+        raise HTTPException(status_code=409, detail=f"취소할 수 없는 상태입니다: {job['status']}")
+    return JobStatusResponse(job_id=job_id, status="running", step="취소 중")
 
 
 @router.get("/status/{job_id}", response_model=JobStatusResponse)
 async def get_status(job_id: str):
     """Job 상태 폴링."""
-    job = jobs.get(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="job_id를 찾을 수 없습니다")
-    return JobStatusResponse(
-        job_id=job_id,
-        status=job["status"],
-        step=job.get("step"),
-        download_url=job.get("download_url"),
-        sample_download_url=job.get("sample_download_url"),
-        error=job.get("error"),
+    job = _require_job(await asyncio.to_thread(job_store.get, job_id))
+    return _status_response(job_id, job, scheduler.position(job_id))
+
+
+@router.get("/events/{job_id}")
+async def job_event_stream(job_id: str, request: Request):
+    """Job 상태 변경을 Server-Sent Events로 푸시 (폴링 대체).
+
+    상태·단계·진행률(바이트/속도/ETA/프래그먼트, ffmpeg 시간)이 바뀔 때마다
+    'status' 이벤트를 보내고, 작업이 끝나면 스트림을 닫는다.
+    """
+    _require_job(await asyncio.to_thread(job_store.get, job_id))
+
+    async def stream():
+        changed = job_events.subscribe(job_id)
+        last_payload = None
+        last_sent = time.monotonic()
+        try:
+            while not await request.is_disconnected():
+                changed.clear()
+                job = await asyncio.to_thread(job_store.get, job_id) or {"status": "expired"}
+                payload = _status_response(
+                    job_id, job, scheduler.position(job_id)
+                ).model_dump_json()
+                if payload != last_payload:
+                    yield f"event: status\ndata: {payload}\n\n"
+                    last_payload, last_sent = payload, time.monotonic()
+                if job["status"] in FINISHED_STATUSES or job["status"] == "expired":
+                    return
+                if time.monotonic() - last_sent >= 15:
+                    yield ": keep-alive\n\n"  # 프록시 유휴 타임아웃 방지
+                    last_sent = time.monotonic()
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=EVENTS_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass  # 다른 워커 프로세스의 변경은 주기적 재조회로 반영
+        finally:
+            job_events.unsubscribe(job_id, changed)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
-@router.get("/file/{job_id}")
-async def get_file(job_id: str):
-    """완료된 Job의 원본 MP3 파일을 FileResponse로 서빙."""
-    job = jobs.get(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="job_id를 찾을 수 없습니다")
-    if job["status"] != "done":
-        raise HTTPException(status_code=409, detail=f"아직 완료되지 않았습니다: {job['status']}")
+# ─── 파일 서빙 ───────────────────────────────────────────────────────────────
 
-    file_path = Path(job.get("file_path", ""))
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
 
-    filename = job.get("filename", "audio.mp3")
-    return FileResponse(path=str(file_path), media_type="audio/mpeg", filename=filename)
+_MEDIA_TYPES = {".mp3": "audio/mpeg", ".m4a": "audio/mp4", ".opus": "audio/ogg"}
+# 변환 중에도 앞부분부터 재생 가능한 포맷 (m4a는 moov atom이 마지막에 기록되어 제외)
+_PROGRESSIVE_SUFFIXES = {".mp3", ".opus"}
 
+# (완성 파일 경로, 파일명, 변환 중 파일 경로) job 필드
+_FILE_FIELDS = {
+    "full": ("file_path", "filename", "partial_file_path"),
+    "sample": ("sample_file_path", "sample_filename", "partial_sample_path"),
+}
+
+
+def _media_type(path: Path) -> str:
+    return _MEDIA_TYPES.get(path.suffix, "application/octet-stream")
+
+
+def _serve_job_file(request: Request, job_id: str, kind: str, progressive: bool):
+    """완료된 파일은 Range·캐시 헤더와 함께, progressive면 변환 중인 파일을 따라가며 서빙."""
+    job = _require_job(job_store.get(job_id))
+    path_key, name_key, partial_key = _FILE_FIELDS[kind]
+
+    if kind == "full" and job.get("mode") == "preview":
+        raise HTTPException(status_code=404, detail="미리듣기 작업에는 전체 음원이 없습니다")
+
+    # 파일 경로가 기록되어 있으면 작업이 진행 중이어도 서빙 (먼저 공개된 미리듣기 샘플)
+    if not job.get(path_key):
+        partial = job.get(partial_key)
+        if not progressive or job["status"] != "running" or not partial:
+            raise HTTPException(
+                status_code=409, detail=f"아직 완료되지 않았습니다: {job['status']}"
+            )
+        path = Path(partial)
+        if path.suffix not in _PROGRESSIVE_SUFFIXES:
+            raise HTTPException(
+                status_code=409, detail="이 포맷은 변환 중 스트리밍을 지원하지 않습니다"
+            )
+        if not path.exists():
+            raise HTTPException(
+                status_code=409, detail="변환 준비 중입니다", headers={"Retry-After": "1"}
+            )
+
+        def is_finished() -> bool:
+            # 작업이 끝났거나 완료 처리로 변환 중 경로가 지워졌으면 쓰기 종료
+            current = job_store.get(job_id)
+            return (
+                not current
+                or current["status"] in FINISHED_STATUSES
+                or current.get(partial_key) != partial
+            )
+
+        suffix = "_sample" if kind == "sample" else ""
+        filename = f"{job.get('stem', 'audio')}{suffix}{path.suffix}"
+        return follow_file_response(path, _media_type(path), filename, is_finished)
+
+    file_path = Path(job.get(path_key, ""))
+    if not file_path.is_file():
+        detail = "샘플 파일을 찾을 수 없습니다" if kind == "sample" else "파일을 찾을 수 없습니다"
+        raise HTTPException(status_code=404, detail=detail)
+    return range_file_response(
+        request,
+        file_path,
+        _media_type(file_path),
+        job.get(name_key, file_path.name),
+        # 완료된 작업의 파일은 바뀌지 않으므로 작업 보관 기간 동안 캐시 허용
+        headers={"cache-control": f"private, max-age={int(JOB_TTL)}"},
+        accel_root=_TEMP_DIR,
+    )
 
-@router.get("/file/{job_id}/sample")
-async def get_sample_file(job_id: str):
-    """완료된 Job의 60초 샘플 MP3 파일을 FileResponse로 서빙."""
-    job = jobs.get(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="job_id를 찾을 수 없습니다")
-    if job["status"] != "done":
-        raise HTTPException(status_code=409, detail=f"아직 완료되지 않았습니다: {job['status']}")
 
-    sample_path = Path(job.get("sample_file_path", ""))
-    if not sample_path.exists():
-        raise HTTPException(status_code=404, detail="샘플 파일을 찾을 수 없습니다")
+@router.api_route("/file/{job_id}", methods=["GET", "HEAD"])
+async def get_file(job_id: str, request: Request, progressive: bool = False):
+    """완료된 Job의 전체 음원 파일 서빙 (Range/206, ETag·Last-Modified).
 
-    filename = job.get("sample_filename", "audio_sample.mp3")
-    return FileResponse(path=str(sample_path), media_type="audio/mpeg", filename=filename)
+    progressive=true면 변환 중에도 지금까지 쓰인 부분부터 스트리밍한다 (mp3/opus).
+    """
+    return await asyncio.to_thread(_serve_job_file, request, job_id, "full", progressive)
+
+
+@router.api_route("/file/{job_id}/sample", methods=["GET", "HEAD"])
+async def get_sample_file(job_id: str, request: Request, progressive: bool = False):
+    """완료된 Job의 60초 샘플 파일 서빙 (Range/206, ETag·Last-Modified).
+
+    progressive=true면 변환 중에도 지금까지 쓰인 부분부터 스트리밍한다 (mp3/opus).
+    """
+    return await asyncio.to_thread(_serve_job_file, request, job_id, "sample", progressive)
+
+
+# ─── 캐시 관리 ───────────────────────────────────────────────────────────────
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """메타데이터·YouTube 검색 캐시 hit/miss 카운터, yt-dlp 세션 풀·다운로드 저장소 현황."""
+    return {
+        "metadata": metadata_cache.stats(),
+        "youtube_search": search_cache_stats(),
+        "ydl_pool": ydl_pool.stats(),
+        "download_store": download_store.stats(),
+    }
+
+
+@router.delete("/cache/metadata")
+async def purge_metadata_cache(artist: str | None = None, title: str | None = None):
+    """메타데이터 캐시 삭제. artist/title 미지정 시 전체 삭제."""
+    try:
+        deleted = await asyncio.to_thread(metadata_cache.purge, artist, title)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"캐시 삭제 실패: {e}")
+    return {"ok": True, "deleted": deleted}
 
 
 # ─── 쿠키 관리 ───────────────────────────────────────────────────────────────
@@ -226,6 +1173,7 @@ async def upload_cookies(file: UploadFile = File(...)):
         COOKIES_FILE.write_bytes(content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"파일 저장 실패: {e}")
+    ydl_pool.invalidate()
     return {"ok": True, "path": str(COOKIES_FILE.resolve()), "size": len(content)}
 
 
@@ -233,4 +1181,5 @@ async def upload_cookies(file: UploadFile = File(...)):
 async def delete_cookies():
     if COOKIES_FILE.exists():
         COOKIES_FILE.unlink()
+    ydl_pool.invalidate()
     return {"ok": True}
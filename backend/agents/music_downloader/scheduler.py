@@ -0,0 +1,261 @@
+"""다운로드 작업 스케줄러 — 대기열 + 단계별 동시 실행 제한 + 취소.
+
+yt-dlp·ffmpeg 작업은 blocking이므로 고정 개수의 워커 스레드에서 실행한다.
+- 대기열: FIFO 또는 우선순위(높을수록 먼저), 최대 길이 초과 시 QueueFullError
+- 단계 제한: 네트워크 단계(search/download)와 CPU 단계(transcode/clip)를 별도 세마포어로 제한
+- 취소: 대기 중이면 즉시 제거, 실행 중이면 다음 단계 경계/진행 훅에서 JobCancelled
+- 종료(stop): 실행 중인 작업을 같은 지점에서 JobInterrupted로 중단 — 사용자 취소와 달리 재개 대상
+- 백그라운드(프리페치): 모든 일반 작업 뒤에 실행, 단계 슬롯은 종류별 SCHED_BACKGROUND_SHARE 비율까지만
+  사용, 대기열 길이 제한에 세지 않음. promote()로 일반 작업으로 올릴 수 있다
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from .metrics import QUEUE_WAIT_SECONDS, STAGE_WAIT_SECONDS, span
+
+logger = logging.getLogger(__name__)
+
+SCHED_NETWORK_LIMIT = int(os.getenv("SCHED_NETWORK_LIMIT", "4"))
+SCHED_CPU_LIMIT = int(os.getenv("SCHED_CPU_LIMIT", str(os.cpu_count() or 2)))
+SCHED_MAX_QUEUE = int(os.getenv("SCHED_MAX_QUEUE", "100"))
+SCHED_POLICY = os.getenv("SCHED_POLICY", "fifo")  # fifo | priority
+# 백그라운드 작업이 동시에 쓸 수 있는 단계 슬롯 비율 (종류별 최소 1개)
+SCHED_BACKGROUND_SHARE = float(os.getenv("SCHED_BACKGROUND_SHARE", "0.25"))
+
+# 파이프라인 단계 → 자원 종류
+STAGE_KINDS = {
+    "search": "network",
+    "download": "network",
+    "transcode": "cpu",
+    "clip": "cpu",
+}
+
+
+class QueueFullError(Exception):
+    """대기열이 가득 차 새 작업을 받을 수 없음 (HTTP 429로 변환)."""
+
+
+class JobCancelled(Exception):
+    """작업이 취소되어 파이프라인을 중단함."""
+
+
+class JobInterrupted(JobCancelled):
+    """스케줄러 종료로 파이프라인을 중단함 (취소가 아니므로 다음 시작 때 재개)."""
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        network_limit: int = SCHED_NETWORK_LIMIT,
+        cpu_limit: int = SCHED_CPU_LIMIT,
+        max_queue: int = SCHED_MAX_QUEUE,
+        policy: str = SCHED_POLICY,
+        background_share: float = SCHED_BACKGROUND_SHARE,
+    ) -> None:
+        self.max_queue = max_queue
+        self.policy = policy
+        self.limits = {"network": network_limit, "cpu": cpu_limit}
+        # 네트워크·CPU 단계가 동시에 꽉 찰 수 있을 만큼의 워커
+        self.workers = network_limit + cpu_limit
+        self._semaphores = {kind: threading.BoundedSemaphore(n) for kind, n in self.limits.items()}
+        self._background_semaphores = {
+            kind: threading.BoundedSemaphore(max(1, int(n * background_share)))
+            for kind, n in self.limits.items()
+        }
+        # ((백그라운드 여부, 우선순위), 순번, job_id, 실행 함수, 제출 시각)
+        self._heap: list[tuple[tuple[int, int], int, str, Callable[[], None], float]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._queued: set[str] = set()
+        self._running: set[str] = set()
+        self._cancelled: set[str] = set()
+        self._background: set[str] = set()
+        self._threads: list[threading.Thread] = []
+        self._stopping = False
+        # 다른 프로세스에서 들어온 취소 요청 확인용 (job_id → 취소 여부), 초당 1회까지만 조회
+        self.cancel_source: Callable[[str], bool] | None = None
+        self._last_poll: dict[str, float] = {}
+
+    # ─── 수명주기 ──────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self, timeout: float = 5) -> None:
+        with self._cond:
+            # 실행 중인 작업은 check_cancelled에서 JobInterrupted로 중단된다
+            self._stopping = True
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        for t in threads:
+            t.join(timeout)
+
+    # ─── 대기열 ────────────────────────────────────────────────────────────
+
+    def submit(
+        self, job_id: str, fn: Callable[[], None], priority: int = 0, background: bool = False
+    ) -> int:
+        """작업 등록 → 대기열 위치(1부터) 반환. 가득 차면 QueueFullError.
+
+        background: 일반 작업이 모두 빠진 뒤에 실행 (대기열 길이 제한에 세지 않음)
+        """
+        self.start()
+        with self._cond:
+            if not background and len(self._queued - self._background) >= self.max_queue:
+                raise QueueFullError(f"대기열이 가득 찼습니다 ({self.max_queue})")
+            heapq.heappush(
+                self._heap,
+                (self._rank(priority, background), next(self._seq), job_id, fn, time.monotonic()),
+            )
+            self._queued.add(job_id)
+            if background:
+                self._background.add(job_id)
+            self._cond.notify()
+        return self.position(job_id) or 1
+
+    def _rank(self, priority: int, background: bool) -> tuple[int, int]:
+        return (int(background), -priority if self.policy == "priority" else 0)
+
+    def promote(self, job_id: str) -> bool:
+        """백그라운드 작업 → 일반 작업. 백그라운드 작업이었으면 True.
+
+        대기 중이면 일반 작업 순서로 옮기고, 실행 중이면 다음 단계부터 슬롯 비율 제한을 풀어 준다.
+        """
+        with self._cond:
+            if job_id not in self._background:
+                return False
+            self._background.discard(job_id)
+            if job_id in self._queued:
+                for i, (_, seq, jid, fn, submitted_at) in enumerate(self._heap):
+                    if jid == job_id:
+                        self._heap[i] = (self._rank(0, False), seq, jid, fn, submitted_at)
+                        heapq.heapify(self._heap)
+                        break
+            return True
+
+    def is_background(self, job_id: str) -> bool:
+        return job_id in self._background
+
+    def position(self, job_id: str) -> int | None:
+        """대기 중이면 1부터 시작하는 순번, 아니면 None."""
+        with self._cond:
+            if job_id not in self._queued:
+                return None
+            target = next(item for item in self._heap if item[2] == job_id)
+            # (rank, seq)가 더 작은 = 먼저 꺼내질 항목 수
+            ahead = sum(
+                1 for item in self._heap if item[2] in self._queued and item[:2] < target[:2]
+            )
+            return ahead + 1
+
+    def cancel(self, job_id: str) -> str | None:
+        """취소 요청. 대기 중이었으면 'queued', 실행 중이었으면 'running', 없으면 None."""
+        with self._cond:
+            if job_id in self._queued:
+                # heap에서 바로 빼지 않고 워커가 꺼낼 때 건너뜀
+                self._queued.discard(job_id)
+                self._background.discard(job_id)
+                return "queued"
+            if job_id in self._running:
+                self._cancelled.add(job_id)
+                return "running"
+        return None
+
+    def is_cancelled(self, job_id: str) -> bool:
+        return job_id in self._cancelled
+
+    def is_interrupted(self, job_id: str) -> bool:
+        """실행 중에 스케줄러가 종료되기 시작함."""
+        return self._stopping and job_id in self._running
+
+    def check_cancelled(self, job_id: str) -> None:
+        if job_id not in self._cancelled and self.cancel_source is not None:
+            now = time.monotonic()
+            if now - self._last_poll.get(job_id, 0) >= 1:
+                self._last_poll[job_id] = now
+                if self.cancel_source(job_id):
+                    with self._cond:
+                        self._cancelled.add(job_id)
+        if job_id in self._cancelled:
+            raise JobCancelled(job_id)
+        if self.is_interrupted(job_id):
+            raise JobInterrupted(job_id)
+
+    # ─── 실행 ──────────────────────────────────────────────────────────────
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping and not self._heap:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                _, _, job_id, fn, submitted_at = heapq.heappop(self._heap)
+                if job_id not in self._queued:
+                    continue  # 대기 중 취소됨
+                self._queued.discard(job_id)
+                self._running.add(job_id)
+            QUEUE_WAIT_SECONDS.observe(time.monotonic() - submitted_at)
+            try:
+                fn()
+            except Exception:
+                logger.exception("[Scheduler] 작업 실행 중 처리되지 않은 예외 job_id=%s", job_id)
+            finally:
+                with self._cond:
+                    self._running.discard(job_id)
+                    self._cancelled.discard(job_id)
+                    self._background.discard(job_id)
+                    self._last_poll.pop(job_id, None)
+
+    @contextmanager
+    def stage(self, job_id: str, name: str) -> Iterator[None]:
+        """파이프라인 단계 실행 슬롯 확보. 대기 중에도 취소를 확인한다.
+
+        백그라운드 작업은 백그라운드 몫의 슬롯을 먼저 확보한다.
+        슬롯 대기 시간과 단계 실행 시간은 metrics 히스토그램에 기록된다.
+        """
+        kind = STAGE_KINDS[name]
+        sems = [self._semaphores[kind]]
+        if job_id in self._background:
+            sems.insert(0, self._background_semaphores[kind])
+        requested = time.perf_counter()
+        acquired: list[threading.BoundedSemaphore] = []
+        try:
+            for sem in sems:
+                while not sem.acquire(timeout=0.5):
+                    self.check_cancelled(job_id)
+                acquired.append(sem)
+            STAGE_WAIT_SECONDS.labels(name).observe(time.perf_counter() - requested)
+            self.check_cancelled(job_id)
+            with span("job", name, cancelled=(JobCancelled,)):
+                yield
+        finally:
+            for sem in acquired:
+                sem.release()
+        self.check_cancelled(job_id)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": len(self._queued),
+                "running": len(self._running),
+                "background": len(self._background),
+                "max_queue": self.max_queue,
+                "policy": self.policy,
+                "limits": dict(self.limits),
+            }
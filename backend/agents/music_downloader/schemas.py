@@ -1,4 +1,11 @@
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+# 출력 포맷 — mp3는 항상 재인코딩, m4a/opus는 원본 코덱이 같으면 스트림 복사
+AudioFormat = Literal["mp3", "m4a", "opus"]
+# full: 전체 음원 + 샘플 / preview: 앞 60초만 받아 샘플만 / preview_then_full: 샘플 먼저 공개 후 전체
+JobMode = Literal["full", "preview", "preview_then_full"]
 
 
 class SearchRequest(BaseModel):
@@ -15,18 +22,48 @@ class SearchResponse(BaseModel):
     composer: str
     lyricist: str
     youtube_url: str
+    # /download에 넘기면 YouTube 검색을 건너뜀 (HANDOFF_TTL 동안 유효, 결과가 없으면 빈 문자열)
+    download_token: str = ""
 
 
 class DownloadRequest(BaseModel):
     query: str | None = None
     url: str | None = None
+    token: str | None = None  # /search의 download_token — 유효하면 query·url 대신 사용
     save_dir: str | None = None  # 로컬 저장 경로 (선택)
+    priority: int = 0  # 높을수록 먼저 (SCHED_POLICY=priority일 때만 적용)
+    format: AudioFormat = "mp3"
+    quality: int = Field(192, ge=32, le=320)  # 재인코딩 시 비트레이트(kbps)
+    mode: JobMode = "full"
 
 
 class JobStatusResponse(BaseModel):
     job_id: str
-    status: str  # queued | running | done | error
+    status: str  # queued | running | done | error | cancelled
     step: str | None = None
+    queue_position: int | None = None  # 대기 중일 때 1부터 시작하는 순번
+    progress: dict | None = None  # 현재 단계 진행 상황 (바이트·속도·ETA·프래그먼트 또는 ffmpeg 시간)
     download_url: str | None = None
     sample_download_url: str | None = None  # 60초 샘플 다운로드 URL
     error: str | None = None
+
+
+class BatchDownloadRequest(BaseModel):
+    queries: list[str] = []  # "아티스트 - 곡명" 목록
+    urls: list[str] = []
+    playlist_url: str | None = None  # YouTube 플레이리스트 (flat 목록으로 펼침)
+    save_dir: str | None = None
+    priority: int = -1  # 단건 /download보다 뒤로 (SCHED_POLICY=priority일 때)
+    format: AudioFormat = "mp3"
+    quality: int = Field(192, ge=32, le=320)
+    mode: JobMode = "full"
+
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    status: str  # running | done
+    total: int
+    counts: dict[str, int]  # 상태별 작업 수
+    progress: float  # 종료된 작업 비율 (0~1)
+    archive_url: str
+    jobs: list[JobStatusResponse]
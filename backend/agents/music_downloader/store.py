@@ -0,0 +1,253 @@
+"""영상 ID + 출력 포맷 기준 콘텐츠 주소 다운로드 저장소.
+
+같은 영상을 여러 작업이 요청해도 다운로드·변환은 한 번만 수행한다.
+- 완료된 항목: <root>/<video_id>/<fmt>/ 아래 audio.* + audio_sample.*
+  (미리듣기 항목은 audio_sample.*만 — audio_path가 None)
+- 빌드 중: 같은 프로세스의 다른 작업은 진행 중인 빌드를 기다린다
+- 빌드는 임시 디렉터리에서 진행 후 rename으로 공개 → 반쯤 만들어진 파일은 노출되지 않음
+- 임시 디렉터리는 항목마다 고정된 경로(.<fmt>.partial)라 빌드가 실패·중단되어도 받던 데이터가 남고,
+  재시도나 서버 재시작 후의 빌드가 이어서 받는다. 프로세스 간에는 flock으로 한 빌드만 쓰고,
+  잠겨 있으면 일회용 디렉터리에서 처음부터 받는다
+"""
+from __future__ import annotations
+
+import fcntl
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+def _locked(path: Path) -> bool:
+    """다른 빌드(같은 프로세스 포함)가 flock으로 잡고 있는 부분 데이터 디렉터리인지."""
+    if not path.name.endswith(".partial"):
+        return False
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+    return False
+
+
+@dataclass(frozen=True)
+class StoreEntry:
+    audio_path: Path | None  # 미리듣기(샘플 전용) 항목이면 None
+    sample_path: Path
+
+
+# 빌드 함수: 작업 디렉터리를 받아 (원본 또는 None, 샘플) 경로 반환
+BuildFn = Callable[[Path], tuple[Path | None, Path]]
+
+
+class DownloadStore:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.hits = 0
+        self.builds = 0
+        self.waits = 0
+        self._inflight: dict[tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def entry_dir(self, video_id: str, fmt: str) -> Path:
+        return self.root / video_id / fmt
+
+    def get(self, video_id: str, fmt: str) -> StoreEntry | None:
+        """완료된 항목이 있으면 반환 (마지막 사용 시각 갱신).
+
+        항목은 rename으로 한 번에 공개되므로 샘플만 있으면 샘플 전용 항목이다.
+        """
+        entry_dir = self.entry_dir(video_id, fmt)
+        if not entry_dir.is_dir():
+            return None
+        sample = next(entry_dir.glob("audio_sample.*"), None)
+        if not sample:
+            return None
+        audio = next(entry_dir.glob("audio.*"), None)
+        try:
+            os.utime(entry_dir)
+        except OSError:
+            pass
+        return StoreEntry(audio, sample)
+
+    def get_or_build(
+        self,
+        video_id: str,
+        fmt: str,
+        build: BuildFn,
+        on_wait: Callable[[], None] | None = None,
+        check: Callable[[], None] | None = None,
+        retry_on: tuple[type[BaseException], ...] = (),
+        on_built: Callable[[], None] | None = None,
+    ) -> StoreEntry:
+        """저장소에 있으면 즉시 반환, 없으면 build 실행 (동일 키 동시 요청은 대기).
+
+        on_wait: 다른 작업의 빌드를 기다리기 시작할 때 한 번 호출
+        check: 대기 중 주기적으로 호출 — 예외를 던지면 대기 중단 (취소용)
+        retry_on: 빌드한 쪽이 이 예외로 실패하면(예: 그 작업만 취소됨) 대기자가 다시 시도
+        on_built: 이 호출의 빌드 결과가 항목으로 공개되었을 때 호출
+        """
+        key = (video_id, fmt)
+        with self._lock:
+            entry = self.get(video_id, fmt)
+            if entry:
+                self.hits += 1
+                return entry
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+            else:
+                self.waits += 1
+
+        if not leader:
+            if on_wait:
+                on_wait()
+            while True:
+                if check:
+                    check()
+                try:
+                    return fut.result(timeout=0.5)
+                except FutureTimeout:
+                    continue
+                except retry_on:
+                    return self.get_or_build(
+                        video_id, fmt, build, on_wait, check, retry_on, on_built
+                    )
+
+        try:
+            entry = self._build(video_id, fmt, build, on_built)
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(entry)
+            return entry
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _build(
+        self, video_id: str, fmt: str, build: BuildFn, on_built: Callable[[], None] | None
+    ) -> StoreEntry:
+        entry_dir = self.entry_dir(video_id, fmt)
+        with self._work_dir(entry_dir) as work_dir:
+            audio, sample = build(work_dir)
+            self.builds += 1
+            try:
+                work_dir.rename(entry_dir)
+            except OSError:
+                # 다른 프로세스가 먼저 공개했으면 그쪽 결과 사용
+                existing = self.get(video_id, fmt)
+                if existing is None:
+                    raise
+                shutil.rmtree(work_dir, ignore_errors=True)
+                logger.info("[Store] 이미 공개된 항목 사용: %s/%s", video_id, fmt)
+                return existing
+            if on_built:
+                on_built()
+            return StoreEntry(entry_dir / audio.name if audio else None, entry_dir / sample.name)
+
+    @contextmanager
+    def _work_dir(self, entry_dir: Path) -> Iterator[Path]:
+        """빌드 디렉터리 — 항목별 고정 경로(실패해도 남김), 다른 프로세스가 쓰는 중이면 일회용."""
+        partial = entry_dir.with_name(f".{entry_dir.name}.partial")
+        partial.mkdir(parents=True, exist_ok=True)
+        # 디렉터리 자체를 잠금 → 공개(rename) 후에도 잠금 파일이 항목에 섞이지 않음
+        fd = os.open(partial, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            logger.info("[Store] 다른 프로세스가 빌드 중 — 일회용 디렉터리 사용: %s", entry_dir)
+            work_dir = entry_dir.with_name(f".{entry_dir.name}.{uuid.uuid4().hex[:8]}.tmp")
+            work_dir.mkdir()
+            try:
+                yield work_dir
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            return
+        try:
+            if any(partial.iterdir()):
+                logger.info("[Store] 이전 빌드의 부분 데이터에서 이어 받음: %s", partial)
+            yield partial
+        finally:
+            os.close(fd)
+
+    def evict(self, video_id: str, fmt: str, unused_since: float | None = None) -> bool:
+        """완료된 항목과 남은 부분 데이터 삭제 (빌드 중이면 그대로 둠) → 항목 삭제 여부.
+
+        unused_since(time.time() 기준)가 주어지면 그 뒤로 get()된 적 없는 항목만 삭제한다
+        (get()이 갱신하는 디렉터리 mtime으로 판단 — 다른 워커 프로세스의 사용도 반영됨).
+        """
+        entry_dir = self.entry_dir(video_id, fmt)
+        partial = entry_dir.with_name(f".{fmt}.partial")
+        with self._lock:
+            if (video_id, fmt) in self._inflight:
+                return False
+            if partial.is_dir() and not _locked(partial):
+                shutil.rmtree(partial, ignore_errors=True)
+            if not entry_dir.is_dir():
+                return False
+            try:
+                if unused_since is not None and entry_dir.stat().st_mtime > unused_since:
+                    return False
+            except FileNotFoundError:
+                return False
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        try:
+            entry_dir.parent.rmdir()  # 비었으면 영상 디렉터리도 정리
+        except OSError:
+            pass
+        return True
+
+    def prune(self, max_age: float, partial_max_age: float | None = None) -> int:
+        """max_age초 동안 사용되지 않은 항목 삭제 → 삭제 수.
+
+        중단된 빌드의 부분 데이터·임시 디렉터리는 partial_max_age초(기본 max_age) 동안 갱신이 없으면 삭제.
+        """
+        if not self.root.is_dir():
+            return 0
+        now = time.time()
+        cutoff = now - max_age
+        partial_cutoff = now - (max_age if partial_max_age is None else partial_max_age)
+        removed = 0
+        with self._lock:
+            inflight = {self.entry_dir(*key) for key in self._inflight}
+            for fmt_dir in self.root.glob("*/*"):
+                if fmt_dir in inflight or not fmt_dir.is_dir() or _locked(fmt_dir):
+                    continue
+                try:
+                    limit = partial_cutoff if fmt_dir.name.startswith(".") else cutoff
+                    if fmt_dir.stat().st_mtime > limit:
+                        continue
+                except FileNotFoundError:
+                    continue
+                shutil.rmtree(fmt_dir, ignore_errors=True)
+                removed += 1
+                try:
+                    fmt_dir.parent.rmdir()  # 비었으면 영상 디렉터리도 정리
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            inflight = len(self._inflight)
+        return {"hits": self.hits, "builds": self.builds, "waits": self.waits, "inflight": inflight}
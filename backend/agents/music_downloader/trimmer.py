@@ -1,28 +1,371 @@
-"""ffmpeg 기반 60초 클립 생성 (55-60초 구간 페이드아웃)."""
+"""ffmpeg 기반 변환 — 전체 음원 + 60초 샘플 (55-60초 구간 페이드아웃).
+
+ffmpeg·ffprobe는 모두 프로세스 전용 asyncio 이벤트 루프에서 서브프로세스로 실행한다.
+- 동시 인코더 수: 호스트 전체에서 FFMPEG_MAX_PROCS개 (기본: 사용 가능한 코어 수).
+  변환은 작업 프로세스·uvicorn 워커마다 따로 돌기 때문에 프로세스 내 세마포어 대신
+  FFMPEG_SLOT_DIR의 슬롯 파일 flock으로 센다
+- 작업별로 nice 값·스레드 수 지정 가능 (-threads는 디코더와 출력별 인코더에, -filter_threads는 필터에)
+- -progress 출력은 읽는 대로 파싱해 호출 스레드의 on_progress로 전달
+- FFMPEG_TIMEOUT초를 넘기거나 on_progress가 예외를 던지면(취소) ffmpeg을 종료시킨 뒤 예외 전달
+"""
 from __future__ import annotations
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+from dataclasses import dataclass
 from pathlib import Path
+from typing import AsyncIterator, Callable
+
 import ffmpeg
 
+logger = logging.getLogger(__name__)
+
+_CLIP_SECONDS = 60
+_FADE_START = 55
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# 호스트 전체 동시 ffmpeg 인코더 수
+FFMPEG_MAX_PROCS = max(1, int(os.getenv("FFMPEG_MAX_PROCS") or _available_cores()))
+# 인코더 하나가 쓸 스레드 수 (기본: 코어를 슬롯 수로 나눈 값)
+FFMPEG_THREADS = max(
+    1, int(os.getenv("FFMPEG_THREADS") or _available_cores() // FFMPEG_MAX_PROCS)
+)
+# ffmpeg 프로세스 nice 값 (0이면 부모와 같음)
+FFMPEG_NICE = int(os.getenv("FFMPEG_NICE", "0"))
+# 백그라운드(프리페치) 작업의 ffmpeg nice 값 — 일반 작업에 코어를 양보
+FFMPEG_BACKGROUND_NICE = int(os.getenv("FFMPEG_BACKGROUND_NICE", "10"))
+# ffmpeg 한 번의 실행 시간 상한(초, 0이면 무제한) — 슬롯 대기 시간 포함
+FFMPEG_TIMEOUT = float(os.getenv("FFMPEG_TIMEOUT", "1800"))
+FFMPEG_SLOT_DIR = Path(
+    os.getenv("FFMPEG_SLOT_DIR") or Path(tempfile.gettempdir()) / "yongent-ffmpeg"
+)
+_PROBE_TIMEOUT = 30.0
+_SLOT_POLL = 0.1
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    ext: str
+    encoder: str  # 재인코딩 시 사용할 인코더
+    copy_codec: str | None = None  # 원본 코덱이 이것이면 재인코딩 없이 스트림 복사
+    output_args: tuple[tuple[str, str], ...] = ()
+
+
+# 요청 가능한 출력 포맷 (mp3가 기본, m4a/opus는 원본 코덱이 같으면 패스스루)
+OUTPUT_FORMATS = {
+    "mp3": OutputFormat("mp3", "libmp3lame"),
+    # moov atom을 앞으로 옮겨 다운로드 완료 전에도 재생 가능하게
+    "m4a": OutputFormat("m4a", "aac", "aac", (("movflags", "+faststart"),)),
+    "opus": OutputFormat("opus", "libopus", "opus"),
+}
 
-def make_60s_clip(input_path: Path, output_dir: Path, stem: str = "") -> Path:
-    """input_path mp3에서 앞 60초 클립 생성.
 
-    55-60초 구간에 페이드아웃 적용.
-    stem이 주어지면 '{stem}(60s).mp3', 아니면 'audio_60s.mp3'로 저장.
+async def _read_progress(
+    reader: asyncio.StreamReader, total: float, stage: str, emit: Callable[[dict], None]
+) -> None:
+    """ffmpeg -progress 출력(key=value 블록)을 읽는 대로 파싱해 블록마다 emit 호출."""
+    block: dict[str, str] = {}
+    async for raw in reader:
+        key, _, value = raw.decode(errors="replace").strip().partition("=")
+        block[key] = value
+        if key != "progress":
+            continue
+        # 시작 직후에는 N/A가 올 수 있음 (out_time_ms도 실제 단위는 마이크로초)
+        us = block.get("out_time_us") or block.get("out_time_ms") or ""
+        out_time = int(us) / 1_000_000 if us.isdigit() else 0.0
+        speed = block.get("speed", "").rstrip("x")
+        emit({
+            "stage": stage,
+            "out_time": round(out_time, 2),
+            "total": total,
+            "percent": round(min(100.0, out_time / total * 100), 1) if total else None,
+            "speed": float(speed) if speed.replace(".", "", 1).isdigit() else None,
+        })
+        block = {}
+
+
+# ─── 서브프로세스 실행기 ───────────────────────────────────────────────────────
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """ffmpeg 실행용 이벤트 루프 (프로세스당 하나, 처음 쓸 때 데몬 스레드로 시작)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="ffmpeg-loop", daemon=True).start()
+        return _loop
+
+
+@contextlib.asynccontextmanager
+async def _encoder_slot() -> AsyncIterator[None]:
+    """호스트 전체 인코더 슬롯 하나를 잡음 (빈 슬롯이 날 때까지 대기)."""
+    FFMPEG_SLOT_DIR.mkdir(parents=True, exist_ok=True)
+    waited = False
+    while True:
+        for i in range(FFMPEG_MAX_PROCS):
+            fd = os.open(FFMPEG_SLOT_DIR / f"slot-{i}.lock", os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            try:
+                yield
+            finally:
+                os.close(fd)  # 닫으면 잠금도 풀림
+            return
+        if not waited:
+            waited = True
+            logger.info("[ffmpeg] 인코더 슬롯 %d개 사용 중 — 대기", FFMPEG_MAX_PROCS)
+        await asyncio.sleep(_SLOT_POLL)
+
+
+async def _exec(
+    args: list[str],
+    finished: threading.Event,
+    timeout: float,
+    nice: int = 0,
+    slot: bool = True,
+    progress: tuple[float, str, Callable[[dict], None]] | None = None,
+) -> bytes:
+    """args 실행 → stdout (progress가 있으면 진행 파싱에 쓰므로 빈 값).
+
+    progress: (전체 길이, 단계명, emit) — stdout을 -progress 출력으로 파싱
+    오류 종료 시 ffmpeg.Error, 시간 초과 시 TimeoutError. 예외·취소로 빠져나가면 프로세스를 종료하고
+    회수한 뒤 finished를 세운다.
     """
-    filename = f"{stem}_sample.mp3" if stem else "audio_sample.mp3"
-    output_path = output_dir / filename
-
-    audio = (
-        ffmpeg
-        .input(str(input_path), ss=0, t=60)
-        .audio
-        .filter("afade", t="out", st=55, d=5)
+    try:
+        async with asyncio.timeout(timeout or None):
+            async with _encoder_slot() if slot else contextlib.nullcontext():
+                proc = await asyncio.create_subprocess_exec(
+                    *args,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                # stderr는 오류 메시지만 오지만 파이프가 차서 멈추지 않도록 동시에 읽음
+                stderr = asyncio.ensure_future(proc.stderr.read())
+                try:
+                    if nice:
+                        with contextlib.suppress(OSError):
+                            os.setpriority(os.PRIO_PROCESS, proc.pid, nice)
+                    if progress:
+                        await _read_progress(proc.stdout, *progress)
+                        stdout = b""
+                    else:
+                        stdout = await proc.stdout.read()
+                    code = await proc.wait()
+                    err = await stderr
+                finally:
+                    if proc.returncode is None:
+                        proc.kill()
+                        await proc.wait()
+                        stderr.cancel()
+    except TimeoutError:
+        raise TimeoutError(f"{args[0]}이 {timeout:g}초 안에 끝나지 않아 종료했습니다") from None
+    finally:
+        finished.set()
+    if code != 0:
+        raise ffmpeg.Error(args[0], stdout, err)
+    return stdout
+
+
+def _call(
+    args: list[str],
+    timeout: float,
+    nice: int = 0,
+    slot: bool = True,
+    on_progress: Callable[[dict], None] | None = None,
+    total: float = 0.0,
+    stage: str = "",
+) -> bytes:
+    """_exec를 실행용 루프에서 돌리고 끝날 때까지 대기 (진행 콜백은 이 스레드에서 호출).
+
+    on_progress가 예외를 던지면 ffmpeg을 종료시킨 뒤 그 예외를 다시 던진다.
+    """
+    events: queue.SimpleQueue[dict] = queue.SimpleQueue()
+    finished = threading.Event()
+    progress = (total, stage, events.put) if on_progress else None
+    fut = asyncio.run_coroutine_threadsafe(
+        _exec(args, finished, timeout, nice, slot, progress), _event_loop()
+    )
+    try:
+        while True:
+            try:
+                event = events.get(timeout=0.2)
+            except queue.Empty:
+                if fut.done() and events.empty():
+                    break
+                continue
+            on_progress(event)
+    except BaseException:
+        fut.cancel()
+        # 종료된 ffmpeg이 회수될 때까지 기다려야 호출자가 출력 디렉터리를 안전하게 정리할 수 있음
+        finished.wait(5)
+        raise
+    return fut.result()
+
+
+def _run(
+    stream,
+    on_progress: Callable[[dict], None] | None,
+    total: float,
+    stage: str,
+    nice: int | None = None,
+    threads: int | None = None,
+) -> None:
+    """ffmpeg 실행. on_progress가 있으면 -progress 출력을 파싱해 전달한다.
+
+    nice·threads를 생략하면 FFMPEG_NICE·FFMPEG_THREADS.
+    """
+    # 진행률은 stdout으로, stderr는 오류 메시지만
+    args = stream.global_args("-progress", "pipe:1", "-nostats", "-loglevel", "error").compile()
+    # 입력(디코더)용 -threads와 -filter_threads는 맨 앞에 (ffmpeg-python은 global_args를 맨 뒤에
+    # 붙임). 인코더 스레드는 출력 옵션이라 호출 측이 출력마다 threads=로 지정한다
+    threads = str(threads or FFMPEG_THREADS)
+    args[1:1] = ["-threads", threads, "-filter_threads", threads]
+    _call(
+        args,
+        FFMPEG_TIMEOUT,
+        FFMPEG_NICE if nice is None else nice,
+        on_progress=on_progress,
+        total=total,
+        stage=stage,
     )
-    (
-        ffmpeg
-        .output(audio, str(output_path), acodec="libmp3lame", audio_bitrate="192k")
-        .overwrite_output()
-        .run(quiet=True)
+
+
+def _probe(path: Path) -> tuple[str | None, float]:
+    """원본의 (첫 오디오 스트림 코덱, 길이(초)). 알 수 없으면 (None, 0)."""
+    args = [
+        "ffprobe", "-show_format", "-show_streams", "-of", "json",
+        "-select_streams", "a:0", str(path),
+    ]
+    try:
+        # ffprobe는 가벼워 인코더 슬롯을 잡지 않음
+        info = json.loads(_call(args, _PROBE_TIMEOUT, slot=False))
+    except (ffmpeg.Error, OSError, ValueError):
+        return None, 0.0
+    streams = info.get("streams") or [{}]
+    try:
+        duration = float(info["format"]["duration"])
+    except (KeyError, ValueError):
+        duration = 0.0
+    return streams[0].get("codec_name"), duration
+
+
+def _fade_sample(audio):
+    """앞 60초만 남기고 55-60초 구간 페이드아웃."""
+    return (
+        audio
+        .filter("atrim", end=_CLIP_SECONDS)
+        .filter("asetpts", "PTS-STARTPTS")
+        .filter("afade", t="out", st=_FADE_START, d=_CLIP_SECONDS - _FADE_START)
     )
-    return output_path
+
+
+def transcode_with_sample(
+    source_path: Path,
+    output_dir: Path,
+    fmt: str = "mp3",
+    quality: int = 192,
+    on_progress: Callable[[dict], None] | None = None,
+    nice: int | None = None,
+    threads: int | None = None,
+) -> tuple[Path, Path]:
+    """다운로드한 원본을 한 번만 읽어 전체 음원과 60초 샘플을 동시에 생성.
+
+    - 패스스루: 원본 코덱이 요청 포맷과 같으면(AAC→m4a, Opus→opus) 재인코딩 없이
+      스트림 복사로 리먹싱한다. 샘플도 스트림 복사로 앞 60초만 잘라내므로
+      코덱 프레임 경계(수십 ms 단위)에서 끊기고 페이드아웃은 적용되지 않는다.
+    - 재인코딩: asplit으로 디코딩 결과를 두 갈래로 나눠 한 쪽은 전체 인코딩,
+      다른 쪽은 앞 60초 + 55-60초 페이드아웃 후 인코딩한다.
+    quality는 재인코딩 시 비트레이트(kbps).
+    nice·threads는 ffmpeg 프로세스 우선순위·스레드 수 (생략 시 FFMPEG_NICE·FFMPEG_THREADS).
+    → (audio.<ext>, audio_sample.<ext>)
+    """
+    spec = OUTPUT_FORMATS[fmt]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    full_path = output_dir / f"audio.{spec.ext}"
+    sample_path = output_dir / f"audio_sample.{spec.ext}"
+    extra = dict(spec.output_args, threads=threads or FFMPEG_THREADS)  # 출력별 인코더 스레드
+
+    # 패스스루 판단이나 진행률이 필요할 때만 ffprobe 실행
+    codec, total = _probe(source_path) if spec.copy_codec or on_progress else (None, 0.0)
+    source = ffmpeg.input(str(source_path))
+    if spec.copy_codec and codec == spec.copy_codec:
+        stream = ffmpeg.merge_outputs(
+            ffmpeg.output(source.audio, str(full_path), acodec="copy", **extra),
+            ffmpeg.output(
+                source.audio, str(sample_path), acodec="copy", t=_CLIP_SECONDS, **extra
+            ),
+        )
+    else:
+        bitrate = f"{quality}k"
+        split = source.audio.filter_multi_output("asplit", 2)
+        sample = _fade_sample(split[1])
+        stream = ffmpeg.merge_outputs(
+            ffmpeg.output(
+                split[0], str(full_path), acodec=spec.encoder, audio_bitrate=bitrate, **extra
+            ),
+            ffmpeg.output(
+                sample, str(sample_path), acodec=spec.encoder, audio_bitrate=bitrate, **extra
+            ),
+        )
+
+    _run(stream.overwrite_output(), on_progress, total, "transcode", nice, threads)
+    return full_path, sample_path
+
+
+def make_sample(
+    source_path: Path,
+    output_dir: Path,
+    fmt: str = "mp3",
+    quality: int = 192,
+    on_progress: Callable[[dict], None] | None = None,
+    nice: int | None = None,
+    threads: int | None = None,
+) -> Path:
+    """앞부분만 받은 원본(미리듣기)에서 60초 샘플만 생성 → audio_sample.<ext>.
+
+    패스스루·재인코딩 규칙은 transcode_with_sample과 같다.
+    """
+    spec = OUTPUT_FORMATS[fmt]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sample_path = output_dir / f"audio_sample.{spec.ext}"
+    extra = dict(spec.output_args, threads=threads or FFMPEG_THREADS)  # 출력별 인코더 스레드
+
+    codec, _ = _probe(source_path) if spec.copy_codec else (None, 0.0)
+    source = ffmpeg.input(str(source_path))
+    if spec.copy_codec and codec == spec.copy_codec:
+        stream = ffmpeg.output(
+            source.audio, str(sample_path), acodec="copy", t=_CLIP_SECONDS, **extra
+        )
+    else:
+        stream = ffmpeg.output(
+            _fade_sample(source.audio),
+            str(sample_path),
+            acodec=spec.encoder,
+            audio_bitrate=f"{quality}k",
+            **extra,
+        )
+
+    _run(stream.overwrite_output(), on_progress, _CLIP_SECONDS, "clip", nice, threads)
+    return sample_path
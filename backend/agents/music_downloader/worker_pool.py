@@ -0,0 +1,281 @@
+"""다운로드·변환 작업 프로세스 풀.
+
+yt-dlp의 추출·다운로드 루프는 파이썬 코드라 GIL을 오래 잡으므로, 스케줄러 워커 스레드가 직접 실행하면
+부하가 몰릴 때 API 이벤트 루프(/search·/status·/health)의 응답이 늦어진다.
+무거운 단계(download_audio, transcode_with_sample, make_sample)는 이 풀의 별도 프로세스에서 실행하고,
+스케줄러 스레드는 결과를 기다리기만 한다 (대기 중에는 GIL을 놓음).
+
+- 프로세스는 필요할 때 spawn으로 만들며 최대 size개. 각자 전용 Pipe로 한 번에 한 호출만 처리
+- 진행 콜백: 함수 인자 progress_hooks(yt-dlp 훅 목록)·on_progress(ffmpeg 진행)는 자식에서 IPC 훅으로
+  바꿔 실행하고, 부모가 받은 값으로 원래 콜백을 호출한다. 자식은 부모가 처리할 때까지 기다리므로
+  콜백 안의 대기(프리페치 속도 제한)도 그대로 적용된다. 진행 메시지는 HOOK_INTERVAL마다 한 번으로 묶음
+- 취소: 콜백이나 check()가 예외를 던지면 자식의 다음 훅에서 중단시키고, CANCEL_GRACE초 안에 끝나지
+  않으면 프로세스 그룹(ffmpeg 포함)을 종료한 뒤 새 프로세스로 교체한다
+- size=0이면 호출 스레드에서 바로 실행 (이전 동작)
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import pickle
+import signal
+import threading
+import time
+import traceback
+from multiprocessing.connection import Connection
+from typing import Any, Callable
+
+from yt_dlp.utils import DownloadError
+
+logger = logging.getLogger(__name__)
+
+# 자식이 부모에게 진행 메시지를 보내는 최소 간격(초) — 상태 전환(finished 등)은 항상 보냄
+HOOK_INTERVAL = 0.1
+# 취소 요청 후 자식이 스스로 멈추기를 기다리는 시간(초)
+CANCEL_GRACE = 5.0
+
+# 자식에서 IPC 훅으로 바꿔 실행할 콜백 인자
+_CALLBACK_ARGS = ("progress_hooks", "on_progress")
+
+_mp = multiprocessing.get_context("spawn")
+
+
+class WorkerCrashed(RuntimeError):
+    """작업 프로세스가 결과 없이 종료됨."""
+
+
+# ─── 자식 프로세스 ───────────────────────────────────────────────────────────
+
+
+class _Cancelled(Exception):
+    """부모가 취소를 요청해 자식의 작업을 중단함."""
+
+
+def _scalars(payload: Any) -> Any:
+    """진행 정보 중 보낼 값만 — yt-dlp 훅 dict의 info_dict 같은 큰 객체는 제외."""
+    if isinstance(payload, dict):
+        return {k: v for k, v in payload.items() if isinstance(v, (str, int, float, type(None)))}
+    return payload
+
+
+def _portable(exc: BaseException) -> BaseException:
+    """부모로 보낼 수 있는 예외 (traceback 객체 등 pickle 불가 요소 제거)."""
+    if isinstance(exc, DownloadError) and exc.exc_info:
+        cause = exc.exc_info[1]
+        exc = DownloadError(
+            exc.msg, (type(cause), _portable(cause), None) if cause is not None else None
+        )
+    try:
+        pickle.dumps(exc)
+        return exc
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+def _child_main(conn: Connection) -> None:
+    # ffmpeg 등 손자 프로세스까지 한 번에 종료할 수 있도록 새 프로세스 그룹
+    os.setpgrp()
+    # Ctrl+C는 부모가 처리 (부모 종료 시 Pipe가 닫혀 자식도 끝남)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        fn, args, kwargs, callbacks = task
+        last_sent = 0.0
+
+        def make_hook(name: str):
+            def hook(payload: Any) -> None:
+                nonlocal last_sent
+                now = time.monotonic()
+                final = isinstance(payload, dict) and payload.get("status") in ("finished", "error")
+                if not final and now - last_sent < HOOK_INTERVAL:
+                    return
+                last_sent = now
+                conn.send(("hook", name, _scalars(payload)))
+                if conn.recv() == "cancel":
+                    raise _Cancelled()
+
+            return hook
+
+        for name in callbacks:
+            hook = make_hook(name)
+            kwargs[name] = [hook] if name == "progress_hooks" else hook
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            exc = _portable(e)
+            exc.add_note(f"작업 프로세스 traceback:\n{traceback.format_exc()}")
+            conn.send(("error", exc))
+        else:
+            conn.send(("result", result))
+
+
+# ─── 부모 프로세스 ───────────────────────────────────────────────────────────
+
+
+class _Worker:
+    def __init__(self) -> None:
+        self.conn, child_conn = _mp.Pipe()
+        self.process = _mp.Process(
+            target=_child_main, args=(child_conn,), name="download-worker", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+    def close(self, timeout: float) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+
+
+class WorkerPool:
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.spawned = 0
+        self.crashed = 0
+        self._idle: list[_Worker] = []
+        self._busy = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def run(self, fn: Callable, *args, check: Callable[[], None] | None = None, **kwargs):
+        """fn(*args, **kwargs)를 작업 프로세스에서 실행하고 결과 반환 (fn은 모듈 최상위 함수).
+
+        check: 결과를 기다리는 동안 주기적으로 호출 — 예외를 던지면 작업을 취소하고 그 예외를 다시 던짐
+        """
+        if self.size <= 0:
+            return fn(*args, **kwargs)
+        callbacks = {name: kwargs.pop(name) for name in _CALLBACK_ARGS if kwargs.get(name)}
+        worker = self._acquire()
+        healthy = False
+        try:
+            worker.conn.send((fn, args, kwargs, list(callbacks)))
+            kind, value, cancel = self._wait(worker, callbacks, check)
+            # 자식이 호출을 끝까지 마쳤으면(오류 포함) 프로세스는 재사용
+            healthy = True
+        finally:
+            self._release(worker, healthy)
+        if cancel is not None:
+            # 취소로 중단됐으면 자식 쪽 결과·예외 대신 취소 사유를 그대로
+            raise cancel from (value if kind == "error" else None)
+        if kind == "error":
+            raise value
+        return value
+
+    def _wait(
+        self, worker: _Worker, callbacks: dict[str, Any], check: Callable[[], None] | None
+    ) -> tuple[str, Any, BaseException | None]:
+        """자식의 메시지 처리 → ('result'|'error', 값, 취소 사유).
+
+        자식이 죽었거나 취소 후 응답이 없어 종료시켰으면 예외.
+        """
+        cancel: BaseException | None = None
+        deadline = 0.0
+        next_check = 0.0
+        while True:
+            ready = worker.conn.poll(0.5)
+            # 진행 메시지가 계속 와도 취소 확인은 0.5초마다
+            if cancel is None and check is not None and time.monotonic() >= next_check:
+                next_check = time.monotonic() + 0.5
+                try:
+                    check()
+                except BaseException as e:
+                    cancel, deadline = e, time.monotonic() + CANCEL_GRACE
+            if not ready:
+                if cancel is not None and time.monotonic() > deadline:
+                    logger.warning("[WorkerPool] 취소 후 응답 없는 작업 프로세스 종료")
+                    worker.kill()
+                    raise cancel
+                if not worker.alive():
+                    self.crashed += 1
+                    raise cancel or WorkerCrashed("작업 프로세스가 비정상 종료되었습니다")
+                continue
+            try:
+                kind, *rest = worker.conn.recv()
+            except (EOFError, OSError):
+                self.crashed += 1
+                raise cancel or WorkerCrashed("작업 프로세스가 비정상 종료되었습니다")
+            if kind != "hook":
+                return kind, rest[0], cancel
+            name, payload = rest
+            if cancel is None:
+                try:
+                    targets = callbacks[name]
+                    for cb in targets if isinstance(targets, list) else [targets]:
+                        cb(payload)
+                except BaseException as e:
+                    cancel, deadline = e, time.monotonic() + CANCEL_GRACE
+            worker.conn.send("cancel" if cancel is not None else "ok")
+
+    def _acquire(self) -> _Worker:
+        with self._cond:
+            while not self._idle and self._busy + len(self._idle) >= self.size:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("작업 프로세스 풀이 종료되었습니다")
+            self._busy += 1
+            worker = self._idle.pop() if self._idle else None
+        if worker is None or not worker.alive():
+            try:
+                worker = _Worker()
+            except BaseException:
+                with self._cond:
+                    self._busy -= 1
+                    self._cond.notify()
+                raise
+            self.spawned += 1
+        return worker
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        with self._cond:
+            self._busy -= 1
+            reuse = healthy and not self._closed
+            if reuse:
+                self._idle.append(worker)
+            self._cond.notify()
+        if reuse:
+            return
+        if healthy:
+            worker.close(0)
+        else:
+            # 중간에 끊긴 호출은 응답이 남아 있을 수 있으므로 재사용하지 않음
+            worker.kill()
+
+    def close(self, timeout: float = 5) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in idle:
+            worker.close(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "busy": self._busy,
+                "idle": len(self._idle),
+                "spawned": self.spawned,
+                "crashed": self.crashed,
+            }
@@ -0,0 +1,140 @@
+"""재사용 가능한 yt_dlp.YoutubeDL 세션 풀.
+
+YoutubeDL 생성 시마다 쿠키 파일 로드·extractor 초기화가 반복되므로,
+옵션 프로필(search/download 등)별로 미리 만든 인스턴스를 작업 단위로 대여한다.
+쿠키 파일이 바뀌면(업로드/삭제 또는 mtime 변경) 풀 전체를 다시 만든다.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+# 프로필별 유휴 인스턴스 최대 개수
+YDL_POOL_SIZE = int(os.getenv("YDL_POOL_SIZE", "4"))
+
+
+class YDLPool:
+    """프로필별 유휴 YoutubeDL 인스턴스를 보관하는 bounded 풀."""
+
+    def __init__(self, cookies_file: Path, max_idle: int = YDL_POOL_SIZE) -> None:
+        self.cookies_file = cookies_file
+        self.max_idle = max_idle
+        self.created = 0
+        self.reused = 0
+        self._builders: dict[str, Callable[[], dict]] = {}
+        self._idle: dict[str, list[tuple[tuple, yt_dlp.YoutubeDL]]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def register(self, profile: str, build_opts: Callable[[], dict]) -> None:
+        """프로필 이름과 옵션 생성 함수 등록."""
+        self._builders[profile] = build_opts
+
+    def _signature(self) -> tuple:
+        """풀 세대 + 쿠키 파일 상태. 값이 바뀌면 기존 인스턴스는 폐기 대상."""
+        try:
+            st = self.cookies_file.stat()
+            cookie_state = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            cookie_state = None
+        return (self._generation, cookie_state)
+
+    def _build(self, profile: str) -> yt_dlp.YoutubeDL:
+        ydl = yt_dlp.YoutubeDL(self._builders[profile]())
+        # 대여 후 원복할 기본 상태 기록
+        ydl._pool_defaults = (
+            dict(ydl.params),
+            list(ydl._progress_hooks),
+            list(ydl._postprocessor_hooks),
+        )
+        self.created += 1
+        return ydl
+
+    @staticmethod
+    def _reset(ydl: yt_dlp.YoutubeDL) -> None:
+        """작업 중 바뀐 파라미터·훅 원복."""
+        params, progress_hooks, pp_hooks = ydl._pool_defaults
+        ydl.params.clear()
+        ydl.params.update(params)
+        ydl._progress_hooks[:] = progress_hooks
+        ydl._postprocessor_hooks[:] = pp_hooks
+        ydl._download_retcode = 0
+
+    @staticmethod
+    def _close(ydl: yt_dlp.YoutubeDL) -> None:
+        # close()는 쿠키를 cookiefile에 되쓰므로, 새로 업로드된(또는 삭제된)
+        # 쿠키 파일을 옛 세션 쿠키로 덮어쓰지 않도록 저장을 막는다.
+        ydl.params["cookiefile"] = None
+        try:
+            ydl.close()
+        except Exception as e:
+            logger.warning("[YDLPool] 세션 정리 실패: %s", e)
+
+    @contextmanager
+    def session(self, profile: str, **params) -> Iterator[yt_dlp.YoutubeDL]:
+        """프로필 인스턴스 대여. params는 이번 작업에만 적용할 yt-dlp 파라미터."""
+        signature = self._signature()
+        stale: list[yt_dlp.YoutubeDL] = []
+        ydl = None
+        with self._lock:
+            idle = self._idle.setdefault(profile, [])
+            while idle:
+                sig, candidate = idle.pop()
+                if sig == signature:
+                    ydl = candidate
+                    self.reused += 1
+                    break
+                stale.append(candidate)
+        for old in stale:
+            self._close(old)
+        if ydl is None:
+            ydl = self._build(profile)
+
+        ydl.params.update(params)
+        ok = False
+        try:
+            yield ydl
+            ok = True
+        finally:
+            self._checkin(profile, signature, ydl, ok)
+
+    def _checkin(self, profile: str, signature: tuple, ydl: yt_dlp.YoutubeDL, ok: bool) -> None:
+        # 오류가 난 세션은 상태를 신뢰할 수 없으므로 폐기
+        if ok and signature == self._signature():
+            self._reset(ydl)
+            with self._lock:
+                idle = self._idle.setdefault(profile, [])
+                if len(idle) < self.max_idle:
+                    idle.append((signature, ydl))
+                    return
+        self._close(ydl)
+
+    def warm(self, *profiles: str) -> None:
+        """프로필마다 인스턴스 하나씩 미리 생성."""
+        signature = self._signature()
+        for profile in profiles:
+            ydl = self._build(profile)
+            with self._lock:
+                self._idle.setdefault(profile, []).append((signature, ydl))
+
+    def invalidate(self) -> None:
+        """쿠키 변경 등으로 모든 유휴 인스턴스 폐기. 대여 중인 것은 반납 시 폐기."""
+        with self._lock:
+            self._generation += 1
+            idle, self._idle = self._idle, {}
+        for entries in idle.values():
+            for _, ydl in entries:
+                self._close(ydl)
+
+    def stats(self) -> dict:
+        with self._lock:
+            idle = {profile: len(entries) for profile, entries in self._idle.items()}
+        return {"idle": idle, "created": self.created, "reused": self.reused}
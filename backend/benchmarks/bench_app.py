@@ -0,0 +1,509 @@
+"""/search·/download 부하 벤치마크 — 녹화된 업스트림 응답과 로컬 대역으로 오프라인 실행.
+
+- 대역 서버(benchmarks/standin.py)를 별도 프로세스로 띄워 Melon·Deezer·Genius 녹화 응답,
+  YouTube 검색·영상 정보, 생성한 오디오(WAV)를 제공한다 (CPU·RSS 측정에서 제외되도록)
+- yt-dlp는 benchmarks/yt_dlp_plugins의 대역 추출기를 통해 대역 서버에서 검색·다운로드한다
+- 앱은 httpx ASGITransport로 같은 프로세스 안에서 호출 (uvicorn·소켓 오버헤드 제외)
+- 요청마다 서로 다른 곡을 써서 메타데이터·검색·다운로드 캐시를 타지 않는다 (--unique로 조절)
+
+보고 항목: 엔드포인트·파이프라인 단계별 p50/p95/p99·처리량, 시나리오별 CPU 시간·RSS.
+단계는 metadata·youtube_search(/search 내부), upstream <경로>(메타데이터 HTTP 요청),
+스케줄러 단계(search·download·transcode·clip)의 슬롯 대기/실행 시간.
+
+    cd backend
+    python -m benchmarks.bench_app search --requests 200 --concurrency 20 --latency-ms 80
+    python -m benchmarks.bench_app download --requests 20 --concurrency 4 --mode preview_then_full
+    python -m benchmarks.bench_app batch --requests 10 --mode preview
+    python -m benchmarks.bench_app all --json result.json --compare baseline.json
+
+download·batch 시나리오는 ffmpeg가 필요하다 (없으면 건너뜀).
+batch는 배치 완료 후 ZIP 아카이브의 파일 수까지 확인한다.
+--compare 기준 결과보다 p95가 --threshold 비율 이상 느려지거나 처리량이 그만큼 줄면 종료 코드 1.
+앱 설정 환경변수(HTTP_RATE, SCHED_* 등)를 직접 지정하면 그 값이 우선한다.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import resource
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+
+_BENCH_DIR = Path(__file__).parent
+_PREFIX = "/music-downloader"
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+# ─── 측정 ────────────────────────────────────────────────────────────────────
+
+
+class Recorder:
+    """이름별 소요 시간(초)·오류 수 기록. 앱 스레드와 이벤트 루프 양쪽에서 호출된다."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.timings: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def add(self, name: str, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self.timings[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    @contextmanager
+    def time(self, name: str):
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.add(name, time.perf_counter() - start, ok)
+
+    def summary(self, wall: float) -> dict[str, dict]:
+        with self._lock:
+            items = {name: list(values) for name, values in self.timings.items()}
+            errors = dict(self.errors)
+        return {
+            name: {
+                "n": len(values),
+                "errors": errors.get(name, 0),
+                "p50_ms": _percentile(values, 50) * 1000,
+                "p95_ms": _percentile(values, 95) * 1000,
+                "p99_ms": _percentile(values, 99) * 1000,
+                "mean_ms": statistics.fmean(values) * 1000,
+                "per_s": len(values) / wall if wall else 0.0,
+            }
+            for name, values in sorted(items.items())
+        }
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # /proc가 없는 환경 — 최대 RSS로 대신 (Linux KB, macOS bytes)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+class ResourceMonitor:
+    """구간 동안의 CPU 시간(본 프로세스 + 종료된 자식 ffmpeg)과 RSS(0.1초 간격 표본)."""
+
+    def __enter__(self) -> "ResourceMonitor":
+        self._stop = threading.Event()
+        self._rss = [_rss_bytes()]
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        self._self0 = resource.getrusage(resource.RUSAGE_SELF)
+        self._child0 = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self._t0 = time.perf_counter()
+        return self
+
+    def _sample(self) -> None:
+        while not self._stop.wait(0.1):
+            self._rss.append(_rss_bytes())
+
+    def __exit__(self, *exc) -> None:
+        self.wall = time.perf_counter() - self._t0
+        self_usage = resource.getrusage(resource.RUSAGE_SELF)
+        child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self._stop.set()
+        self._thread.join()
+        self._rss.append(_rss_bytes())
+        user = self_usage.ru_utime - self._self0.ru_utime
+        system = self_usage.ru_stime - self._self0.ru_stime
+        children = (child_usage.ru_utime - self._child0.ru_utime) + (
+            child_usage.ru_stime - self._child0.ru_stime
+        )
+        mb = 1024 * 1024
+        self.result = {
+            "wall_s": self.wall,
+            "cpu_user_s": user,
+            "cpu_system_s": system,
+            "cpu_children_s": children,
+            "cpu_percent": (user + system + children) / self.wall * 100 if self.wall else 0.0,
+            "rss_start_mb": self._rss[0] / mb,
+            "rss_peak_mb": max(self._rss) / mb,
+            "rss_end_mb": self._rss[-1] / mb,
+        }
+
+
+class _Active:
+    """계측 래퍼가 기록할 현재 시나리오의 Recorder."""
+
+    recorder = Recorder()
+
+
+def _instrument() -> None:
+    """앱 내부 단계에 계측 래퍼 설치 (모듈 전역·스케줄러 인스턴스 속성 교체, 한 번만)."""
+    from agents.music_downloader import metadata, router
+
+    scheduler_stage = router.scheduler.stage
+
+    @contextmanager
+    def stage(job_id: str, name: str):
+        requested = time.perf_counter()
+        with scheduler_stage(job_id, name):
+            _Active.recorder.add(f"stage {name} (wait)", time.perf_counter() - requested)
+            with _Active.recorder.time(f"stage {name}"):
+                yield
+
+    router.scheduler.stage = stage
+
+    collect = router.collect_all_metadata
+
+    async def collect_all_metadata(*args, **kwargs):
+        with _Active.recorder.time("metadata"):
+            return await collect(*args, **kwargs)
+
+    router.collect_all_metadata = collect_all_metadata
+
+    def timed_search(fn):
+        def wrapper(*args, **kwargs):
+            with _Active.recorder.time("youtube_search"):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    router.search_youtube = timed_search(router.search_youtube)
+    router.search_youtube_ranked = timed_search(router.search_youtube_ranked)
+
+    fetch = metadata.fetch
+
+    async def timed_fetch(url: str, **kwargs):
+        # 대역 서버 경로의 첫 구간 (melon·deezer·genius-api·genius)
+        name = "upstream " + httpx.URL(url).path.strip("/").split("/", 1)[0]
+        with _Active.recorder.time(name):
+            return await fetch(url, **kwargs)
+
+    metadata.fetch = timed_fetch
+
+
+# ─── 시나리오 ────────────────────────────────────────────────────────────────
+
+
+def _query(i: int, unique: int) -> str:
+    # 대역 서버는 검색어 첫 단어를 아티스트로 본다 — 아티스트명은 한 단어로
+    n = i % unique
+    return f"Artist{n} - Song Title {n}"
+
+
+async def _run_load(count: int, concurrency: int, one) -> None:
+    """count개 요청을 concurrency개 작업자가 닫힌 루프로 실행."""
+    indexes = iter(range(count))
+
+    async def worker() -> None:
+        for i in indexes:
+            await one(i)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def _search_scenario(client: httpx.AsyncClient, recorder: Recorder, args) -> None:
+    async def one(i: int) -> None:
+        start = time.perf_counter()
+        resp = await client.post(f"{_PREFIX}/search", json={"query": _query(i, args.unique)})
+        ok = resp.status_code == 200 and bool(resp.json().get("youtube_url"))
+        recorder.add("POST /search", time.perf_counter() - start, ok)
+
+    await _run_load(args.requests, args.concurrency, one)
+
+
+async def _download_scenario(client: httpx.AsyncClient, recorder: Recorder, args) -> None:
+    async def timed(name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        resp = await client.request(method, url, **kwargs)
+        recorder.add(name, time.perf_counter() - start, resp.status_code < 400)
+        return resp
+
+    async def one(i: int) -> None:
+        start = time.perf_counter()
+        body = {"query": _query(i, args.unique), "format": args.format, "mode": args.mode}
+        resp = await timed("POST /download", "POST", f"{_PREFIX}/download", json=body)
+        if resp.status_code != 200:
+            recorder.add("job", time.perf_counter() - start, ok=False)
+            return
+        job_id = resp.json()["job_id"]
+
+        sample_seen = False
+        deadline = start + args.job_timeout
+        while True:
+            job = (await timed("GET /status", "GET", f"{_PREFIX}/status/{job_id}")).json()
+            if job.get("sample_download_url") and not sample_seen:
+                sample_seen = True
+                recorder.add("job until sample", time.perf_counter() - start)
+            if job["status"] in ("done", "error", "cancelled") or time.perf_counter() > deadline:
+                break
+            await asyncio.sleep(args.poll_interval)
+        recorder.add("job", time.perf_counter() - start, job["status"] == "done")
+        if job["status"] != "done":
+            return
+
+        if job.get("download_url"):
+            await timed("GET /file", "GET", f"{_PREFIX}/file/{job_id}")
+            await timed(
+                "GET /file (range)", "GET", f"{_PREFIX}/file/{job_id}",
+                headers={"range": "bytes=0-65535"},
+            )
+        await timed("GET /file/sample", "GET", f"{_PREFIX}/file/{job_id}/sample")
+
+    await _run_load(args.requests, args.concurrency, one)
+
+
+async def _batch_scenario(client: httpx.AsyncClient, recorder: Recorder, args) -> None:
+    """--requests곡을 배치 하나로 요청 → 완료 후 ZIP 아카이브(샘플 포함·미포함) 확인.
+
+    아카이브가 오류이거나 완료된 곡 수만큼의 파일을 담지 않으면 오류로 집계한다.
+    """
+    start = time.perf_counter()
+    body = {
+        "queries": [_query(i, args.unique) for i in range(args.requests)],
+        "format": args.format,
+        "mode": args.mode,
+    }
+    resp = await client.post(f"{_PREFIX}/download/batch", json=body)
+    recorder.add("POST /download/batch", time.perf_counter() - start, resp.status_code == 200)
+    if resp.status_code != 200:
+        return
+    batch_id = resp.json()["batch_id"]
+
+    deadline = start + args.job_timeout
+    while True:
+        batch = (await client.get(f"{_PREFIX}/batch/{batch_id}")).json()
+        if batch["status"] == "done" or time.perf_counter() > deadline:
+            break
+        await asyncio.sleep(args.poll_interval)
+    done = batch["counts"].get("done", 0)
+    recorder.add("batch", time.perf_counter() - start, done == batch["total"])
+
+    for samples in (False, True):
+        start = time.perf_counter()
+        resp = await client.get(
+            f"{_PREFIX}/batch/{batch_id}/archive", params={"samples": str(samples).lower()}
+        )
+        ok = resp.status_code == 200
+        if ok:
+            with zipfile.ZipFile(io.BytesIO(resp.content)) as archive:
+                # 미리듣기는 곡마다 샘플 하나, 그 외는 전체 음원 (+ samples면 샘플)
+                per_job = 1 if args.mode == "preview" or not samples else 2
+                ok = len(archive.namelist()) == done * per_job
+        name = "GET /batch/archive" + (" (samples)" if samples else "")
+        recorder.add(name, time.perf_counter() - start, ok)
+
+
+_SCENARIOS = {
+    "search": _search_scenario,
+    "download": _download_scenario,
+    "batch": _batch_scenario,
+}
+
+
+# ─── 실행 환경 ───────────────────────────────────────────────────────────────
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def _standin(args):
+    """대역 서버를 별도 프로세스로 실행 → 기본 URL."""
+    port = _free_port()
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.standin",
+            "--port", str(port),
+            "--latency-ms", str(args.latency_ms),
+            "--audio-seconds", str(args.audio_seconds),
+            "--pad-kb", str(args.pad_kb),
+        ],
+        cwd=_BENCH_DIR.parent,
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{base_url}/healthz", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("대역 서버를 시작하지 못했습니다")
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def _configure(base_url: str, work_dir: Path) -> None:
+    """앱 import 전에 업스트림·저장 경로를 대역 서버·임시 디렉터리로 지정."""
+    os.environ.update({
+        "MELON_BASE_URL": f"{base_url}/melon",
+        "DEEZER_BASE_URL": f"{base_url}/deezer",
+        "GENIUS_API_BASE_URL": f"{base_url}/genius-api",
+        "BENCH_STANDIN_URL": base_url,
+        "DOWNLOAD_DIR": str(work_dir / "downloads"),
+        "METADATA_CACHE_PATH": str(work_dir / "metadata.sqlite3"),
+        "JOB_STORE_PATH": str(work_dir / "jobs.sqlite3"),
+    })
+    # 대역 서버는 한 호스트 — 운영용 호스트별 속도 제한이 측정을 가리지 않도록 기본은 넉넉히
+    for key, value in {
+        "GENIUS_ACCESS_TOKEN": "bench",
+        "HTTP_RATE": "100000",
+        "HTTP_BURST": "100000",
+        "JOB_STORE": "memory",
+    }.items():
+        os.environ.setdefault(key, value)
+    os.environ.pop("YTDLP_NO_PLUGINS", None)
+    # yt-dlp가 benchmarks/yt_dlp_plugins의 대역 추출기를 찾도록
+    sys.path.insert(0, str(_BENCH_DIR))
+
+
+async def _run(args, scenarios: list[str]) -> dict:
+    import main  # _configure 이후에 import (모듈 상수가 환경변수를 읽음)
+
+    # main이 INFO로 설정한 로깅 중 요청마다 찍히는 httpx 로그는 끔
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results: dict[str, dict] = {}
+    _instrument()
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=args.job_timeout
+        ) as client:
+            for name in scenarios:
+                recorder = _Active.recorder = Recorder()
+                with ResourceMonitor() as monitor:
+                    await _SCENARIOS[name](client, recorder, args)
+                results[name] = {
+                    "resources": monitor.result,
+                    "metrics": recorder.summary(monitor.wall),
+                }
+    return results
+
+
+# ─── 보고 · 비교 ─────────────────────────────────────────────────────────────
+
+
+def _print_report(results: dict, args) -> None:
+    for name, result in results.items():
+        res = result["resources"]
+        print(
+            f"\n[{name}] 요청 {args.requests}건, 동시 {args.concurrency}, {res['wall_s']:.1f}s"
+        )
+        print(f"  {'metric':<26} {'n':>6} {'err':>5} {'p50':>9} {'p95':>9} {'p99':>9} "
+              f"{'mean':>9} {'/s':>8}   (ms)")
+        for metric, m in result["metrics"].items():
+            print(
+                f"  {metric:<26} {m['n']:>6} {m['errors']:>5} {m['p50_ms']:>9.1f} "
+                f"{m['p95_ms']:>9.1f} {m['p99_ms']:>9.1f} {m['mean_ms']:>9.1f} {m['per_s']:>8.1f}"
+            )
+        print(
+            f"  CPU user {res['cpu_user_s']:.2f}s sys {res['cpu_system_s']:.2f}s "
+            f"ffmpeg {res['cpu_children_s']:.2f}s ({res['cpu_percent']:.0f}%)  "
+            f"RSS {res['rss_start_mb']:.0f}→{res['rss_end_mb']:.0f}MB "
+            f"(최대 {res['rss_peak_mb']:.0f}MB)"
+        )
+
+
+def _compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """기준 대비 p95 지연이 늘거나 처리량이 줄어든 항목."""
+    regressions = []
+    for scenario, result in results.items():
+        base = baseline.get(scenario)
+        if not base:
+            continue
+        for metric, m in result["metrics"].items():
+            old = base["metrics"].get(metric)
+            if not old:
+                continue
+            if old["p95_ms"] > 0 and m["p95_ms"] > old["p95_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{scenario} / {metric}: p95 {old['p95_ms']:.1f} → {m['p95_ms']:.1f}ms"
+                )
+            if old["per_s"] > 0 and m["per_s"] < old["per_s"] * (1 - threshold):
+                regressions.append(
+                    f"{scenario} / {metric}: 처리량 {old['per_s']:.1f} → {m['per_s']:.1f}/s"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenario", choices=[*_SCENARIOS, "all"])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--unique", type=int, default=0, help="서로 다른 곡 수 (기본: 요청 수)")
+    parser.add_argument("--latency-ms", type=float, default=50, help="대역 서버 응답 지연")
+    parser.add_argument("--pad-kb", type=int, default=300, help="HTML 응답에 채울 더미 마크업(KB)")
+    parser.add_argument("--audio-seconds", type=float, default=180, help="생성 오디오 길이")
+    parser.add_argument("--format", default="mp3", choices=["mp3", "m4a", "opus"])
+    parser.add_argument("--mode", default="full", choices=["full", "preview", "preview_then_full"])
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="/status 폴링 간격(초)")
+    parser.add_argument("--job-timeout", type=float, default=300)
+    parser.add_argument("--json", type=Path, help="결과를 JSON으로 저장")
+    parser.add_argument("--compare", type=Path, help="비교할 기준 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀로 볼 악화 비율")
+    args = parser.parse_args()
+    args.unique = args.unique or args.requests
+
+    scenarios = list(_SCENARIOS) if args.scenario == "all" else [args.scenario]
+    if shutil.which("ffmpeg") is None:
+        for name in ("download", "batch"):
+            if name in scenarios:
+                print(f"ffmpeg를 찾을 수 없어 {name} 시나리오를 건너뜁니다", file=sys.stderr)
+                scenarios.remove(name)
+    if not scenarios:
+        return 1
+
+    with tempfile.TemporaryDirectory(prefix="bench_app_") as tmp, _standin(args) as base_url:
+        _configure(base_url, Path(tmp))
+        results = asyncio.run(_run(args, scenarios))
+
+    _print_report(results, args)
+    if args.json:
+        args.json.write_text(
+            json.dumps({"config": vars(args) | {"json": None, "compare": None},
+                        "scenarios": results}, ensure_ascii=False, indent=2, default=str)
+        )
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["scenarios"]
+        regressions = _compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"[회귀] {line}")
+        print("회귀 없음" if not regressions else f"회귀 {len(regressions)}건")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""Melon·Genius HTML 추출 — 기존 BeautifulSoup 방식 vs parsers 모듈 비교.
+
+benchmarks/fixtures의 저장된 페이지로 두 방식의 추출 결과가 같은지 검증하고
+페이지별 파싱 시간(p50/p95)을 잰다. 실제 페이지처럼 크게 만들기 위해
+'<!-- PAD -->' 위치에 내비게이션·스크립트 더미 마크업을 채운다 (--pad-kb).
+
+    cd backend
+    pip install -r benchmarks/requirements.txt   # 비교 기준용 beautifulsoup4 (앱 런타임 의존성 아님)
+    python -m benchmarks.bench_parse --rounds 50 --pad-kb 300
+
+결과가 다르면 종료 코드 1.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+from bs4 import BeautifulSoup
+
+from agents.music_downloader.parsers import (
+    parse_genius_lyrics,
+    parse_melon_detail,
+    parse_melon_lyrics,
+)
+
+_FIXTURES = Path(__file__).parent / "fixtures"
+
+
+# ─── 기존 BeautifulSoup 추출 (비교 기준) ─────────────────────────────────────
+
+
+def _reference_melon_detail(html: str) -> dict:
+    soup = BeautifulSoup(html, "lxml")
+
+    cover_url = ""
+    for selector in [".image_typeAll img", ".thumb_album img", ".wrap_thumb img"]:
+        el = soup.select_one(selector)
+        if el and el.get("src"):
+            cover_url = el["src"]
+            break
+
+    song_title = ""
+    for selector in [".song_name", "#d_song_name", "h2.sub_title"]:
+        el = soup.select_one(selector)
+        if el:
+            for hidden in el.find_all(class_="none"):
+                hidden.decompose()
+            text = el.get_text(strip=True)
+            if text:
+                song_title = text
+                break
+
+    song_artist = ""
+    for selector in [".wrap_info .artist", ".section_info .artist",
+                     ".wrap_info .artist_name", "#d_artist_name a"]:
+        el = soup.select_one(selector)
+        if el:
+            text = el.get_text(strip=True)
+            if text:
+                song_artist = text
+                break
+
+    album = ""
+    release_date = ""
+    for dt in soup.find_all("dt"):
+        label = dt.get_text(strip=True)
+        dd = dt.find_next_sibling("dd")
+        if not dd:
+            continue
+        value = dd.get_text(strip=True)
+        if "앨범" in label:
+            album = value
+        elif "발매일" in label:
+            release_date = value
+
+    composer_names: list[str] = []
+    lyricist_names: list[str] = []
+    for li in soup.select("ul.list_person li"):
+        name_el = li.select_one(".artist_name")
+        role_el = li.select_one("span.type")
+        if not name_el or not role_el:
+            continue
+        name = name_el.get_text(strip=True)
+        role = role_el.get_text(strip=True)
+        if "작곡" in role and name not in composer_names:
+            composer_names.append(name)
+        elif "작사" in role and name not in lyricist_names:
+            lyricist_names.append(name)
+
+    lyrics = ""
+    for selector in ["#d_video_summary", ".lyric_wrap", "#d_song_lyrics", ".wrap_lyric"]:
+        el = soup.select_one(selector)
+        if el:
+            for br in el.find_all("br"):
+                br.replace_with("\n")
+            text = el.get_text(separator="\n", strip=True)
+            if len(text) > 20:
+                lyrics = text
+                break
+
+    return {
+        "cover_url": cover_url,
+        "title": song_title,
+        "artist": song_artist,
+        "album": album,
+        "release_date": release_date,
+        "composer": ", ".join(composer_names),
+        "lyricist": ", ".join(lyricist_names),
+        "lyrics": lyrics,
+    }
+
+
+def _reference_melon_lyrics(html: str) -> str:
+    soup = BeautifulSoup(html, "lxml")
+    for br in soup.find_all("br"):
+        br.replace_with("\n")
+    raw = soup.get_text(separator="\n", strip=True)
+    return raw if len(raw) > 20 else ""
+
+
+def _reference_genius_lyrics(html: str) -> str | None:
+    soup = BeautifulSoup(html, "lxml")
+    containers = soup.find_all("div", attrs={"data-lyrics-container": "true"})
+    if containers:
+        lines = []
+        for container in containers:
+            for br in container.find_all("br"):
+                br.replace_with("\n")
+            lines.append(container.get_text())
+        return "\n".join(lines).strip()
+    for div in soup.find_all("div", class_=re.compile(r"Lyrics")):
+        text = div.get_text(separator="\n", strip=True)
+        if len(text) > 100:
+            return text
+    return None
+
+
+# (픽스처, 새 추출 함수, 기준 추출 함수)
+_CASES: list[tuple[str, Callable[[str], object], Callable[[str], object]]] = [
+    ("melon_detail.html", parse_melon_detail, _reference_melon_detail),
+    ("melon_lyrics.html", parse_melon_lyrics, _reference_melon_lyrics),
+    ("genius_song.html", parse_genius_lyrics, _reference_genius_lyrics),
+    ("genius_legacy.html", parse_genius_lyrics, _reference_genius_lyrics),
+]
+
+
+def _padding(kb: int) -> str:
+    """실제 페이지의 메뉴·추천 목록·인라인 스크립트를 흉내 낸 더미 마크업."""
+    block = (
+        '<div class="section_recm"><ul class="list_recm">'
+        + "".join(
+            f'<li><a href="/song/detail.htm?songId={i}" class="thumb">'
+            f'<img src="/img/{i}.jpg" alt=""></a><div class="wrap_song">'
+            f'<span class="song">추천곡 {i}</span><span class="artist">아티스트 {i}</span>'
+            "</div></li>"
+            for i in range(20)
+        )
+        + "</ul></div>"
+        + '<script>var _cfg = {"items": ['
+        + ",".join(f'{{"id": {i}, "name": "item{i}"}}' for i in range(40))
+        + "]};</script>"
+    )
+    return block * max(0, kb * 1024 // len(block.encode()))
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def _time(fn: Callable[[str], object], html: str, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(html)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--pad-kb", type=int, default=300, help="페이지당 더미 마크업 크기(KB)")
+    args = parser.parse_args()
+
+    padding = _padding(args.pad_kb)
+    mismatches = 0
+    print(f"{'fixture':<20} {'size':>8} {'bs4 p50':>9} {'bs4 p95':>9} "
+          f"{'new p50':>9} {'new p95':>9} {'speedup':>8}   (ms)")
+    for name, new, reference in _CASES:
+        raw = (_FIXTURES / name).read_text(encoding="utf-8")
+        for html in (raw, raw.replace("<!-- PAD -->", padding)):
+            expected, actual = reference(html), new(html)
+            if expected != actual:
+                mismatches += 1
+                print(f"[불일치] {name} ({len(html)}자)\n  기준: {expected!r}\n  신규: {actual!r}")
+        html = raw.replace("<!-- PAD -->", padding)
+        old_ms = _time(reference, html, args.rounds)
+        new_ms = _time(new, html, args.rounds)
+        print(
+            f"{name:<20} {len(html) // 1024:>6}KB "
+            f"{_percentile(old_ms, 50):>9.2f} {_percentile(old_ms, 95):>9.2f} "
+            f"{_percentile(new_ms, 50):>9.2f} {_percentile(new_ms, 95):>9.2f} "
+            f"{statistics.median(old_ms) / statistics.median(new_ms):>7.1f}x"
+        )
+    print("추출 결과 일치" if not mismatches else f"불일치 {mismatches}건")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""YouTube 검색 모드별 지연 비교 (전체 해석 vs flat).
+
+캐시를 거치지 않고 _search_and_rank를 직접 호출하며, 실제 YouTube에 요청한다.
+
+    cd backend
+    python -m benchmarks.bench_search --rounds 5 "아이유 - 좋은날" "NewJeans - Ditto"
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from agents.music_downloader.downloader import _search_and_rank
+
+_DEFAULT_QUERIES = [
+    "아이유 - 좋은날",
+    "NewJeans - Ditto",
+    "BTS - Dynamite",
+    "잔나비 - 주저하는 연인들을 위해",
+]
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def _run(queries: list[str], rounds: int, flat: bool) -> tuple[list[float], list[str]]:
+    """모드별 검색 시간(초)과 각 쿼리의 1순위 URL 목록 반환."""
+    timings: list[float] = []
+    winners: list[str] = []
+    for _ in range(rounds):
+        for query in queries:
+            artist, _, title = query.partition(" - ")
+            if not title:
+                artist, title = "", artist
+            search_q = f"{artist} {title} official audio" if artist else title
+            start = time.perf_counter()
+            ranked = _search_and_rank(search_q, artist, title, flat=flat)
+            timings.append(time.perf_counter() - start)
+            winners.append(ranked[0]["webpage_url"] if ranked else "")
+    return timings, winners
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queries", nargs="*", default=_DEFAULT_QUERIES)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for label, flat in (("full", False), ("flat", True)):
+        timings, winners = _run(args.queries, args.rounds, flat)
+        results[label] = winners
+        print(
+            f"{label:>4}: n={len(timings)} "
+            f"p50={statistics.median(timings):.2f}s "
+            f"p95={_percentile(timings, 95):.2f}s "
+            f"max={max(timings):.2f}s"
+        )
+
+    same = sum(a == b for a, b in zip(results["full"], results["flat"]))
+    print(f"1순위 일치: {same}/{len(results['full'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""오프라인 벤치마크용 업스트림 대역 서버 — Melon·Deezer·Genius·YouTube·오디오.
+
+benchmarks/fixtures의 녹화 응답에 검색어의 아티스트·곡명을 채워 돌려주고,
+YouTube 검색 결과·영상 정보는 검색어에서 결정적으로 생성한다. 오디오는 사인파 WAV.
+
+    /melon/search/song/index.htm?q=     검색 결과 (goSongDetail 곡 ID)
+    /melon/song/detail.htm?songId=      상세 페이지 (melon_detail.html)
+    /melon/song/lyrics.htm?songId=      가사 AJAX (melon_lyrics.html)
+    /deezer/search?q=                   Deezer 검색 JSON
+    /genius-api/search?q=               Genius API 검색 JSON (곡 URL은 이 서버)
+    /genius/<slug>                      Genius 곡 페이지 (genius_song.html)
+    /youtube/search?q=                  yt-dlp 대역 추출기용 검색 목록 JSON
+    /youtube/video/<id>                 영상 정보 JSON
+    /audio/<id>.wav                     생성한 오디오 (Range 지원)
+
+Melon 검색어("아티스트 곡명")는 첫 단어를 아티스트, 나머지를 곡명으로 본다.
+벤치마크 드라이버(bench_app.py)가 별도 프로세스로 띄우며, 단독 실행도 가능하다.
+
+    cd backend
+    python -m benchmarks.standin --port 8765 --latency-ms 80
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import math
+import re
+import struct
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from .bench_parse import _padding
+
+_FIXTURES = Path(__file__).parent / "fixtures"
+
+# 상세 페이지 픽스처에 녹화된 원래 아티스트·곡명 (검색어로 치환)
+_FIXTURE_ARTIST = "테스트밴드"
+_FIXTURE_TITLE = "봄날의 정류장"
+
+_SAMPLE_RATE = 22050
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def _split_query(q: str) -> tuple[str, str]:
+    """Melon·Deezer·Genius 검색어 → (아티스트, 곡명)."""
+    q = re.sub(r"\s+official audio$", "", q.strip(), flags=re.IGNORECASE)
+    artist, _, title = q.partition(" - ") if " - " in q else q.partition(" ")
+    return artist.strip(), title.strip() or artist.strip()
+
+
+def _video_id(seed: str) -> str:
+    """시드 문자열 → 11자 YouTube 형식 영상 ID."""
+    digest = hashlib.sha1(seed.encode()).digest()
+    return base64.urlsafe_b64encode(digest).decode()[:11]
+
+
+def _make_wav(seconds: float) -> bytes:
+    """seconds 길이 16bit 모노 WAV — 1초 주기 사인파를 반복해 빠르게 생성."""
+    period = bytearray()
+    for i in range(_SAMPLE_RATE):
+        freq = 440 if i < _SAMPLE_RATE // 2 else 660
+        period += struct.pack("<h", int(8000 * math.sin(2 * math.pi * freq * i / _SAMPLE_RATE)))
+    whole, frac = divmod(int(seconds * _SAMPLE_RATE), _SAMPLE_RATE)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(_SAMPLE_RATE)
+        w.writeframes(bytes(period) * whole + bytes(period[: frac * 2]))
+    return buf.getvalue()
+
+
+class StandIn:
+    """대역 서버 상태 — 픽스처·생성 오디오·발급한 곡/영상 정보."""
+
+    def __init__(self, base_url: str, latency: float, audio_seconds: float, pad_kb: int) -> None:
+        self.base_url = base_url
+        self.latency = latency
+        self.audio_seconds = audio_seconds
+        padding = _padding(pad_kb)
+        self.fixtures = {
+            path.name: path.read_text(encoding="utf-8").replace("<!-- PAD -->", padding)
+            for path in _FIXTURES.iterdir()
+            if path.suffix in (".html", ".json")
+        }
+        self.audio = _make_wav(audio_seconds)
+        self._lock = threading.Lock()
+        self.songs: dict[str, tuple[str, str]] = {}  # Melon songId → (아티스트, 곡명)
+        self.videos: dict[str, dict] = {}  # 영상 ID → 검색 목록 항목
+
+    def song_id(self, artist: str, title: str) -> str:
+        digest = hashlib.sha1(f"{artist}|{title}".encode()).hexdigest()
+        song_id = str(30000000 + int(digest[:6], 16))
+        with self._lock:
+            self.songs[song_id] = (artist, title)
+        return song_id
+
+    def render(self, name: str, artist: str, title: str, **extra: str) -> str:
+        text = self.fixtures[name]
+        if name == "melon_detail.html":
+            text = text.replace(_FIXTURE_ARTIST, artist).replace(_FIXTURE_TITLE, title)
+        slug = re.sub(r"[^\w]+", "-", f"{artist} {title}").strip("-").lower()
+        replacements = {
+            "__ARTIST__": artist, "__TITLE__": title, "__SLUG__": slug,
+            "__BASE__": self.base_url, **extra,
+        }
+        for key, value in replacements.items():
+            if name.endswith(".json"):
+                value = json.dumps(value, ensure_ascii=False)[1:-1]
+            text = text.replace(key, value)
+        return text
+
+    def youtube_search(self, q: str) -> list[dict]:
+        """검색어 → 10개 후보. 공식 오디오 1개 + 라이브·커버·가사 영상 등 섞음."""
+        artist, title = _split_query(q)
+        variants = [
+            (f"{artist} - {title} (Live)", "Music Show", 1260),
+            (f"{title} cover", "Cover Channel", 205),
+            (f"{artist} - {title} (Official Audio)", f"{artist} - Topic", 214),
+            (f"{artist} {title} lyrics", "Lyrics Channel", 214),
+            (f"{title} 1 hour loop", "Loop Channel", 3600),
+        ] + [(f"{title} reaction {n}", "Reaction Channel", 600) for n in range(5)]
+        entries = []
+        for n, (vtitle, channel, duration) in enumerate(variants):
+            vid = _video_id(f"{q}|{n}")
+            entry = {
+                "id": vid,
+                "title": vtitle,
+                "channel": channel,
+                "uploader": channel,
+                "duration": duration,
+                "url": f"https://www.youtube.com/watch?v={vid}",
+            }
+            entries.append(entry)
+        with self._lock:
+            self.videos.update((e["id"], e) for e in entries)
+        return entries
+
+    def video(self, vid: str) -> dict:
+        with self._lock:
+            entry = self.videos.get(vid)
+        entry = dict(entry or {"id": vid, "title": f"Bench Video {vid}", "channel": "Bench"})
+        entry["duration"] = self.audio_seconds
+        entry["audio_url"] = f"{self.base_url}/audio/{vid}.wav"
+        entry["filesize"] = len(self.audio)
+        return entry
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:  # noqa: A002 — 요청 로그 생략
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _html(self, text: str) -> None:
+        self._send(200, text.encode(), "text/html; charset=utf-8")
+
+    def _json(self, data) -> None:
+        body = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+        self._send(200, body.encode(), "application/json; charset=utf-8")
+
+    def do_HEAD(self) -> None:
+        self.do_GET()
+
+    def do_GET(self) -> None:
+        state = self.server.state
+        url = urlsplit(self.path)
+        path = url.path
+        q = parse_qs(url.query).get("q", [""])[0]
+
+        if path == "/healthz":
+            return self._send(200, b"ok", "text/plain")
+        if path.startswith("/audio/"):
+            return self._audio(state.audio)
+
+        # 업스트림 왕복 지연 흉내 (오디오 전송 제외)
+        if state.latency:
+            time.sleep(state.latency)
+
+        if path == "/melon/search/song/index.htm":
+            artist, title = _split_query(q)
+            song_id = state.song_id(artist, title)
+            return self._html(state.render(
+                "melon_search.html", artist, title,
+                __QUERY__=q, __SONG_ID__=song_id, __SONG_ID_ALT__=str(int(song_id) + 1),
+            ))
+        if path in ("/melon/song/detail.htm", "/melon/song/lyrics.htm"):
+            song_id = parse_qs(url.query).get("songId", [""])[0]
+            artist, title = state.songs.get(song_id, (_FIXTURE_ARTIST, _FIXTURE_TITLE))
+            name = "melon_detail.html" if path.endswith("detail.htm") else "melon_lyrics.html"
+            return self._html(state.render(name, artist, title))
+        if path == "/deezer/search":
+            return self._json(state.render("deezer_search.json", *_split_query(q)))
+        if path == "/genius-api/search":
+            return self._json(state.render("genius_search.json", *_split_query(q)))
+        if path.startswith("/genius/"):
+            return self._html(state.fixtures["genius_song.html"])
+        if path == "/youtube/search":
+            return self._json(state.youtube_search(q))
+        if path.startswith("/youtube/video/"):
+            return self._json(state.video(path.rsplit("/", 1)[-1]))
+        self._send(404, b"not found", "text/plain")
+
+    def _audio(self, data: bytes) -> None:
+        size = len(data)
+        m = _RANGE_RE.fullmatch(self.headers.get("Range", "").strip())
+        if not m or not any(m.groups()):
+            return self._send(200, data, "audio/wav", {"Accept-Ranges": "bytes"})
+        first, last = m.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+        if start >= size or start > end:
+            return self._send(416, b"", "audio/wav", {"Content-Range": f"bytes */{size}"})
+        self._send(
+            206, data[start:end + 1], "audio/wav",
+            {"Accept-Ranges": "bytes", "Content-Range": f"bytes {start}-{end}/{size}"},
+        )
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    state: StandIn
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency: float = 0.0,
+    audio_seconds: float = 180,
+    pad_kb: int = 0,
+) -> _Server:
+    """대역 서버를 만들어 반환 (serve_forever는 호출자가). port=0이면 임의 포트."""
+    server = _Server((host, port), _Handler)
+    server.state = StandIn(
+        f"http://{host}:{server.server_address[1]}", latency, audio_seconds, pad_kb
+    )
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="업스트림 응답마다 추가 지연")
+    parser.add_argument("--audio-seconds", type=float, default=180, help="생성 오디오 길이")
+    parser.add_argument("--pad-kb", type=int, default=0, help="HTML 픽스처에 채울 더미 마크업(KB)")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency_ms / 1000, args.audio_seconds, args.pad_kb)
+    print(f"대역 서버: {server.state.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
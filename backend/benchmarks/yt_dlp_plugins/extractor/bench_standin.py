@@ -0,0 +1,75 @@
+"""yt-dlp 플러그인 — 오프라인 벤치마크용 YouTube 대역 추출기.
+
+BENCH_STANDIN_URL이 설정된 프로세스에서만 동작하며, ytsearch 검색과 YouTube 영상 URL을
+대역 서버(benchmarks/standin.py)의 /youtube/*, /audio/* 응답으로 대신 처리한다.
+yt-dlp는 sys.path의 yt_dlp_plugins 네임스페이스 패키지에서 플러그인을 찾으므로
+bench_app.py가 benchmarks 디렉터리를 sys.path에 추가해 활성화한다.
+플러그인 추출기는 내장 추출기보다 먼저 검사된다.
+"""
+from __future__ import annotations
+
+import os
+
+from yt_dlp.extractor.common import InfoExtractor, SearchInfoExtractor
+
+
+def _standin_url() -> str:
+    return os.getenv("BENCH_STANDIN_URL", "").rstrip("/")
+
+
+class BenchYoutubeSearchIE(SearchInfoExtractor):
+    IE_NAME = "bench:youtube:search"
+    _SEARCH_KEY = "ytsearch"
+
+    @classmethod
+    def suitable(cls, url):
+        return bool(_standin_url()) and super().suitable(url)
+
+    def _search_results(self, query):
+        entries = self._download_json(
+            f"{_standin_url()}/youtube/search", query, query={"q": query}
+        )
+        for entry in entries:
+            yield self.url_result(
+                entry["url"],
+                ie=BenchYoutubeIE.ie_key(),
+                video_id=entry["id"],
+                video_title=entry["title"],
+                channel=entry["channel"],
+                uploader=entry["uploader"],
+                duration=entry["duration"],
+            )
+
+
+class BenchYoutubeIE(InfoExtractor):
+    IE_NAME = "bench:youtube"
+    _VALID_URL = (
+        r"https?://(?:(?:www|m|music)\.youtube\.com/watch\?(?:.*&)?v=|youtu\.be/)"
+        r"(?P<id>[\w-]{11})"
+    )
+
+    @classmethod
+    def suitable(cls, url):
+        return bool(_standin_url()) and super().suitable(url)
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        info = self._download_json(f"{_standin_url()}/youtube/video/{video_id}", video_id)
+        return {
+            "id": video_id,
+            "title": info["title"],
+            "channel": info.get("channel"),
+            "uploader": info.get("uploader"),
+            "duration": info.get("duration"),
+            "webpage_url": f"https://www.youtube.com/watch?v={video_id}",
+            "formats": [{
+                "format_id": "wav",
+                "url": info["audio_url"],
+                "ext": "wav",
+                "acodec": "pcm_s16le",
+                "vcodec": "none",
+                "abr": 352,
+                "asr": 22050,
+                "filesize": info.get("filesize"),
+            }],
+        }
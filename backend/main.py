@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
@@ -5,9 +7,19 @@ import logging
 
 logging.basicConfig(level=logging.INFO)
 
+from agents.music_downloader.metrics import MetricsMiddleware, metrics_response
+from agents.music_downloader.router import lifespan as music_lifespan
 from agents.music_downloader.router import router as music_router
 
-app = FastAPI(title="Yongent API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 에이전트별 공용 리소스(커넥션 풀 등) 생성·정리
+    async with music_lifespan(app):
+        yield
+
+
+app = FastAPI(title="Yongent API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +28,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 라우트별 요청 시간 지표 + 느린 요청 로그 (SLOW_REQUEST_SECONDS)
+app.add_middleware(MetricsMiddleware)
 
 # 에이전트 라우터 등록
 # 새 에이전트 추가 시: app.include_router(new_router, prefix="/new-agent")
@@ -27,5 +41,11 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 수집 엔드포인트 — 단계별 소요 시간·업스트림·캐시·대기열 지표."""
+    return metrics_response()
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8001, reload=False)
@@ -14,6 +14,7 @@ interface SearchResult {
   composer: string;
   lyricist: string;
   youtube_url: string;
+  download_token: string;
 }
 
 type SearchStatus = "idle" | "loading" | "done" | "url" | "error";
@@ -25,6 +26,22 @@ function formatDateShort(dateStr: string): string {
   return parts[0] || "";
 }
 
+// 진행률을 단계 문구 뒤에 덧붙임 (예: "음원 다운로드 중 42% · 1.2MB/s")
+function formatStep(step: string, progress: Record<string, number | string | null> | null): string {
+  if (!progress) return step;
+  if (progress.stage === "download") {
+    const done = Number(progress.downloaded_bytes) || 0;
+    const total = Number(progress.total_bytes) || 0;
+    const speed = Number(progress.speed) || 0;
+    const parts = [];
+    if (total) parts.push(`${Math.floor((done / total) * 100)}%`);
+    if (speed) parts.push(`${(speed / 1024 / 1024).toFixed(1)}MB/s`);
+    return parts.length ? `${step} ${parts.join(" · ")}` : step;
+  }
+  if (progress.percent != null) return `${step} ${Math.floor(Number(progress.percent))}%`;
+  return step;
+}
+
 // ─── 다운로드 버튼 섹션 ────────────────────────────────────────────────────
 
 interface DownloadSectionProps {
@@ -142,7 +159,6 @@ export default function MusicDownloaderPage() {
   const [jobId, setJobId] = useState<string | null>(null);
   const [savePath, setSavePath] = useState("");
   const [sampleDownloadUrl, setSampleDownloadUrl] = useState<string | null>(null);
-  const pollRef = useRef<ReturnType<typeof setInterval> | null>(null);
   const searchResultRef = useRef<SearchResult | null>(null);
 
   // 쿠키
@@ -165,7 +181,7 @@ export default function MusicDownloaderPage() {
       .catch(() => setCookieActive(false));
   }, []);
 
-  // searchResult → ref 동기화 (폴링 클로저에서 최신값 참조)
+  // searchResult → ref 동기화 (이벤트 핸들러 클로저에서 최신값 참조)
   useEffect(() => {
     searchResultRef.current = searchResult;
   }, [searchResult]);
@@ -179,48 +195,35 @@ export default function MusicDownloaderPage() {
     }
   }, [searchStatus]);
 
-  // 다운로드 폴링
+  // 다운로드 상태 구독 (SSE — 상태·진행률 변경 시 서버가 푸시)
   useEffect(() => {
-    if (
-      !jobId ||
-      downloadStatus === "done" ||
-      downloadStatus === "error" ||
-      downloadStatus === "idle"
-    ) {
-      if (pollRef.current) clearInterval(pollRef.current);
-      return;
-    }
-
-    pollRef.current = setInterval(async () => {
-      try {
-        const res = await fetch(`${API}/music-downloader/status/${jobId}`);
-        const data = await res.json();
-        setDownloadStep(data.step || "");
-
-        if (data.status === "done") {
-          clearInterval(pollRef.current!);
-          setDownloadStatus("done");
-          setSampleDownloadUrl(data.sample_download_url || null);
-          triggerBrowserDownload(`${API}${data.download_url}`, false);
-          if (data.sample_download_url) {
-            setTimeout(() => triggerBrowserDownload(`${API}${data.sample_download_url}`, true), 1000);
-          }
-        } else if (data.status === "error") {
-          clearInterval(pollRef.current!);
-          setDownloadStatus("error");
-          setDownloadError(data.error || "다운로드 실패");
-        } else {
-          setDownloadStatus(data.status);
+    if (!jobId) return;
+
+    const source = new EventSource(`${API}/music-downloader/events/${jobId}`);
+    source.addEventListener("status", (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      setDownloadStep(formatStep(data.step || "", data.progress));
+
+      if (data.status === "done") {
+        source.close();
+        setDownloadStatus("done");
+        setSampleDownloadUrl(data.sample_download_url || null);
+        triggerBrowserDownload(`${API}${data.download_url}`, false);
+        if (data.sample_download_url) {
+          setTimeout(() => triggerBrowserDownload(`${API}${data.sample_download_url}`, true), 1000);
         }
-      } catch {
-        // 네트워크 오류 무시
+      } else if (data.status === "error" || data.status === "cancelled") {
+        source.close();
+        setDownloadStatus("error");
+        setDownloadError(data.error || (data.status === "cancelled" ? "취소되었습니다" : "다운로드 실패"));
+      } else {
+        setDownloadStatus(data.status);
       }
-    }, 1500);
+    });
+    // 연결이 끊기면 EventSource가 자동 재연결함
 
-    return () => {
-      if (pollRef.current) clearInterval(pollRef.current);
-    };
-  }, [jobId, downloadStatus]);
+    return () => source.close();
+  }, [jobId]);
 
   async function triggerBrowserDownload(url: string, isSample: boolean) {
     try {
@@ -327,7 +330,11 @@ export default function MusicDownloaderPage() {
       const q = query.trim();
       const isUrl = q.startsWith("http");
       const saveDir = savePath.trim() || null;
-      const body = isUrl ? { url: q, save_dir: saveDir } : { query: q, save_dir: saveDir };
+      // 검색 결과의 토큰을 함께 보내면 서버가 YouTube 검색을 다시 하지 않음 (만료 시 query로 진행)
+      const token = !isUrl && searchResult?.download_token ? searchResult.download_token : null;
+      const body = isUrl
+        ? { url: q, save_dir: saveDir }
+        : { query: q, token, save_dir: saveDir };
 
       const res = await fetch(`${API}/music-downloader/download`, {
         method: "POST",